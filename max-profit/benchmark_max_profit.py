@@ -0,0 +1,70 @@
+"""
+Time the max-profit solvers on a range of horizons.
+
+The brute force is skipped above --bruteforce-limit, where it takes
+too long; every solver that runs is checked against the others.
+
+Usage:
+    python benchmark_max_profit.py --sizes 50 200 500 1000 2000
+"""
+import argparse
+import time
+
+from max_profit import find_max_profit, find_max_profit_bruteforce, find_max_profit_numpy
+
+SOLVERS = [
+    ("bruteforce", find_max_profit_bruteforce),
+    ("numpy", find_max_profit_numpy),
+    ("dp", find_max_profit)
+]
+
+
+def time_solver(solver, total_time, repeat):
+    """
+    Best of `repeat` runs, in seconds, and the solver's result.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = solver(total_time)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[50, 200, 500, 1000, 2000])
+    parser.add_argument("--bruteforce-limit", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'n':>7}" + "".join(f"{name + ' s':>14}" for name, _ in SOLVERS)
+          + f"{'numpy x':>10}{'dp x':>10}")
+
+    for total_time in args.sizes:
+        times = {}
+        results = {}
+        for name, solver in SOLVERS:
+            if name == "bruteforce" and total_time > args.bruteforce_limit:
+                continue
+            times[name], results[name] = time_solver(solver, total_time, args.repeat)
+
+        expected = next(iter(results.values()))
+        assert all(result == expected for result in results.values()), total_time
+
+        row = f"{total_time:>7}"
+        for name, _ in SOLVERS:
+            row += f"{times[name]:>14.4f}" if name in times else f"{'-':>14}"
+
+        # Speedups over the brute force
+        for name in ("numpy", "dp"):
+            if "bruteforce" in times:
+                row += f"{times['bruteforce'] / times[name]:>10.1f}"
+            else:
+                row += f"{'-':>10}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,128 @@
+from dataclasses import dataclass
+
+import numpy as np
+from scheduler import PropertyType, Schedule, solve, build_schedule
+
+
+# The property catalogue: build time and earning per unit time.
+# Theatres earn $300 per build unit, pubs $250 and commercial parks
+# $200, so they are built in that order (see scheduler.smith_order).
+THEATRE = PropertyType("T", 5, 1500, label="Theatre", land="2 × 1")
+PUB = PropertyType("P", 4, 1000, label="Pub", land="1 × 1")
+COMMERCIAL_PARK = PropertyType("C", 10, 2000, label="Commercial Park", land="3 × 1")
+
+PROPERTIES = [THEATRE, PUB, COMMERCIAL_PARK]
+
+
 def find_max_profit(total_time):
+    """
+    Maximum earnings and every (T, P, C) mix that reaches them, in the
+    same order as the brute force. Uses the O(n * K) dynamic program in
+    scheduler.solve over the fixed theatre -> pub -> commercial order.
+    """
+    return solve(PROPERTIES, total_time)
+
+
+@dataclass(frozen=True, slots=True)
+class ProfitResult:
+    """
+    Everything the UI shows for one horizon: the maximum, every tied mix,
+    and the schedule of the first one (per-type earnings, timeline and
+    totals), so nothing has to be re-simulated.
+    """
+    total_time: int
+    max_earning: int
+    solutions: list
+    schedule: Schedule
+
+
+def solve_max_profit(total_time, table=None):
+    """
+    find_max_profit as a ProfitResult. With a profit_table.ProfitTable
+    the maximum and ties are looked up instead of solved.
+    """
+    if table is not None:
+        max_earning, solutions = table.lookup(total_time)
+    else:
+        max_earning, solutions = find_max_profit(total_time)
+
+    return ProfitResult(
+        total_time=total_time,
+        max_earning=max_earning,
+        solutions=solutions,
+        schedule=build_schedule(PROPERTIES, solutions[0], total_time)
+    )
+
+
+def _series_earnings(count, start, build_time, rate, total_time):
+    """
+    Earnings of `count` properties built back to back from time `start`:
+    the i-th finishes at start + i * build_time, so the sum is the
+    arithmetic series rate * (count * (total_time - start)
+    - build_time * count * (count + 1) / 2). Works on NumPy arrays.
+    """
+    return rate * (count * (total_time - start) - build_time * count * (count + 1) // 2)
+
+
+def find_max_profit_numpy(total_time):
+    """
+    Same result as find_max_profit_bruteforce, scoring every (T, P, C)
+    combination with NumPy instead of simulating each build.
+
+    For each theatre count the (P, C) grid is scored in one vectorized
+    pass with the closed-form series above. Combinations that take longer
+    than total_time are masked out, and ties come from np.nonzero on the
+    maximum. One (P, C) slice at a time keeps memory at O(n^2).
+    """
+    theatre_time, theatre_rate = THEATRE.build_time, THEATRE.rate
+    pub_time, pub_rate = PUB.build_time, PUB.rate
+    park_time, park_rate = COMMERCIAL_PARK.build_time, COMMERCIAL_PARK.rate
+
+    p = np.arange(total_time // pub_time + 1, dtype=np.int64)[:, None]
+    c = np.arange(total_time // park_time + 1, dtype=np.int64)[None, :]
+
+    max_earning = -1
+    best_solutions = []
+
+    for t in range(total_time // theatre_time + 1):
+        start = t * theatre_time
+        earnings = (
+            _series_earnings(t, 0, theatre_time, theatre_rate, total_time)
+            + _series_earnings(p, start, pub_time, pub_rate, total_time)
+            + _series_earnings(c, start + p * pub_time, park_time, park_rate, total_time)
+        )
+
+        # Mask combinations that do not fit in total_time
+        fits = start + p * pub_time + c * park_time <= total_time
+        earnings = np.where(fits, earnings, -1)
+
+        best = int(earnings.max())
+        if best < max_earning:
+            continue
+        if best > max_earning:
+            max_earning = best
+            best_solutions = []
+
+        for p_count, c_count in zip(*np.nonzero(earnings == best)):
+            best_solutions.append({"T": t, "P": int(p_count), "C": int(c_count)})
+
+    return max_earning, best_solutions
+
+
+def find_max_profit_bruteforce(total_time):
+    """
+    Reference solver: tries every (T, P, C) combination and simulates
+    the builds. Roughly O(n^4); kept for testing find_max_profit.
+    """
     # Time required to build each type
-    theatre_time = 5
-    pub_time = 4
-    commercial_time = 10
+    theatre_time = THEATRE.build_time
+    pub_time = PUB.build_time
+    commercial_time = COMMERCIAL_PARK.build_time
 
     # Earnings per unit time
-    theatre_earning = 1500
-    pub_earning = 1000
-    commercial_earning = 2000
+    theatre_earning = THEATRE.rate
+    pub_earning = PUB.rate
+    commercial_earning = COMMERCIAL_PARK.rate
 
     max_earning = 0
     best_solutions = []
@@ -1,5 +1,6 @@
 import streamlit as st
-from max_profit import find_max_profit
+from max_profit import PROPERTIES, solve_max_profit
+from profit_table import ProfitTable
 
 # PAGE CONFIG 
 st.set_page_config(
@@ -7,14 +8,23 @@ st.set_page_config(
     layout="wide"
 )
 
-# CONSTANTS 
-THEATRE_TIME = 5
-PUB_TIME = 4
-PARK_TIME = 10
+# CONSTANTS
+ICONS = {"T": "🎭", "P": "🍺", "C": "🏢"}
+
+# Horizons answered straight from the precomputed table
+PROFIT_TABLE_FOLDER = "profit_table"
+PRECOMPUTED_TIME = 100_000
+# Longest horizon a user may ask for; the shared table grows up to this
+MAX_TIME = 10 * PRECOMPUTED_TIME
+
+
+# PROFIT TABLE (shared by all sessions, extended on demand)
+@st.cache_resource
+def get_profit_table():
+    table = ProfitTable(PROPERTIES, PROFIT_TABLE_FOLDER)
+    table.extend(PRECOMPUTED_TIME)
+    return table
 
-THEATRE_EARN = 1500
-PUB_EARN = 1000
-PARK_EARN = 2000
 
 # TITLE 
 st.title("🏗️ Max Profit Problem")
@@ -27,28 +37,13 @@ st.divider()
 # AVAILABLE PROPERTIES
 st.subheader("🏘️ Available Properties")
 
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    st.markdown("### 🎭 Theatre")
-    st.write("**Build Time:** 5 units")
-    st.write("**Land:** 2 × 1")
-    st.write("**Earning / Unit:** $1500")
-    st.write("**Efficiency:** $300 per time unit")
-
-with col2:
-    st.markdown("### 🍺 Pub")
-    st.write("**Build Time:** 4 units")
-    st.write("**Land:** 1 × 1")
-    st.write("**Earning / Unit:** $1000")
-    st.write("**Efficiency:** $250 per time unit")
-
-with col3:
-    st.markdown("### 🏢 Commercial Park")
-    st.write("**Build Time:** 10 units")
-    st.write("**Land:** 3 × 1")
-    st.write("**Earning / Unit:** $2000")
-    st.write("**Efficiency:** $200 per time unit")
+for col, prop in zip(st.columns(len(PROPERTIES)), PROPERTIES):
+    with col:
+        st.markdown(f"### {ICONS.get(prop.name, '🏗️')} {prop.label}")
+        st.write(f"**Build Time:** {prop.build_time} units")
+        st.write(f"**Land:** {prop.land}")
+        st.write(f"**Earning / Unit:** ${prop.rate}")
+        st.write(f"**Efficiency:** ${float(prop.efficiency):g} per time unit")
 
 st.divider()
 
@@ -60,6 +55,7 @@ with left_col:
     total_time = st.number_input(
         "Enter Total Time Units",
         min_value=1,
+        max_value=MAX_TIME,
         step=1
     )
 
@@ -69,67 +65,69 @@ with right_col:
     st.subheader("📊 Optimal Solution")
 
     if calculate:
-        earnings, solutions = find_max_profit(total_time)
+        result = solve_max_profit(int(total_time), get_profit_table())
+        schedule = result.schedule
 
         # Show maximum profit
-        st.success(f"**Maximum Profit:** ${earnings}")
+        st.success(f"**Maximum Profit:** ${result.max_earning}")
 
         # Use only the first optimal solution
-        sol = solutions[0]
-
         st.markdown("**Optimal Construction Mix:**")
         st.write(
-            f"- Theatre: {sol['T']} | Pub: {sol['P']} | Commercial Park: {sol['C']}"
+            " | ".join(
+                f"{prop.label}: {schedule.counts[prop.name]}" for prop in PROPERTIES
+            )
         )
+        if len(result.solutions) > 1:
+            st.caption(f"{len(result.solutions)} mixes reach this maximum.")
 
-        # Earnings Breakdown
+        # Earnings Breakdown (from the solver's schedule)
         st.markdown("### 💵 Earnings Breakdown")
 
-        current_time = 0
-        theatre_earnings = 0
-        pub_earnings = 0
-        park_earnings = 0
-
-        # Build theatres
-        for _ in range(sol["T"]):
-            current_time += THEATRE_TIME
-            if current_time <= total_time:
-                theatre_earnings += (total_time - current_time) * THEATRE_EARN
-
-        # Build pubs
-        for _ in range(sol["P"]):
-            current_time += PUB_TIME
-            if current_time <= total_time:
-                pub_earnings += (total_time - current_time) * PUB_EARN
-
-        # Build commercial parks
-        for _ in range(sol["C"]):
-            current_time += PARK_TIME
-            if current_time <= total_time:
-                park_earnings += (total_time - current_time) * PARK_EARN
-
-        if sol["T"] > 0:
-            st.write(f"Theatre × {sol['T']} → **${theatre_earnings}**")
-        if sol["P"] > 0:
-            st.write(f"Pub × {sol['P']} → **${pub_earnings}**")
-        if sol["C"] > 0:
-            st.write(f"Commercial Park × {sol['C']} → **${park_earnings}**")
+        for prop in PROPERTIES:
+            if schedule.counts[prop.name] > 0:
+                st.write(
+                    f"{prop.label} × {schedule.counts[prop.name]} → "
+                    f"**${schedule.earnings_by_type[prop.name]}**"
+                )
+        st.write(
+            f"Construction ends at t = {schedule.construction_time} "
+            f"of {schedule.total_time}"
+        )
+
+        # Completion Timeline
+        with st.expander("🕒 Completion Timeline"):
+            st.dataframe(
+                [
+                    {
+                        "#": i,
+                        "Property": f"{ICONS.get(build.prop.name, '🏗️')} {build.prop.label}",
+                        "Start": build.start,
+                        "Finish": build.finish,
+                        "Earnings": build.earnings
+                    }
+                    for i, build in enumerate(schedule.timeline, start=1)
+                ],
+                hide_index=True
+            )
 
         st.divider()
 
         # Formula Explanation
         st.markdown("### 📐 Earnings Formula")
 
+        rates = "\n".join(
+            f"                - {prop.label} → ${prop.rate} per unit time  "
+            for prop in PROPERTIES
+        )
         st.markdown(
-            """
+            f"""
             **Earnings = Σ (Remaining Time After Construction × Earning Rate)**
 
             **Where:**
             - Remaining Time = Total Time − Cumulative Construction Time  
             - Earning Rate depends on the property type:
-                - Theatre → $1500 per unit time  
-                - Pub → $1000 per unit time  
-                - Commercial Park → $2000 per unit time  
+{rates}
 
             The calculation is done sequentially since **only one property
             can be constructed at a time**.
@@ -0,0 +1,208 @@
+import os
+import json
+import pickle
+import threading
+
+import numpy as np
+
+from scheduler import smith_order, _best_table, MAX_SOLUTIONS
+
+
+class ProfitTable:
+    """
+    Maximum earnings and tied solutions for every horizon 0..max_time,
+    computed in one pass and stored on disk, so that any total_time in
+    range is answered by an array lookup.
+
+    The DP table of scheduler.solve does not depend on the horizon:
+    best[0][r] already is the answer for total_time = r. The tied mixes
+    of every horizon are built incrementally from those of shorter ones,
+
+        ties(k, r) = ties(k + 1, r)                  if stopping is optimal
+                   + ties(k, r - time_k) + one k     if building is optimal
+
+    and stored in CSR form (solutions[offsets[r]:offsets[r + 1]]). At
+    most max_solutions ties are kept per horizon (and per DP cell), like
+    scheduler.solve.
+
+    Files in folder (memory-mapped on load):
+        dp.npy          DP table, shape (types + 1, max_time + 1)
+        offsets.npy     start of each horizon's ties in solutions.npy
+        solutions.npy   tied counts, one row per mix, catalogue order
+        frontier.pkl    ties of the last horizons, to extend the table
+        meta.json       catalogue, max_solutions and max_time
+    """
+
+    def __init__(self, catalogue, folder="profit_table", max_solutions=MAX_SOLUTIONS):
+        self.catalogue = list(catalogue)
+        self.order = smith_order(self.catalogue)
+        self.folder = folder
+        self.max_solutions = max_solutions
+
+        self.max_time = -1
+        self.dp = None
+        self.offsets = None
+        self.solutions = None
+        self._frontier = None
+        self.lock = threading.Lock()
+
+        self.load()
+
+    def _catalogue_meta(self):
+        return [[prop.name, prop.build_time, prop.rate] for prop in self.catalogue]
+
+    # PERSISTENCE
+    def load(self):
+        """
+        Memory-map a saved table for the same catalogue, if there is one.
+        """
+        meta_path = os.path.join(self.folder, "meta.json")
+        if not os.path.exists(meta_path):
+            return False
+
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["catalogue"] != self._catalogue_meta():
+            print("Profit table was built for another catalogue; ignoring it.")
+            return False
+        if meta.get("max_solutions") != self.max_solutions:
+            print("Profit table was built with another max_solutions; ignoring it.")
+            return False
+
+        self.dp = np.load(os.path.join(self.folder, "dp.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(self.folder, "offsets.npy"), mmap_mode="r")
+        self.solutions = np.load(os.path.join(self.folder, "solutions.npy"), mmap_mode="r")
+        with open(os.path.join(self.folder, "frontier.pkl"), "rb") as f:
+            self._frontier = pickle.load(f)
+
+        self.max_time = meta["max_time"]
+        return True
+
+    def save(self):
+        os.makedirs(self.folder, exist_ok=True)
+
+        for name, array in (
+            ("dp", self.dp),
+            ("offsets", self.offsets),
+            ("solutions", self.solutions)
+        ):
+            path = os.path.join(self.folder, name + ".npy")
+            np.save(path + ".tmp.npy", array)
+            os.replace(path + ".tmp.npy", path)
+
+        path = os.path.join(self.folder, "frontier.pkl")
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(self._frontier, f)
+        os.replace(path + ".tmp", path)
+
+        # Written last: a table is only used once its meta is in place
+        path = os.path.join(self.folder, "meta.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "catalogue": self._catalogue_meta(),
+                    "max_solutions": self.max_solutions,
+                    "max_time": self.max_time
+                },
+                f
+            )
+        os.replace(path + ".tmp", path)
+
+    # BUILDING
+    def extend(self, max_time):
+        """
+        Cover horizons up to max_time. Only the ties of the new horizons
+        are computed; the DP table itself is one NumPy pass per type.
+        """
+        with self.lock:
+            if max_time > self.max_time:
+                self._extend(max_time)
+
+    def _extend(self, max_time):
+        start = self.max_time + 1
+        dp = _best_table(self.order, max_time)
+        n_types = len(self.order)
+
+        # window[k][r]: ties of types order[k:] with r units left, kept
+        # until horizon r + time_k has used them
+        window = self._frontier or [{} for _ in range(n_types)]
+        nothing = [(0,) * n_types]
+        position = [self.order.index(prop) for prop in self.catalogue]
+
+        new_offsets = []
+        new_solutions = []
+        count = len(self.solutions) if self.solutions is not None else 0
+
+        for r in range(start, max_time + 1):
+            ties = nothing
+            for k in range(n_types - 1, -1, -1):
+                build_time, rate = self.order[k].build_time, self.order[k].rate
+                target = dp[k][r]
+                level = []
+
+                # Stop building type k
+                if dp[k + 1][r] == target:
+                    level.extend(ties)
+
+                # Build one more of type k
+                if r >= build_time:
+                    shorter = window[k].pop(r - build_time)
+                    if rate * (r - build_time) + dp[k][r - build_time] == target:
+                        level.extend(
+                            counts[:k] + (counts[k] + 1,) + counts[k + 1:]
+                            for counts in shorter
+                        )
+
+                if self.max_solutions is not None:
+                    del level[self.max_solutions:]
+                window[k][r] = level
+                ties = level
+
+            # Catalogue order, sorted like find_max_profit
+            mixes = sorted(tuple(counts[i] for i in position) for counts in ties)
+
+            new_offsets.append(count)
+            new_solutions.extend(mixes)
+            count += len(mixes)
+
+        new_offsets.append(count)
+        new_solutions = np.array(new_solutions, dtype=np.int32).reshape(-1, n_types)
+
+        if self.offsets is None:
+            self.offsets = np.array(new_offsets, dtype=np.int64)
+            self.solutions = new_solutions
+        else:
+            # The old end offset is the first new start
+            self.offsets = np.concatenate(
+                [self.offsets[:-1], np.array(new_offsets, dtype=np.int64)]
+            )
+            self.solutions = np.concatenate([self.solutions, new_solutions])
+
+        self.dp = dp
+        self._frontier = window
+        self.max_time = max_time
+        self.save()
+
+    # QUERIES
+    def earnings(self, total_time):
+        """
+        Maximum earnings for total_time (extends the table if needed).
+        """
+        if total_time > self.max_time:
+            self.extend(max(total_time, 2 * self.max_time))
+        return int(self.dp[0][total_time])
+
+    def lookup(self, total_time):
+        """
+        (max earnings, tied solutions) for total_time, in the same format
+        as find_max_profit.
+        """
+        if total_time < 0:
+            raise ValueError("total_time must be non-negative.")
+
+        earnings = self.earnings(total_time)
+        rows = self.solutions[self.offsets[total_time]:self.offsets[total_time + 1]]
+        names = [prop.name for prop in self.catalogue]
+        return earnings, [
+            dict(zip(names, (int(count) for count in row))) for row in rows
+        ]
@@ -0,0 +1,198 @@
+"""
+Scheduling engine for the max-profit problem with any catalogue of
+property types.
+
+Properties are built one at a time and each earns `rate` per time unit
+from the moment it is finished until `total_time`. solve() finds the
+maximum earnings and every mix of counts that reaches it;
+build_schedule() lays one mix out as a timeline of builds.
+"""
+from dataclasses import dataclass
+from fractions import Fraction
+
+import numpy as np
+
+# Tied mixes reported per horizon by default. Catalogues with similar
+# types can tie in combinatorially many ways (12 identical types over
+# 60 time units already give millions of mixes).
+MAX_SOLUTIONS = 1000
+
+
+@dataclass(frozen=True)
+class PropertyType:
+    name: str
+    build_time: int
+    rate: int
+    label: str = ""
+    land: str = ""
+
+    @property
+    def efficiency(self):
+        """
+        Earning rate per unit of build time.
+        """
+        return Fraction(self.rate, self.build_time)
+
+
+def smith_order(catalogue):
+    """
+    Build order that maximizes earnings for any mix: decreasing rate /
+    build time (Smith's rule). Swapping adjacent builds i, j changes the
+    earnings by rate_j * time_i - rate_i * time_j, so no exchange can
+    improve on this order. Equal ratios keep their catalogue order.
+    """
+    return sorted(catalogue, key=lambda prop: -prop.efficiency)
+
+
+def _best_table(order, total_time):
+    """
+    best[k][r]: most that types order[k:] can earn with r time units left,
+
+        best[k][r] = max(best[k + 1][r], rate_k * (r - time_k) + best[k][r - time_k])
+
+    Along r = q, q + time_k, q + 2 time_k, ... the second term adds a
+    known amount per step, so subtracting its running sum S turns the
+    recurrence into a prefix maximum:
+
+        best[k][r_j] = S_j + max(best[k + 1][r_i] - S_i for i <= j)
+
+    which NumPy computes for all residues q at once. O(n * K) overall.
+    """
+    n = total_time + 1
+    best = np.zeros((len(order) + 1, n), dtype=np.int64)
+
+    for k in range(len(order) - 1, -1, -1):
+        build_time, rate = order[k].build_time, order[k].rate
+
+        # Row j of the grid holds r = j * build_time + q, q = column
+        rows = -(-n // build_time)
+        r = np.arange(rows * build_time, dtype=np.int64).reshape(rows, build_time)
+
+        # Building at remaining time r earns rate * (r - build_time)
+        step = np.where(r >= build_time, rate * (r - build_time), 0)
+        running = np.cumsum(step, axis=0)
+
+        below = np.full(rows * build_time, np.iinfo(np.int64).min // 2, dtype=np.int64)
+        below[:n] = best[k + 1]
+        below = below.reshape(rows, build_time)
+
+        best[k] = (running + np.maximum.accumulate(below - running, axis=0)).ravel()[:n]
+
+    return best
+
+
+def solve(catalogue, total_time, max_solutions=MAX_SOLUTIONS):
+    """
+    Maximum earnings within total_time, and every mix reaching it as
+    {name: count} dicts (keys in catalogue order), sorted by the counts
+    in catalogue order. max_solutions caps how many tied mixes are
+    collected (None = all); past the cap, which ties are kept is
+    unspecified.
+    """
+    if total_time < 0:
+        raise ValueError("total_time must be non-negative.")
+    if any(prop.build_time <= 0 for prop in catalogue):
+        raise ValueError("Build times must be positive.")
+
+    order = smith_order(catalogue)
+    best = _best_table(order, total_time)
+    max_earning = int(best[0][total_time])
+
+    # Every path through optimal choices is one tied mix
+    solutions = []
+    n_types = len(order)
+    stack = [(total_time, 0, (0,) * n_types)]
+    while stack and (max_solutions is None or len(solutions) < max_solutions):
+        r, k, counts = stack.pop()
+        if k == n_types:
+            solutions.append(counts)
+            continue
+
+        target = best[k][r]
+        build_time, rate = order[k].build_time, order[k].rate
+
+        # Stop building type k
+        if best[k + 1][r] == target:
+            stack.append((r, k + 1, counts))
+
+        # Build one more of type k
+        if r >= build_time and rate * (r - build_time) + best[k][r - build_time] == target:
+            more = counts[:k] + (counts[k] + 1,) + counts[k + 1:]
+            stack.append((r - build_time, k, more))
+
+    # Report counts in catalogue order
+    position = {prop.name: k for k, prop in enumerate(order)}
+    mixes = sorted(
+        tuple(counts[position[prop.name]] for prop in catalogue)
+        for counts in solutions
+    )
+    names = [prop.name for prop in catalogue]
+    return max_earning, [dict(zip(names, mix)) for mix in mixes]
+
+
+def build_sequence(catalogue, counts):
+    """
+    The properties of a mix in the order they are built.
+    """
+    return [
+        prop
+        for prop in smith_order(catalogue)
+        for _ in range(counts.get(prop.name, 0))
+    ]
+
+
+@dataclass(frozen=True, slots=True)
+class Build:
+    """
+    One construction: built during [start, finish), then earns rate per
+    time unit until total_time.
+    """
+    prop: PropertyType
+    start: int
+    finish: int
+    earnings: int
+
+
+@dataclass(frozen=True, slots=True)
+class Schedule:
+    """
+    A mix laid out in build order. Long horizons mean tens of thousands
+    of builds, hence slots.
+    """
+    total_time: int
+    counts: dict
+    timeline: tuple
+    earnings_by_type: dict
+    total_earnings: int
+
+    @property
+    def construction_time(self):
+        return self.timeline[-1].finish if self.timeline else 0
+
+
+def build_schedule(catalogue, counts, total_time):
+    """
+    Timeline and earnings of one mix (e.g. a solution of solve()).
+    Earnings per type are keyed by name, in catalogue order.
+    """
+    timeline = []
+    earnings_by_type = {prop.name: 0 for prop in catalogue}
+    current_time = 0
+
+    for prop in build_sequence(catalogue, counts):
+        finish = current_time + prop.build_time
+        if finish > total_time:
+            raise ValueError("The mix does not fit in total_time.")
+
+        earnings = (total_time - finish) * prop.rate
+        timeline.append(Build(prop, current_time, finish, earnings))
+        earnings_by_type[prop.name] += earnings
+        current_time = finish
+
+    return Schedule(
+        total_time=total_time,
+        counts={prop.name: counts.get(prop.name, 0) for prop in catalogue},
+        timeline=tuple(timeline),
+        earnings_by_type=earnings_by_type,
+        total_earnings=sum(earnings_by_type.values())
+    )
@@ -0,0 +1,164 @@
+import tempfile
+from functools import lru_cache
+from hypothesis import given, settings, strategies as st
+from scheduler import PropertyType, solve
+from max_profit import PROPERTIES, solve_max_profit, find_max_profit, find_max_profit_bruteforce, find_max_profit_numpy
+from profit_table import ProfitTable
+
+
+def _earnings(total_time, sol):
+    # Theatres, then pubs, then commercial parks
+    current_time = 0
+    earnings = 0
+    for count, build_time, rate in ((sol["T"], 5, 1500), (sol["P"], 4, 1000), (sol["C"], 10, 2000)):
+        for _ in range(count):
+            current_time += build_time
+            earnings += (total_time - current_time) * rate
+    return earnings
+
+
+def test_sample_cases():
+    assert find_max_profit(7) == (3000, [{"T": 0, "P": 1, "C": 0}, {"T": 1, "P": 0, "C": 0}])
+    assert find_max_profit(8) == (4500, [{"T": 1, "P": 0, "C": 0}])
+    assert find_max_profit(13) == (16500, [{"T": 2, "P": 0, "C": 0}])
+
+
+def test_matches_bruteforce_exhaustively():
+    for total_time in range(0, 120):
+        expected = find_max_profit_bruteforce(total_time)
+        assert find_max_profit(total_time) == expected, total_time
+        assert find_max_profit_numpy(total_time) == expected, total_time
+
+
+@settings(max_examples=50, deadline=None)
+@given(st.integers(min_value=0, max_value=250))
+def test_matches_bruteforce(total_time):
+    expected = find_max_profit_bruteforce(total_time)
+    assert find_max_profit(total_time) == expected
+    assert find_max_profit_numpy(total_time) == expected
+
+
+@given(st.integers(min_value=1, max_value=5000))
+def test_solutions_fit_and_reach_maximum(total_time):
+    earnings, solutions = find_max_profit(total_time)
+    assert solutions
+    for sol in solutions:
+        assert sol["T"] * 5 + sol["P"] * 4 + sol["C"] * 10 <= total_time
+        assert _earnings(total_time, sol) == earnings
+
+
+def test_numpy_matches_dp_on_larger_horizons():
+    for total_time in (997, 1500, 2001):
+        assert find_max_profit_numpy(total_time) == find_max_profit(total_time)
+
+
+def _best_any_order(catalogue, total_time):
+    # Exhaustive over build sequences in any order
+    @lru_cache(maxsize=None)
+    def best(remaining):
+        return max(
+            [0] + [
+                prop.rate * (remaining - prop.build_time) + best(remaining - prop.build_time)
+                for prop in catalogue
+                if prop.build_time <= remaining
+            ]
+        )
+    return best(total_time)
+
+
+@settings(max_examples=100, deadline=None)
+@given(
+    st.lists(
+        st.tuples(st.integers(1, 9), st.integers(1, 50)),
+        min_size=1,
+        max_size=5
+    ),
+    st.integers(min_value=0, max_value=60)
+)
+def test_scheduler_matches_any_order_search(types, total_time):
+    catalogue = [PropertyType(str(i), build_time, rate) for i, (build_time, rate) in enumerate(types)]
+    earnings, solutions = solve(catalogue, total_time)
+    assert earnings == _best_any_order(catalogue, total_time)
+    assert solutions
+
+
+def test_scheduler_scales():
+    catalogue = [PropertyType(f"X{i}", 3 + i % 17, 100 + 37 * i) for i in range(40)]
+    earnings, solutions = solve(catalogue, 100_000)
+    assert earnings > 0 and solutions
+
+
+def test_large_horizon():
+    earnings, solutions = find_max_profit(100_000)
+    assert earnings > 0 and solutions
+
+
+@settings(max_examples=100, deadline=None)
+@given(st.integers(min_value=0, max_value=2_000))
+def test_result_schedule_matches_solver(total_time):
+    result = solve_max_profit(total_time)
+    schedule = result.schedule
+    assert (result.max_earning, result.solutions) == find_max_profit(total_time)
+    assert schedule.counts == result.solutions[0]
+    assert schedule.total_earnings == result.max_earning
+    assert sum(schedule.earnings_by_type.values()) == result.max_earning
+    assert sum(build.earnings for build in schedule.timeline) == result.max_earning
+    assert schedule.construction_time <= total_time
+
+    # Back to back, one at a time
+    finish = 0
+    for build in schedule.timeline:
+        assert build.start == finish
+        assert build.finish == build.start + build.prop.build_time
+        finish = build.finish
+
+
+def test_profit_table_matches_solver():
+    with tempfile.TemporaryDirectory() as folder:
+        table = ProfitTable(PROPERTIES, folder)
+        table.extend(300)
+        for total_time in range(301):
+            assert table.lookup(total_time) == find_max_profit(total_time)
+
+        # Reloaded from disk, then extended past the stored horizons
+        table = ProfitTable(PROPERTIES, folder)
+        assert table.max_time == 300
+        for total_time in (301, 650, 1000):
+            assert table.lookup(total_time) == find_max_profit(total_time)
+        assert table.max_time >= 1000
+
+
+def test_ties_are_capped():
+    # Every mix of 12 interchangeable types ties: millions of them
+    catalogue = [PropertyType(f"X{i}", 5, 100) for i in range(12)]
+    earnings, solutions = solve(catalogue, 60)
+    assert earnings == _best_any_order(catalogue, 60)
+    assert len(solutions) == 1000
+    assert len({tuple(mix.values()) for mix in solutions}) == 1000
+    # The last build earns nothing, so 11 and 12 builds tie
+    assert all(sum(mix.values()) in (11, 12) for mix in solutions)
+    assert len(solve(catalogue, 60, max_solutions=10)[1]) == 10
+
+    with tempfile.TemporaryDirectory() as folder:
+        table = ProfitTable(catalogue, folder, max_solutions=50)
+        table.extend(60)
+        for total_time in (30, 60):
+            earnings, solutions = table.lookup(total_time)
+            assert earnings == solve(catalogue, total_time)[0]
+            assert 0 < len(solutions) <= 50
+            builds = total_time // 5
+            assert all(sum(mix.values()) in (builds - 1, builds) for mix in solutions)
+
+        # A table saved with another cap is not reused
+        assert ProfitTable(catalogue, folder, max_solutions=50).max_time == 60
+        assert ProfitTable(catalogue, folder).max_time == -1
+
+
+if __name__ == "__main__":
+    test_sample_cases()
+    test_matches_bruteforce_exhaustively()
+    test_numpy_matches_dp_on_larger_horizons()
+    test_large_horizon()
+    test_profit_table_matches_solver()
+    test_ties_are_capped()
+    print("All max-profit tests passed.")
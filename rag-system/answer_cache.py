@@ -0,0 +1,159 @@
+import time
+import sqlite3
+import threading
+import numpy as np
+
+
+class AnswerCache:
+    """
+    Semantic cache of generated answers, stored in SQLite.
+
+    Entries are keyed by the corpus version and the normalized query
+    embedding: a new question reuses a cached answer when its cosine
+    similarity to a cached question is at least threshold. Entries expire
+    after ttl seconds and the least recently used ones are evicted beyond
+    max_entries. Answers for older corpus versions are never returned and
+    are deleted by invalidate().
+    """
+
+    def __init__(
+        self,
+        db_path,
+        threshold=0.95,
+        ttl=7 * 24 * 3600,
+        max_entries=1000
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY,
+                corpus_version TEXT NOT NULL,
+                params TEXT NOT NULL,
+                question TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+        # In-memory copy of the embeddings for one (version, params) key
+        self._loaded_key = None
+        self._ids = None
+        self._matrix = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, corpus_version, params):
+        key = (corpus_version, params)
+        if self._loaded_key == key:
+            return
+
+        rows = self.conn.execute(
+            "SELECT id, embedding FROM answers "
+            "WHERE corpus_version = ? AND params = ? AND created_at >= ?",
+            (corpus_version, params, time.time() - self.ttl)
+        ).fetchall()
+
+        self._ids = [row[0] for row in rows]
+        self._matrix = (
+            np.stack([np.frombuffer(row[1], dtype="float32") for row in rows])
+            if rows else None
+        )
+        self._loaded_key = key
+
+    def lookup(self, embedding, corpus_version, params=""):
+        """
+        Return the cached answer for the most similar question, or None.
+        """
+        with self.lock:
+            self._load(corpus_version, params)
+
+            if self._matrix is not None:
+                similarities = self._matrix @ np.asarray(embedding, dtype="float32")
+                best = int(np.argmax(similarities))
+
+                if similarities[best] >= self.threshold:
+                    row = self.conn.execute(
+                        "SELECT answer, created_at FROM answers WHERE id = ?",
+                        (self._ids[best],)
+                    ).fetchone()
+
+                    if row and time.time() - row[1] <= self.ttl:
+                        self.conn.execute(
+                            "UPDATE answers SET last_used = ? WHERE id = ?",
+                            (time.time(), self._ids[best])
+                        )
+                        self.conn.commit()
+                        self.hits += 1
+                        return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, embedding, corpus_version, question, answer, params=""):
+        """
+        Store an answer, then drop expired and least recently used entries.
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO answers (corpus_version, params, question, "
+                "embedding, answer, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    corpus_version,
+                    params,
+                    question,
+                    np.asarray(embedding, dtype="float32").tobytes(),
+                    answer,
+                    now,
+                    now
+                )
+            )
+            self.conn.execute(
+                "DELETE FROM answers WHERE created_at < ?",
+                (now - self.ttl,)
+            )
+            self.conn.execute(
+                "DELETE FROM answers WHERE id NOT IN ("
+                "SELECT id FROM answers ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self.conn.commit()
+            self._loaded_key = None
+
+    def invalidate(self, corpus_version):
+        """
+        Delete every answer that was not generated for corpus_version.
+        """
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM answers WHERE corpus_version != ?",
+                (corpus_version,)
+            )
+            self.conn.commit()
+            self._loaded_key = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        with self.lock:
+            entries = self.conn.execute(
+                "SELECT COUNT(*) FROM answers"
+            ).fetchone()[0]
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries
+        }
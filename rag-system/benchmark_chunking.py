@@ -0,0 +1,120 @@
+"""
+Compare chunking strategies on retrieval quality and embedding time.
+
+Queries are sampled sentences from the document itself; a query counts as
+found when one of the top_k retrieved chunks contains that sentence.
+
+Usage:
+    python benchmark_chunking.py EJ1172284.pdf --queries 50 --top-k 3
+"""
+import argparse
+import random
+import re
+import tempfile
+import time
+
+from ingestion import CHUNK_STRATEGIES, chunk_pages, iter_document_pages
+from vector_store import VectorStore
+
+
+def _normalize(text):
+    return " ".join(text.lower().split())
+
+
+def sample_queries(pages, n_queries, seed=0):
+    """
+    Pick sentences of 8-40 words from the document as queries.
+    """
+    sentences = []
+    for _, text in pages:
+        for sentence in re.split(r"(?<=[.!?])\s+", text):
+            sentence = " ".join(sentence.split())
+            if 8 <= len(sentence.split()) <= 40:
+                sentences.append(sentence)
+
+    random.Random(seed).shuffle(sentences)
+    return sentences[:n_queries]
+
+
+def evaluate_strategy(vs, pages, queries, strategy, chunk_size, overlap, top_k):
+    if strategy == "words":
+        # The original chunker: 500 words with 50 words overlap
+        chunk_size, overlap = 500, 50
+
+    start = time.perf_counter()
+    chunks = list(chunk_pages(
+        pages,
+        chunk_size=chunk_size,
+        overlap=overlap,
+        strategy=strategy,
+        count_tokens=vs.count_tokens
+    ))
+    chunk_time = time.perf_counter() - start
+
+    token_counts = [vs.count_tokens(chunk) for chunk, _ in chunks]
+    truncated = sum(1 for tokens in token_counts if tokens > vs.max_chunk_tokens)
+
+    start = time.perf_counter()
+    vs.build_index(chunks)
+    embed_time = time.perf_counter() - start
+
+    found = 0
+    reciprocal_ranks = 0.0
+    all_hits = vs.search_batch(queries, top_k=top_k)
+    for query, hits in zip(queries, all_hits):
+        target = _normalize(query)
+        for rank, hit in enumerate(hits, start=1):
+            if target in _normalize(hit["text"]):
+                found += 1
+                reciprocal_ranks += 1.0 / rank
+                break
+
+    return {
+        "strategy": strategy,
+        "chunks": len(chunks),
+        "avg_tokens": sum(token_counts) / max(len(chunks), 1),
+        "truncated": truncated,
+        "chunk_s": chunk_time,
+        "embed_s": embed_time,
+        "recall": found / max(len(queries), 1),
+        "mrr": reciprocal_ranks / max(len(queries), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("document", help="PDF or DOCX file")
+    parser.add_argument("--strategies", nargs="+", default=list(CHUNK_STRATEGIES))
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="token budget (default: model max sequence length)")
+    parser.add_argument("--overlap", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = list(iter_document_pages(args.document))
+    queries = sample_queries(pages, args.queries)
+
+    # Fresh folder and no embedding cache so embed times are comparable
+    vs = VectorStore(
+        vector_db_folder=tempfile.mkdtemp(),
+        embedding_cache_size=0
+    )
+    chunk_size = args.chunk_size or vs.max_chunk_tokens
+
+    print(f"{len(queries)} queries, top_k={args.top_k}, "
+          f"token budget={chunk_size}, model limit={vs.max_chunk_tokens}\n")
+    print(f"{'strategy':<14}{'chunks':>7}{'avg tok':>9}{'trunc':>7}"
+          f"{'chunk s':>9}{'embed s':>9}{'recall':>8}{'mrr':>7}")
+
+    for strategy in args.strategies:
+        row = evaluate_strategy(
+            vs, pages, queries, strategy, chunk_size, args.overlap, args.top_k
+        )
+        print(f"{row['strategy']:<14}{row['chunks']:>7}{row['avg_tokens']:>9.0f}"
+              f"{row['truncated']:>7}{row['chunk_s']:>9.2f}{row['embed_s']:>9.2f}"
+              f"{row['recall']:>8.2f}{row['mrr']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+pytest-benchmark suite for the RAG stack on synthetic corpora.
+
+Times chunk_text, VectorStore.build_index (embedding + indexing), search,
+save / load and RAGSystem.query with a stub LLM, and records throughput
+and peak RSS in each benchmark's extra_info. The corpus is generated from
+a fixed seed, so runs on different commits measure the same work.
+
+Usage:
+    pip install pytest pytest-benchmark
+    python -m pytest benchmark_rag.py --benchmark-autosave
+    # ... change something, then compare with the saved run
+    python -m pytest benchmark_rag.py --benchmark-compare
+
+Corpus sizes (in chunks) are set with RAG_BENCH_SIZES, e.g.
+    RAG_BENCH_SIZES=1000,10000 python -m pytest benchmark_rag.py
+"""
+import os
+import random
+import resource
+import threading
+import time
+
+import pytest
+
+from ingestion import chunk_text
+from rag_chain import RAGSystem
+from vector_store import VectorStore
+
+CORPUS_SIZES = [
+    int(size) for size in os.environ.get("RAG_BENCH_SIZES", "200,2000").split(",")
+]
+SEED = 1234
+N_QUERIES = 64
+TOP_K = 5
+
+
+# SYNTHETIC CORPUS
+_VOCABULARY = None
+
+
+def _vocabulary():
+    global _VOCABULARY
+    if _VOCABULARY is None:
+        rng = random.Random(SEED)
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        _VOCABULARY = [
+            "".join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+            for _ in range(5_000)
+        ]
+    return _VOCABULARY
+
+
+def make_sentence(rng):
+    words = rng.choices(_vocabulary(), k=rng.randint(8, 24))
+    return " ".join(words).capitalize() + "."
+
+
+def make_chunks(n_chunks, seed=SEED):
+    """
+    n_chunks distinct paragraphs of 3-6 sentences (about 80 words each).
+    """
+    rng = random.Random(seed)
+    return [
+        " ".join(make_sentence(rng) for _ in range(rng.randint(3, 6)))
+        for _ in range(n_chunks)
+    ]
+
+
+def make_queries(chunks, n_queries=N_QUERIES, seed=SEED):
+    """
+    A few words taken from random chunks, like short user questions.
+    """
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n_queries):
+        words = rng.choice(chunks).split()
+        start = rng.randrange(max(len(words) - 6, 1))
+        queries.append(" ".join(words[start:start + 6]))
+    return queries
+
+
+# MEASUREMENT HELPERS
+def _current_rss():
+    """
+    Resident set size in bytes (Linux), or None.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class PeakRSS:
+    """
+    Samples the RSS in a background thread while the block runs.
+    Falls back to the process-wide peak (ru_maxrss) without /proc.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start_rss = None
+        self.peak_rss = None
+        self._done = threading.Event()
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            rss = _current_rss()
+            if rss is not None:
+                self.peak_rss = max(self.peak_rss or 0, rss)
+
+    def __enter__(self):
+        self.start_rss = _current_rss()
+        self.peak_rss = self.start_rss
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+
+        rss = _current_rss()
+        if rss is None:
+            # ru_maxrss is in kilobytes on Linux, bytes on macOS
+            scale = 1 if os.uname().sysname == "Darwin" else 1024
+            self.peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        else:
+            self.peak_rss = max(self.peak_rss or 0, rss)
+        return False
+
+
+def record(benchmark, items, unit, fn=None):
+    """
+    Store throughput (items / mean time) and, when fn is given, the peak
+    RSS of one extra fn() call in the benchmark's extra_info.
+    """
+    mean = benchmark.stats.stats.mean
+    benchmark.extra_info["items"] = items
+    benchmark.extra_info[f"{unit}_per_s"] = round(items / mean, 2) if mean else None
+
+    if fn is not None:
+        with PeakRSS() as rss:
+            fn()
+        benchmark.extra_info["peak_rss_mb"] = round(rss.peak_rss / 2**20, 1)
+        if rss.start_rss is not None:
+            benchmark.extra_info["rss_growth_mb"] = round(
+                (rss.peak_rss - rss.start_rss) / 2**20, 1
+            )
+
+
+class StubLLM:
+    """
+    Replaces the Ollama client in RAGSystem: returns a fixed answer after
+    `latency` seconds, so query benchmarks measure the pipeline only.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def generate(self, prompt, system=None, sample=0):
+        self.calls += 1
+        time.sleep(self.latency)
+        return "The document does not provide this information."
+
+    def stream(self, prompt, system=None):
+        for word in self.generate(prompt, system).split(" "):
+            yield word + " "
+
+
+# FIXTURES
+@pytest.fixture(scope="session")
+def store(tmp_path_factory):
+    """
+    One VectorStore (and embedding model) shared by all benchmarks.
+    The embedding cache is off so every build embeds for real.
+    """
+    return VectorStore(
+        vector_db_folder=str(tmp_path_factory.mktemp("vector_db")),
+        embedding_cache_size=0
+    )
+
+
+@pytest.fixture(scope="session")
+def corpora():
+    return {size: make_chunks(size) for size in CORPUS_SIZES}
+
+
+@pytest.fixture(scope="session")
+def built_dbs(tmp_path_factory, corpora):
+    """
+    A saved vector DB per corpus size: size -> folder.
+    """
+    folders = {}
+    for size, chunks in corpora.items():
+        folder = str(tmp_path_factory.mktemp(f"db_{size}"))
+        vs = VectorStore(vector_db_folder=folder, embedding_cache_size=0)
+        vs.build_index(chunks)
+        vs.save()
+        folders[size] = folder
+    return folders
+
+
+@pytest.fixture
+def loaded_store(store, built_dbs):
+    def load(size, mmap_index=False):
+        store.vector_db_folder = built_dbs[size]
+        store.mmap_index = mmap_index
+        store.load()
+        return store
+    return load
+
+
+# INGESTION
+@pytest.mark.parametrize("strategy", ["words", "sentence-pack"])
+@pytest.mark.parametrize("size", CORPUS_SIZES)
+def test_chunk_text(benchmark, store, corpora, size, strategy):
+    benchmark.group = f"chunk_text n={size}"
+    text = "\n\n".join(corpora[size])
+    words = len(text.split())
+
+    def run():
+        return chunk_text(
+            text,
+            chunk_size=store.max_chunk_tokens,
+            overlap=32,
+            strategy=strategy,
+            count_tokens=store.count_tokens
+        )
+
+    chunks = benchmark.pedantic(run, rounds=3, iterations=1)
+    assert chunks
+    record(benchmark, words, "words", run)
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+@pytest.mark.parametrize("size", CORPUS_SIZES)
+def test_build_index(benchmark, store, corpora, size, index_type):
+    benchmark.group = f"build_index n={size}"
+    chunks = corpora[size]
+    store.index_type = index_type
+
+    def run():
+        store.build_index(chunks)
+
+    benchmark.pedantic(run, rounds=3, iterations=1)
+    assert store.index.ntotal == size
+    record(benchmark, size, "chunks", run)
+    store.index_type = "flat"
+
+
+# SEARCH
+@pytest.mark.parametrize("hybrid", [False, True], ids=["dense", "hybrid"])
+@pytest.mark.parametrize("size", CORPUS_SIZES)
+def test_search(benchmark, loaded_store, corpora, size, hybrid):
+    benchmark.group = f"search n={size}"
+    vs = loaded_store(size)
+    queries = make_queries(corpora[size])
+    position = iter(range(10**9))
+
+    def run():
+        # One query per call, cycling through the set
+        return vs.search(
+            queries[next(position) % len(queries)], top_k=TOP_K, hybrid=hybrid
+        )
+
+    hits = benchmark(run)
+    assert len(hits) == TOP_K
+    record(benchmark, 1, "queries")
+
+
+@pytest.mark.parametrize("hybrid", [False, True], ids=["dense", "hybrid"])
+@pytest.mark.parametrize("size", CORPUS_SIZES)
+def test_search_batch(benchmark, loaded_store, corpora, size, hybrid):
+    benchmark.group = f"search n={size}"
+    vs = loaded_store(size)
+    queries = make_queries(corpora[size])
+
+    def run():
+        return vs.search_batch(queries, top_k=TOP_K, hybrid=hybrid)
+
+    results = benchmark(run)
+    assert len(results) == len(queries)
+    record(benchmark, len(queries), "queries", run)
+
+
+# PERSISTENCE
+@pytest.mark.parametrize("size", CORPUS_SIZES)
+def test_save(benchmark, loaded_store, size):
+    benchmark.group = f"persistence n={size}"
+    vs = loaded_store(size)
+
+    benchmark.pedantic(vs.save, rounds=5, iterations=1)
+    record(benchmark, size, "chunks", vs.save)
+
+
+@pytest.mark.parametrize("mmap_index", [False, True], ids=["read", "mmap"])
+@pytest.mark.parametrize("size", CORPUS_SIZES)
+def test_load(benchmark, loaded_store, size, mmap_index):
+    benchmark.group = f"persistence n={size}"
+    vs = loaded_store(size, mmap_index)
+
+    loaded = benchmark.pedantic(vs.load, rounds=5, iterations=1)
+    assert loaded and vs.index.ntotal == size
+    record(benchmark, size, "chunks", vs.load)
+
+
+# END TO END
+@pytest.mark.parametrize("size", CORPUS_SIZES)
+def test_query(benchmark, built_dbs, corpora, size):
+    """
+    RAGSystem.query with the answer cache off: query embedding, hybrid
+    retrieval, prompt building and a (stub) LLM call.
+    """
+    benchmark.group = f"query n={size}"
+    llm = StubLLM()
+    bot = RAGSystem(
+        vector_db_folder=built_dbs[size],
+        answer_cache=False,
+        llm=llm
+    )
+    queries = make_queries(corpora[size])
+    position = iter(range(10**9))
+
+    def run():
+        return bot.query(queries[next(position) % len(queries)], top_k=TOP_K)
+
+    answer = benchmark(run)
+    assert answer and llm.calls
+    record(benchmark, 1, "queries")
@@ -0,0 +1,90 @@
+import re
+import math
+import heapq
+from collections import Counter
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """
+    Lowercase word tokens used for both indexing and querying.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring.
+    Postings are built once per chunk, so scoring a query is a lookup
+    of its own terms instead of re-tokenizing candidate chunks. The index
+    is not saved: it is derived from the chunk store (see from_chunks).
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}      # term -> {chunk id: term frequency}
+        self.doc_lengths = {}   # chunk id -> number of tokens
+        self.total_length = 0
+
+    def add(self, chunk_id, text):
+        terms = Counter(tokenize(text))
+        for term, freq in terms.items():
+            self.postings.setdefault(term, {})[chunk_id] = freq
+
+        length = sum(terms.values())
+        self.doc_lengths[chunk_id] = length
+        self.total_length += length
+
+    def remove(self, chunk_id, text):
+        """
+        Remove a chunk; its text is needed to find its postings.
+        """
+        if chunk_id not in self.doc_lengths:
+            return
+
+        for term in set(tokenize(text)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(chunk_id, None)
+                if not posting:
+                    del self.postings[term]
+
+        self.total_length -= self.doc_lengths.pop(chunk_id)
+
+    def search(self, query, top_k=5):
+        """
+        Return up to top_k (chunk id, score) pairs, best first.
+        """
+        n_docs = len(self.doc_lengths)
+        if n_docs == 0:
+            return []
+
+        avg_length = self.total_length / n_docs
+        scores = {}
+
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for chunk_id, freq in posting.items():
+                norm = 1 - self.b + self.b * self.doc_lengths[chunk_id] / avg_length
+                score = idf * freq * (self.k1 + 1) / (freq + self.k1 * norm)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + score
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    @classmethod
+    def from_chunks(cls, chunks, k1=1.5, b=0.75):
+        """
+        Build the index from a {chunk id: text} mapping such as a
+        ChunkStore, reading one text at a time.
+        """
+        index = cls(k1=k1, b=b)
+        for chunk_id in chunks:
+            index.add(chunk_id, chunks[chunk_id])
+        return index
@@ -0,0 +1,194 @@
+import os
+import mmap
+import numpy as np
+
+
+class ChunkStore:
+    """
+    Dict-like store of chunk texts keyed by chunk id.
+
+    On disk the texts are a single UTF-8 blob (chunks.bin) plus a table of
+    (id, offset, length, page) rows sorted by id (chunks_index.npy). Both
+    are memory-mapped on load, so a lookup reads only the requested chunk.
+    Chunks added after loading stay in memory until save() appends them.
+    """
+
+    BLOB_FILE = "chunks.bin"
+    TABLE_FILE = "chunks_index.npy"
+
+    def __init__(self):
+        self.folder = None
+        self._table = np.empty((0, 4), dtype="int64")
+        self._blob = None
+        self._blob_size = 0
+        self._pending = {}    # chunk id -> (text, page), not yet on disk
+        self._deleted = set()  # ids on disk removed since the last save
+
+    @classmethod
+    def exists(cls, folder):
+        return os.path.exists(os.path.join(folder, cls.TABLE_FILE))
+
+    @classmethod
+    def open(cls, folder):
+        """
+        Memory-map a chunk store previously written with save().
+        """
+        store = cls()
+        store._map(folder)
+        return store
+
+    def _map(self, folder):
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+
+        self.folder = folder
+        self._table = np.load(
+            os.path.join(folder, self.TABLE_FILE),
+            mmap_mode="r"
+        )
+        if self._table.shape[1] == 3:
+            # Stores saved before page numbers were tracked
+            self._table = np.pad(
+                self._table, ((0, 0), (0, 1)), constant_values=-1
+            )
+
+        blob_path = os.path.join(folder, self.BLOB_FILE)
+        self._blob_size = os.path.getsize(blob_path)
+        self._blob = b""
+        if self._blob_size:
+            with open(blob_path, "rb") as f:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _find(self, chunk_id):
+        """
+        Row of chunk_id in the on-disk table, or None.
+        """
+        if chunk_id in self._deleted or not len(self._table):
+            return None
+
+        ids = self._table[:, 0]
+        pos = int(np.searchsorted(ids, chunk_id))
+        if pos < len(ids) and ids[pos] == chunk_id:
+            return pos
+        return None
+
+    def _read(self, row):
+        _, offset, length, _ = self._table[row].tolist()
+        return self._blob[offset:offset + length].decode("utf-8")
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self._pending or self._find(chunk_id) is not None
+
+    def __getitem__(self, chunk_id):
+        if chunk_id in self._pending:
+            return self._pending[chunk_id][0]
+
+        row = self._find(chunk_id)
+        if row is None:
+            raise KeyError(chunk_id)
+        return self._read(row)
+
+    def __setitem__(self, chunk_id, text):
+        self.add(chunk_id, text)
+
+    def add(self, chunk_id, text, page=None):
+        # Chunk ids are never reused, so a new id is never on disk
+        self._pending[chunk_id] = (text, page)
+
+    def page(self, chunk_id):
+        """
+        Page number the chunk starts on, or None if unknown.
+        """
+        if chunk_id in self._pending:
+            return self._pending[chunk_id][1]
+
+        row = self._find(chunk_id)
+        if row is None:
+            raise KeyError(chunk_id)
+
+        page = int(self._table[row, 3])
+        return page if page >= 0 else None
+
+    def pop(self, chunk_id, default=None):
+        if chunk_id in self._pending:
+            return self._pending.pop(chunk_id)[0]
+
+        row = self._find(chunk_id)
+        if row is None:
+            return default
+
+        text = self._read(row)
+        self._deleted.add(chunk_id)
+        return text
+
+    def __iter__(self):
+        for chunk_id in self._table[:, 0].tolist():
+            if chunk_id not in self._deleted:
+                yield chunk_id
+        yield from list(self._pending)
+
+    def __len__(self):
+        return len(self._table) - len(self._deleted) + len(self._pending)
+
+    def save(self, folder):
+        """
+        Persist the store. New chunks are appended to the blob and the
+        id table is rewritten; the blob is compacted only when most of it
+        belongs to removed chunks or the target folder changed.
+        """
+        os.makedirs(folder, exist_ok=True)
+
+        keep = np.ones(len(self._table), dtype=bool)
+        if self._deleted:
+            keep = ~np.isin(self._table[:, 0], list(self._deleted))
+        live_rows = np.asarray(self._table[keep])
+
+        live_bytes = int(live_rows[:, 2].sum())
+        dead_bytes = self._blob_size - live_bytes
+        compact = (
+            folder != self.folder
+            or (dead_bytes > live_bytes and dead_bytes > 1_000_000)
+        )
+
+        blob_path = os.path.join(folder, self.BLOB_FILE)
+        if compact:
+            # Rewrite every live chunk into a fresh blob
+            tmp_blob_path = blob_path + ".tmp"
+            new_rows = []
+            offset = 0
+            with open(tmp_blob_path, "wb") as f:
+                for row in range(len(self._table)):
+                    if not keep[row]:
+                        continue
+                    chunk_id, start, length, page = self._table[row].tolist()
+                    f.write(self._blob[start:start + length])
+                    new_rows.append((chunk_id, offset, length, page))
+                    offset += length
+                self._write_pending(f, offset, new_rows)
+            os.replace(tmp_blob_path, blob_path)
+        else:
+            # Append-only: existing offsets stay valid
+            new_rows = live_rows.tolist()
+            with open(blob_path, "ab") as f:
+                f.seek(0, os.SEEK_END)
+                self._write_pending(f, f.tell(), new_rows)
+
+        table = np.array(new_rows, dtype="int64").reshape(-1, 4)
+        table = table[np.argsort(table[:, 0], kind="stable")]
+
+        # np.save appends .npy to names without it
+        tmp_table_path = os.path.join(folder, "chunks_index.tmp.npy")
+        np.save(tmp_table_path, table)
+        os.replace(tmp_table_path, os.path.join(folder, self.TABLE_FILE))
+
+        self._pending = {}
+        self._deleted = set()
+        self._map(folder)
+
+    def _write_pending(self, f, offset, rows):
+        for chunk_id, (text, page) in self._pending.items():
+            data = text.encode("utf-8")
+            f.write(data)
+            rows.append((chunk_id, offset, len(data), -1 if page is None else page))
+            offset += len(data)
+        return offset
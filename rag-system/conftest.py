@@ -0,0 +1,49 @@
+import re
+import hashlib
+
+import numpy as np
+import pytest
+
+# test_ingestion.py and test_vector_store.py are scripts that need a PDF
+# (EJ1172284.pdf); run them directly with python.
+collect_ignore = ["test_ingestion.py", "test_vector_store.py"]
+
+
+class StubTokenizer:
+    def __call__(self, text, add_special_tokens=False):
+        return {"input_ids": list(range(len(re.findall(r"\w+|[^\w\s]", text))))}
+
+
+class StubEncoder:
+    """
+    Stands in for SentenceTransformer: a bag-of-words vector per text
+    (hashed word counts), so identical texts embed identically and texts
+    sharing words are similar. No model download needed.
+    """
+
+    max_seq_length = 256
+    dimension = 64
+
+    def __init__(self, model_name=None, **kwargs):
+        self.tokenizer = StubTokenizer()
+        self.encoded = 0
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, texts, show_progress_bar=False, **kwargs):
+        self.encoded += len(texts)
+        vectors = np.zeros((len(texts), self.dimension), dtype="float32")
+        for i, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                digest = hashlib.md5(word.encode("utf-8")).digest()
+                vectors[i, digest[0] % self.dimension] += 1.0
+            vectors[i, -1] += 0.01  # never all zeros
+        return vectors
+
+
+@pytest.fixture
+def stub_encoder(monkeypatch):
+    import vector_store
+    monkeypatch.setattr(vector_store, "SentenceTransformer", StubEncoder)
+    return StubEncoder
@@ -0,0 +1,229 @@
+import os
+import json
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of chunk embeddings keyed by (model name, sha256 of text).
+
+    Vectors are stored in a memory-mapped float32 matrix (one folder per
+    model) and a small JSON key index keeps the rows in LRU order.
+    Once max_entries is reached the least recently used row is reused.
+
+    Rows are overwritten in place, but the key index is only written by
+    save(), so a saved index can point at rows that were reused later.
+    Each row therefore also stores the hash of its text (row_keys.bin),
+    and a lookup only hits when the row still holds that text.
+    """
+
+    def __init__(
+        self,
+        cache_folder,
+        model_name,
+        max_entries=100_000
+    ):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.cache_folder = os.path.join(
+            cache_folder,
+            model_name.replace("/", "__")
+        )
+        self.matrix_path = os.path.join(self.cache_folder, "embeddings.f32")
+        self.keys_path = os.path.join(self.cache_folder, "keys.json")
+        self.row_keys_path = os.path.join(self.cache_folder, "row_keys.bin")
+
+        self.dimension = None
+        self.capacity = 0
+        self.matrix = None
+        self.row_keys = None  # sha256 digest of the text in each row
+        self.keys = OrderedDict()  # text hash -> matrix row, oldest first
+        self.rows_used = 0
+        self.free_rows = []        # rows whose key turned out stale
+
+        # Counters for the current process
+        self.hits = 0
+        self.misses = 0
+
+        self._load()
+
+    def _key(self, text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.keys_path):
+            return
+        if not os.path.exists(self.row_keys_path):
+            # Written before rows were tagged: the rows cannot be
+            # trusted, so start over (the files are overwritten)
+            print("Embedding cache has no row keys; starting a new cache.")
+            return
+
+        with open(self.keys_path, "r") as f:
+            meta = json.load(f)
+
+        self.dimension = meta["dimension"]
+        self.capacity = meta["capacity"]
+        self.keys = OrderedDict(meta["keys"])
+        self.rows_used = meta["rows_used"]
+        self.matrix = np.memmap(
+            self.matrix_path,
+            dtype="float32",
+            mode="r+",
+            shape=(self.capacity, self.dimension)
+        )
+        self.row_keys = np.memmap(
+            self.row_keys_path,
+            dtype="uint8",
+            mode="r+",
+            shape=(self.capacity, 32)
+        )
+        self.free_rows = sorted(set(range(self.rows_used)) - set(self.keys.values()))
+
+    def _grow(self, needed):
+        """
+        Enlarge the memory-mapped matrix, doubling up to max_entries.
+        """
+        new_capacity = min(
+            self.max_entries,
+            max(1024, self.capacity * 2, needed)
+        )
+        if new_capacity <= self.capacity:
+            return
+
+        os.makedirs(self.cache_folder, exist_ok=True)
+        if self.matrix is not None:
+            self.matrix.flush()
+            self.row_keys.flush()
+            self.matrix = None
+            self.row_keys = None
+
+        # Extend the files in place; new rows are zero-filled
+        with open(self.matrix_path, "ab") as f:
+            f.truncate(new_capacity * self.dimension * 4)
+        with open(self.row_keys_path, "ab") as f:
+            f.truncate(new_capacity * 32)
+
+        self.capacity = new_capacity
+        self.matrix = np.memmap(
+            self.matrix_path,
+            dtype="float32",
+            mode="r+",
+            shape=(self.capacity, self.dimension)
+        )
+        self.row_keys = np.memmap(
+            self.row_keys_path,
+            dtype="uint8",
+            mode="r+",
+            shape=(self.capacity, 32)
+        )
+
+    def _row_holds(self, row, key):
+        return self.row_keys[row].tobytes() == bytes.fromhex(key)
+
+    def _put(self, key, vector):
+        if key in self.keys:
+            self.keys.move_to_end(key)
+            return
+
+        if self.free_rows:
+            row = self.free_rows.pop()
+        elif self.rows_used < self.capacity:
+            row = self.rows_used
+            self.rows_used += 1
+        elif self.capacity < self.max_entries:
+            self._grow(self.rows_used + 1)
+            row = self.rows_used
+            self.rows_used += 1
+        else:
+            # Evict the least recently used entry and reuse its row
+            _, row = self.keys.popitem(last=False)
+
+        # Untag the row while it is rewritten
+        self.row_keys[row] = 0
+        self.matrix[row] = vector
+        self.row_keys[row] = np.frombuffer(bytes.fromhex(key), dtype="uint8")
+        self.keys[key] = row
+
+    def embed(self, texts, encode_fn):
+        """
+        Return embeddings for texts, calling encode_fn only for cache misses.
+        encode_fn takes a list of texts and returns a float32 matrix.
+        """
+        keys = [self._key(text) for text in texts]
+
+        hit_rows = {}
+        missing = []
+        for i, key in enumerate(keys):
+            row = self.keys.get(key)
+            if row is not None and not self._row_holds(row, key):
+                # Row reused after the key index was saved
+                del self.keys[key]
+                self.free_rows.append(row)
+                row = None
+
+            if row is None:
+                missing.append(i)
+            else:
+                self.keys.move_to_end(key)
+                hit_rows[i] = row
+
+        self.hits += len(hit_rows)
+        self.misses += len(missing)
+
+        new_vectors = None
+        if missing:
+            new_vectors = encode_fn([texts[i] for i in missing])
+            if self.dimension is None:
+                self.dimension = new_vectors.shape[1]
+
+        embeddings = np.empty((len(texts), self.dimension), dtype="float32")
+        for i, row in hit_rows.items():
+            embeddings[i] = self.matrix[row]
+
+        if missing:
+            embeddings[missing] = new_vectors
+            if self.max_entries > 0:
+                for i, vector in zip(missing, new_vectors):
+                    self._put(keys[i], vector)
+
+        return embeddings
+
+    def save(self):
+        """
+        Flush the matrix and write the LRU key index.
+        """
+        if self.matrix is None:
+            return
+
+        self.matrix.flush()
+        self.row_keys.flush()
+
+        tmp_path = self.keys_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "model_name": self.model_name,
+                    "dimension": self.dimension,
+                    "capacity": self.capacity,
+                    "rows_used": self.rows_used,
+                    "keys": list(self.keys.items())
+                },
+                f
+            )
+        os.replace(tmp_path, self.keys_path)
+
+    def stats(self):
+        """
+        Hit/miss counters and occupancy for monitoring.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.keys),
+            "max_entries": self.max_entries
+        }
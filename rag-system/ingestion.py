@@ -1,64 +1,280 @@
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from PyPDF2 import PdfReader
 from docx import Document
 
 
-def load_pdf(file_path):
+# PDFs with at least this many pages are extracted in a process pool
+PARALLEL_PAGE_THRESHOLD = 16
+PAGES_PER_TASK = 8
+
+
+def _extract_page_range(file_path, start, end):
     """
-    Load text content from a PDF file.
+    Extract pages [start, end) of a PDF. Runs in a worker process.
     """
-    text = ""
+    reader = PdfReader(file_path)
+    return [
+        (page_number + 1, reader.pages[page_number].extract_text() or "")
+        for page_number in range(start, end)
+    ]
+
 
+def iter_pdf_pages(file_path, workers=None):
+    """
+    Yield (page_number, text) for every non-empty PDF page, in order.
+    Large PDFs are split into page ranges extracted in parallel; pages
+    are yielded as soon as their range is done.
+    """
     try:
         reader = PdfReader(file_path)
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
+        num_pages = len(reader.pages)
+
+        if num_pages < PARALLEL_PAGE_THRESHOLD or workers == 1:
+            for page_number, page in enumerate(reader.pages, start=1):
+                page_text = page.extract_text()
+                if page_text:
+                    yield page_number, page_text
+            return
+
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [
+                pool.submit(
+                    _extract_page_range,
+                    file_path,
+                    start,
+                    min(start + PAGES_PER_TASK, num_pages)
+                )
+                for start in range(0, num_pages, PAGES_PER_TASK)
+            ]
+            for future in futures:
+                for page_number, page_text in future.result():
+                    if page_text:
+                        yield page_number, page_text
+        finally:
+            pool.shutdown(cancel_futures=True)
 
     except Exception as e:
         print(f"Error reading PDF file: {e}")
 
-    return text.strip()
 
-
-def load_docx(file_path):
+def iter_docx_paragraphs(file_path):
     """
-    Load text content from a DOCX file.
+    Yield (None, text) for every non-empty DOCX paragraph.
+    DOCX files have no fixed pages, so the page number is None.
     """
-    text = ""
-
     try:
         doc = Document(file_path)
         for para in doc.paragraphs:
             if para.text.strip():
-                text += para.text.strip() + "\n"
+                yield None, para.text.strip()
 
     except Exception as e:
         print(f"Error reading DOCX file: {e}")
 
-    return text.strip()
+
+def iter_document_pages(file_path, workers=None):
+    """
+    Yield (page_number, text) for a PDF or DOCX file.
+    """
+    if file_path.lower().endswith(".pdf"):
+        return iter_pdf_pages(file_path, workers=workers)
+    if file_path.lower().endswith(".docx"):
+        return iter_docx_paragraphs(file_path)
+
+    raise ValueError("Unsupported file type. Only PDF and DOCX are allowed.")
+
+
+def load_pdf(file_path):
+    """
+    Load text content from a PDF file.
+    """
+    return "\n".join(text for _, text in iter_pdf_pages(file_path)).strip()
+
+
+def load_docx(file_path):
+    """
+    Load text content from a DOCX file.
+    """
+    return "\n".join(text for _, text in iter_docx_paragraphs(file_path)).strip()
+
+
+CHUNK_STRATEGIES = ("words", "fixed-token", "sentence-pack", "recursive")
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def _count_words(text):
+    return len(text.split())
 
 
-def chunk_text(text, chunk_size=500, overlap=50):
+def chunk_pages(
+    pages,
+    chunk_size=500,
+    overlap=50,
+    strategy="words",
+    count_tokens=None
+):
     """
-    Split text into chunks of words with overlap.
+    Split a stream of (page_number, text) into overlapping chunks.
+    Yields (chunk, page_number) as soon as each chunk is complete, where
+    page_number is the page of the chunk's first word.
     Duplicate and empty chunks are removed.
+
+    Strategies:
+      words         - fixed windows of chunk_size words (original chunker)
+      fixed-token   - word windows of at most chunk_size tokens
+      sentence-pack - whole sentences packed up to chunk_size tokens
+      recursive     - whole paragraphs, split into sentences, then words,
+                      only when they do not fit in chunk_size tokens
+
+    count_tokens measures a piece of text in tokens, normally the
+    embedder's tokenizer; it defaults to counting words. overlap is in
+    words for "words" and in tokens otherwise.
+    """
+    if strategy not in CHUNK_STRATEGIES:
+        raise ValueError(
+            f"Unknown chunking strategy '{strategy}'. "
+            f"Choose one of: {', '.join(CHUNK_STRATEGIES)}."
+        )
+
+    if strategy == "words":
+        return _chunk_words(pages, chunk_size, overlap)
+
+    count_tokens = count_tokens or _count_words
+    levels = {
+        "fixed-token": [],
+        "sentence-pack": [SENTENCE_END],
+        "recursive": [PARAGRAPH_BREAK, SENTENCE_END]
+    }[strategy]
+
+    units = (
+        unit
+        for page_number, text in pages
+        for unit in _split_units(text, page_number, levels, chunk_size, count_tokens)
+    )
+    return _pack_units(units, chunk_size, overlap)
+
+
+def _split_units(text, page_number, levels, max_tokens, count_tokens):
+    """
+    Yield (unit, page_number, tokens), splitting text at the first
+    boundary level and recursing into the next level (and finally into
+    words) for any piece longer than max_tokens.
     """
-    words = text.split()
-    chunks = []
+    if not levels:
+        for word in text.split():
+            yield word, page_number, count_tokens(word)
+        return
+
+    for piece in levels[0].split(text):
+        piece = " ".join(piece.split())
+        if not piece:
+            continue
+
+        tokens = count_tokens(piece)
+        if tokens <= max_tokens:
+            yield piece, page_number, tokens
+        else:
+            yield from _split_units(
+                piece, page_number, levels[1:], max_tokens, count_tokens
+            )
+
+
+def _pack_units(units, chunk_size, overlap):
+    """
+    Greedily pack units into chunks of at most chunk_size tokens, starting
+    each chunk with the trailing units of the previous one (up to overlap
+    tokens).
+    """
+    window = []   # (unit, page_number, tokens)
+    window_tokens = 0
     seen_chunks = set()
 
-    start = 0
-    while start < len(words):
-        end = min(start + chunk_size, len(words))
-        chunk = " ".join(words[start:end]).strip()
+    def make_chunk():
+        chunk = " ".join(unit for unit, _, _ in window)
+        if chunk and chunk not in seen_chunks:
+            seen_chunks.add(chunk)
+            return chunk, window[0][1]
+        return None
 
-        # Avoid empty or duplicate chunks
+    for unit in units:
+        if window and window_tokens + unit[2] > chunk_size:
+            result = make_chunk()
+            if result:
+                yield result
+
+            # Carry the tail of this chunk over as overlap
+            carried = []
+            carried_tokens = 0
+            for previous in reversed(window):
+                if carried_tokens + previous[2] > overlap:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous[2]
+
+            if carried_tokens + unit[2] > chunk_size:
+                carried, carried_tokens = [], 0
+            window, window_tokens = carried, carried_tokens
+
+        window.append(unit)
+        window_tokens += unit[2]
+
+    if window:
+        result = make_chunk()
+        if result:
+            yield result
+
+
+def _chunk_words(pages, chunk_size, overlap):
+    """
+    Fixed word windows with overlap, identical to the original chunker.
+    """
+    step = chunk_size - overlap
+    words = []   # (word, page_number) not yet fully chunked
+    seen_chunks = set()
+
+    def make_chunk(window):
+        chunk = " ".join(word for word, _ in window).strip()
         if chunk and chunk not in seen_chunks:
-            chunks.append(chunk)
             seen_chunks.add(chunk)
+            return chunk, window[0][1]
+        return None
+
+    for page_number, text in pages:
+        words.extend((word, page_number) for word in text.split())
+
+        while len(words) >= chunk_size:
+            result = make_chunk(words[:chunk_size])
+            if result:
+                yield result
+            words = words[step:]
 
-        start += chunk_size - overlap
+    # Remaining tail windows (same windows as the non-streaming chunker)
+    while words:
+        result = make_chunk(words)
+        if result:
+            yield result
+        words = words[step:]
 
-    return chunks
\ No newline at end of file
+
+def chunk_text(
+    text,
+    chunk_size=500,
+    overlap=50,
+    strategy="words",
+    count_tokens=None
+):
+    """
+    Split text into chunks with overlap (see chunk_pages for strategies).
+    Duplicate and empty chunks are removed.
+    """
+    return [
+        chunk
+        for chunk, _ in chunk_pages(
+            [(None, text)], chunk_size, overlap, strategy, count_tokens
+        )
+    ]
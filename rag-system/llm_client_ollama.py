@@ -0,0 +1,213 @@
+import time
+import threading
+import httpx
+import ollama
+import tracing
+
+
+class LLMError(Exception):
+    """
+    Raised when an LLM call still fails after all retries.
+    """
+
+
+# One ollama client (and HTTP connection pool) per host and timeout,
+# shared by every LLMClient in the process.
+_clients = {}
+_clients_lock = threading.Lock()
+
+POOL_LIMITS = httpx.Limits(max_connections=16, max_keepalive_connections=8)
+
+
+def get_shared_client(host=None, timeout=120.0):
+    key = (host, timeout)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = ollama.Client(
+                host=host,
+                timeout=timeout,
+                limits=POOL_LIMITS
+            )
+        return _clients[key]
+
+
+def _is_retryable(error):
+    """
+    Connection problems, timeouts, overload and server errors are retried;
+    bad requests (unknown model, invalid options) are not.
+    """
+    if isinstance(error, (ConnectionError, httpx.TransportError)):
+        return True
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+class LLMClient:
+    """
+    Ollama chat client on a shared, pooled HTTP connection.
+
+    Each call has a deadline (timeout seconds, including retries) and is
+    retried up to max_retries times with exponential backoff on transient
+    errors. keep_alive keeps the model loaded between calls. Latency, token
+    and error counters are available from stats().
+
+    A synchronous subset of reasoning-agent/llm_client_ollama.py (no
+    asyncio client or response cache); keep the shared parts in sync.
+    """
+
+    def __init__(
+        self,
+        model_name="phi3:mini",
+        host=None,
+        timeout=120.0,
+        max_retries=2,
+        backoff=0.5,
+        keep_alive="30m",
+        options=None
+    ):
+        self.model_name = model_name
+        self.host = host
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.keep_alive = keep_alive
+        self.options = options
+
+        self.client = get_shared_client(host, timeout)
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "errors": 0,
+            "retries": 0,
+            "total_latency": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0
+        }
+
+    def _messages(self, prompt, system=None):
+        # Static instructions go first as the system message, so calls
+        # sharing them share a prompt prefix Ollama can reuse
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        return messages
+
+    def _request_args(self, messages):
+        return {
+            "model": self.model_name,
+            "messages": messages,
+            "keep_alive": self.keep_alive,
+            "options": self.options
+        }
+
+    def _retry_delay(self, error, attempt, deadline):
+        """
+        Seconds to wait before the next attempt, or None to give up.
+        """
+        delay = self.backoff * 2 ** attempt
+        if (
+            not _is_retryable(error)
+            or attempt >= self.max_retries
+            or time.monotonic() + delay >= deadline
+        ):
+            return None
+        return delay
+
+    def _record(self, latency, response=None, error=False, retry=False, span=None):
+        # Token counts and retries also go on the call's tracing span
+        if span is not None:
+            if retry:
+                span.add("retries")
+            elif response is not None:
+                span.add("prompt_tokens", response.get("prompt_eval_count") or 0)
+                span.add("completion_tokens", response.get("eval_count") or 0)
+
+        with self._stats_lock:
+            if retry:
+                self._stats["retries"] += 1
+                return
+
+            self._stats["calls"] += 1
+            self._stats["total_latency"] += latency
+            if error:
+                self._stats["errors"] += 1
+            if response is not None:
+                self._stats["prompt_tokens"] += response.get("prompt_eval_count") or 0
+                self._stats["completion_tokens"] += response.get("eval_count") or 0
+
+    def chat(self, messages):
+        """
+        Send chat messages and return the raw Ollama response.
+        Raises LLMError once retries or the deadline are exhausted.
+        """
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        attempt = 0
+
+        with tracing.span("llm.chat", model=self.model_name) as span:
+            while True:
+                try:
+                    response = self.client.chat(**self._request_args(messages))
+                    self._record(time.perf_counter() - start, response, span=span)
+                    return response
+
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt, deadline)
+                    if delay is None:
+                        self._record(time.perf_counter() - start, error=True)
+                        raise LLMError(f"Error generating response: {e}") from e
+
+                    self._record(0.0, retry=True, span=span)
+                    attempt += 1
+                    time.sleep(delay)
+
+    def generate(self, prompt: str, system: str = None) -> str:
+        with tracing.span("llm.generate", model=self.model_name):
+            response = self.chat(self._messages(prompt, system))
+            return response["message"]["content"].strip()
+
+    def stream(self, prompt: str, system: str = None):
+        """
+        Yield pieces of the response as they are generated. Failures
+        before the first piece are retried like chat().
+        """
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        attempt = 0
+        started = False
+
+        while True:
+            try:
+                last = None
+                for part in self.client.chat(
+                    stream=True,
+                    **self._request_args(self._messages(prompt, system))
+                ):
+                    started = True
+                    last = part
+                    yield part["message"]["content"]
+
+                self._record(time.perf_counter() - start, last)
+                return
+
+            except Exception as e:
+                delay = None if started else self._retry_delay(e, attempt, deadline)
+                if delay is None:
+                    self._record(time.perf_counter() - start, error=True)
+                    raise LLMError(f"Error generating response: {e}") from e
+
+                self._record(0.0, retry=True)
+                attempt += 1
+                time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        stats["avg_latency"] = (
+            stats["total_latency"] / stats["calls"] if stats["calls"] else 0.0
+        )
+        return stats
+
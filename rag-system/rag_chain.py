@@ -1,7 +1,13 @@
 from vector_store import VectorStore
-from ingestion import load_pdf, load_docx, chunk_text
-import ollama
+from answer_cache import AnswerCache
+from ingestion import iter_document_pages, chunk_pages
+from llm_client_ollama import LLMClient, LLMError
+from rwlock import RWLock
+import tracing
+import itertools
+import threading
 import os
+import time
 
 
 class RAGSystem:
@@ -10,11 +16,37 @@ class RAGSystem:
     Fast and accurate for local execution using Ollama.
     """
 
-    def __init__(self, model_name="phi3:mini"):
+    def __init__(
+        self,
+        model_name="phi3:mini",
+        chunk_strategy="sentence-pack",
+        chunk_overlap=32,
+        hybrid_search=True,
+        answer_cache=True,
+        vector_db_folder="vector_db",
+        llm=None
+    ):
         self.model_name = model_name
 
+        # Pooled Ollama connection with timeouts, retries and keep-alive.
+        # Any object with generate() / stream() can stand in (benchmarks).
+        self.llm = llm if llm is not None else LLMClient(model_name=model_name)
+
+        # Fuse dense and BM25 results instead of reranking dense hits
+        self.hybrid_search = hybrid_search
+
+        # Chunks are sized in embedder tokens so nothing is truncated
+        self.chunk_strategy = chunk_strategy
+        self.chunk_overlap = chunk_overlap
+
         # Initialize vector store
-        self.vs = VectorStore()
+        self.vs = VectorStore(vector_db_folder=vector_db_folder)
+
+        # Queries share the store; ingestion and removal are exclusive.
+        # Writers also take write_mutex for their whole run, so one
+        # ingest can embed outside the RW lock without racing another.
+        self.lock = RWLock()
+        self.write_mutex = threading.Lock()
 
         # Try loading existing vector DB
         loaded = self.vs.load()
@@ -23,78 +55,94 @@ class RAGSystem:
         else:
             print("No existing vector database found. Please ingest a document.")
 
+        # Semantic cache of answers, stored next to the vector DB
+        self.answer_cache = None
+        if answer_cache:
+            os.makedirs(self.vs.vector_db_folder, exist_ok=True)
+            self.answer_cache = AnswerCache(
+                os.path.join(self.vs.vector_db_folder, "answer_cache.sqlite")
+            )
+            self.answer_cache.invalidate(self.vs.version)
+
     # DOCUMENT INGESTION
-    def ingest_document(self, file_path: str):
+    @tracing.traced("rag.ingest_document")
+    def ingest_document(self, file_path: str, doc_id: str = None):
         """
         Ingest a PDF or DOCX document, split into chunks,
-        embed them, and store in FAISS vector database.
+        embed them, and append them to the FAISS vector database.
+        Pages are extracted, chunked and embedded as a stream.
+        Re-ingesting the same doc_id replaces the previous version.
         """
 
         if not os.path.exists(file_path):
             raise FileNotFoundError("Uploaded document not found.")
 
-        # Detect file type
-        if file_path.lower().endswith(".pdf"):
-            text = load_pdf(file_path)
-        elif file_path.lower().endswith(".docx"):
-            text = load_docx(file_path)
-        else:
-            raise ValueError("Unsupported file type. Only PDF and DOCX are allowed.")
+        if doc_id is None:
+            doc_id = os.path.basename(file_path)
 
-        if not text.strip():
-            raise ValueError("No text could be extracted from the document.")
+        with self.write_mutex:
+            # Stream pages -> chunks -> embedding batches
+            # (raises ValueError for unsupported file types)
+            pages = iter_document_pages(file_path)
+            chunks = chunk_pages(
+                pages,
+                chunk_size=self.vs.max_chunk_tokens,
+                overlap=self.chunk_overlap,
+                strategy=self.chunk_strategy,
+                count_tokens=self.vs.count_tokens
+            )
+
+            first_chunk = next(chunks, None)
+            if first_chunk is None:
+                raise ValueError("No text could be extracted from the document.")
 
-        # Chunk text
-        chunks = chunk_text(text)
+            # Extraction, chunking and embedding run while queries go on;
+            # only the index update blocks them
+            batches = list(
+                self.vs.embed_batches(itertools.chain([first_chunk], chunks))
+            )
 
-        if not chunks:
-            raise ValueError("Document could not be chunked.")
+            with self.lock.write_lock():
+                self.vs.add_embedded(batches, doc_id=doc_id)
+                self.vs.save()
 
-        # Build and save vector index
-        self.vs.build_index(chunks)
-        self.vs.save()
+                # Cached answers were generated from the old corpus
+                if self.answer_cache is not None:
+                    self.answer_cache.invalidate(self.vs.version)
 
         return True
 
-    # INTERNAL UTILITIES
-    def _rerank_chunks(self, question, chunks):
+    def remove_document(self, doc_id: str):
         """
-        Lightweight reranking based on keyword overlap.
-        Fast and suitable for CPU-only systems.
+        Remove a previously ingested document from the vector database.
         """
-        q_words = set(question.lower().split())
-        scored_chunks = []
+        with self.write_mutex, self.lock.write_lock():
+            removed = self.vs.remove_document(doc_id)
+            if removed:
+                self.vs.save()
+                if self.answer_cache is not None:
+                    self.answer_cache.invalidate(self.vs.version)
 
-        for chunk in chunks:
-            c_words = set(chunk.lower().split())
-            score = len(q_words.intersection(c_words))
-            scored_chunks.append((score, chunk))
-
-        scored_chunks.sort(reverse=True, key=lambda x: x[0])
-        return [chunk for _, chunk in scored_chunks]
+        return removed
 
+    # INTERNAL UTILITIES
     def _trim_chunk(self, text, max_chars=800):
         """
         Limit chunk size to reduce LLM latency while keeping context.
         """
         return text[:max_chars].strip()
 
-    # QUERY PIPELINE
-    def query(self, user_query, top_k=5, max_words=120):
-        # Step 1: Retrieve relevant chunks
-        retrieved_chunks = self.vs.search(user_query, top_k=top_k)
-        if not retrieved_chunks:
-            return "The document does not provide this information."
-
-        # Step 2: Rerank retrieved chunks
-        reranked = self._rerank_chunks(user_query, retrieved_chunks)
-
-        # Step 3: Select and trim top 3 chunks
-        selected_chunks = [self._trim_chunk(chunk) for chunk in reranked[:3]]
+    @tracing.traced("rag.build_prompt")
+    def _build_prompt(self, user_query, chunks, max_words):
+        """
+        Trim the best retrieved chunks into a controlled prompt.
+        """
+        # Select and trim top 3 chunks (already ranked by hybrid search)
+        selected_chunks = [self._trim_chunk(chunk) for chunk in chunks[:3]]
         context = "\n\n".join(selected_chunks)
 
-        # Step 4: Controlled prompt
-        prompt = f"""
+        # Controlled prompt
+        return f"""
 You are answering a question using only the provided context.
 
 Rules:
@@ -114,15 +162,187 @@ Question:
 Answer in no more than {max_words} words.
 """
 
+    @tracing.traced("rag.generate")
+    def _generate(self, prompt):
+        try:
+            return self.llm.generate(prompt)
+
+        except LLMError as e:
+            return str(e)
+
+    def _answer(self, user_query, hits, max_words):
+        if not hits:
+            return "The document does not provide this information."
+
+        prompt = self._build_prompt(
+            user_query,
+            [hit["text"] for hit in hits],
+            max_words
+        )
+        return self._generate(prompt)
+
+    # ANSWER CACHE
+    def _cache_params(self, top_k, max_words):
+        # Answers also depend on the LLM and the query settings
+        return f"{self.model_name}|top_k={top_k}|max_words={max_words}"
+
+    @tracing.traced("rag.cache_lookup")
+    def _cached_answer(self, query_embedding, params, version):
+        if self.answer_cache is None:
+            return None
+        answer = self.answer_cache.lookup(query_embedding, version, params)
+        tracing.current_span().set_attribute("hit", answer is not None)
+        return answer
+
+    def _cache_answer(self, query_embedding, params, version, user_query, answer):
+        # Never cache failures; version is the corpus the hits came from,
+        # so an answer finished after a concurrent ingest is not reused
+        if self.answer_cache is None or answer.startswith("Error generating response"):
+            return
+        self.answer_cache.put(query_embedding, version, user_query, answer, params)
+
+    # QUERY PIPELINE
+    def _retrieve(self, user_query, top_k, query_embedding=None):
+        # Retrieve relevant chunks (dense + BM25)
+        return self.vs.search_batch(
+            [user_query],
+            top_k=top_k,
+            hybrid=self.hybrid_search,
+            query_embeddings=query_embedding
+        )[0]
+
+    @tracing.traced("rag.query")
+    def query(self, user_query, top_k=5, max_words=120):
+        params = self._cache_params(top_k, max_words)
+        span = tracing.current_span()
+        span.set_attribute("top_k", top_k)
+
+        # The store is only read-locked for retrieval, not generation
+        with self.lock.read_lock():
+            # Near-duplicate questions are answered from the cache
+            version = self.vs.version
+            query_embedding = self.vs.encode_queries([user_query])
+            cached = self._cached_answer(query_embedding[0], params, version)
+            span.set_attribute("cache_hit", cached is not None)
+            if cached is not None:
+                return cached
+
+            hits = self._retrieve(user_query, top_k, query_embedding)
+
+        span.set_attribute("hits", len(hits))
+        answer = self._answer(user_query, hits, max_words)
+        self._cache_answer(query_embedding[0], params, version, user_query, answer)
+        return answer
+
+    def query_stream(self, user_query, top_k=5, max_words=120, stats=None):
+        """
+        Streaming version of query: yields pieces of the answer as
+        Ollama generates them. If a stats dict is passed it is filled
+        with time_to_first_token and total_time (seconds from the call).
+        """
+        start = time.perf_counter()
+        first_token_time = None
+
         try:
-            response = ollama.chat(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}]
+            params = self._cache_params(top_k, max_words)
+
+            # Traced up to generation; a span must not stay open across yields
+            with tracing.span("rag.query_stream", top_k=top_k) as span:
+                with self.lock.read_lock():
+                    version = self.vs.version
+                    query_embedding = self.vs.encode_queries([user_query])
+                    cached = self._cached_answer(query_embedding[0], params, version)
+                    if cached is None:
+                        hits = self._retrieve(user_query, top_k, query_embedding)
+                span.set_attribute("cache_hit", cached is not None)
+
+            if cached is not None:
+                first_token_time = time.perf_counter() - start
+                yield cached
+                return
+
+            if not hits:
+                first_token_time = time.perf_counter() - start
+                yield "The document does not provide this information."
+                return
+
+            prompt = self._build_prompt(
+                user_query,
+                [hit["text"] for hit in hits],
+                max_words
             )
-            return response["message"]["content"].strip()
 
-        except Exception as e:
-            return f"Error generating response: {e}"
+            try:
+                answer = []
+                for token in self.llm.stream(prompt):
+                    if first_token_time is None:
+                        # Same as strip() on the full answer
+                        token = token.lstrip()
+                        if not token:
+                            continue
+                        first_token_time = time.perf_counter() - start
+                    answer.append(token)
+                    yield token
+
+                self._cache_answer(
+                    query_embedding[0],
+                    params,
+                    version,
+                    user_query,
+                    "".join(answer).strip()
+                )
+
+            except LLMError as e:
+                yield str(e)
+
+        finally:
+            if stats is not None:
+                stats["time_to_first_token"] = first_token_time
+                stats["total_time"] = time.perf_counter() - start
+
+    @tracing.traced("rag.query_batch")
+    def query_batch(self, user_queries, top_k=5, max_words=120, generate=True):
+        """
+        Answer many questions. Retrieval for all of them is a single
+        batched encode + FAISS search; the LLM is then called per question.
+        With generate=False only retrieval runs (useful for evaluation).
+        Returns one dict per question with the answer and the hits
+        (chunk id, score and text).
+        """
+        if not user_queries:
+            return []
+
+        with self.lock.read_lock():
+            version = self.vs.version
+            query_embeddings = self.vs.encode_queries(list(user_queries))
+            all_hits = self.vs.search_batch(
+                user_queries,
+                top_k=top_k,
+                hybrid=self.hybrid_search,
+                query_embeddings=query_embeddings
+            )
+        params = self._cache_params(top_k, max_words)
+
+        results = []
+        for user_query, query_embedding, hits in zip(
+            user_queries, query_embeddings, all_hits
+        ):
+            answer = None
+            if generate:
+                answer = self._cached_answer(query_embedding, params, version)
+                if answer is None:
+                    answer = self._answer(user_query, hits, max_words)
+                    self._cache_answer(
+                        query_embedding, params, version, user_query, answer
+                    )
+
+            results.append({
+                "question": user_query,
+                "answer": answer,
+                "sources": hits
+            })
+
+        return results
 
 
 # CLI TEST
@@ -135,5 +355,7 @@ if __name__ == "__main__":
         if question.lower() == "exit":
             break
 
-        answer = bot.query(question)
-        print("\nAnswer:\n", answer)
+        print("\nAnswer:\n", end=" ")
+        for token in bot.query_stream(question):
+            print(token, end="", flush=True)
+        print()
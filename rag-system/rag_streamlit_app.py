@@ -21,10 +21,21 @@ st.markdown(
 st.divider()
 
 # INITIALIZE RAG SYSTEM
-if "rag_bot" not in st.session_state:
-    st.session_state.rag_bot = RAGSystem(model_name="phi3:mini")
+# One embedding model and vector store per process, shared by all sessions
+# (RAGSystem read/write-locks the store around queries and ingestion)
+@st.cache_resource
+def get_rag_bot():
+    return RAGSystem(model_name="phi3:mini")
 
-bot = st.session_state.rag_bot
+
+bot = get_rag_bot()
+
+# Per-session state: the chat history and which upload was ingested
+if "history" not in st.session_state:
+    st.session_state.history = []
+
+if "ingested_file_id" not in st.session_state:
+    st.session_state.ingested_file_id = None
 
 # DOCUMENT UPLOAD
 st.subheader("📂 Document Upload")
@@ -34,16 +45,24 @@ uploaded_file = st.file_uploader(
     type=["pdf", "docx"]
 )
 
-if uploaded_file:
+# Streamlit reruns the script on every interaction; ingest each upload once
+if uploaded_file and uploaded_file.file_id != st.session_state.ingested_file_id:
     file_suffix = os.path.splitext(uploaded_file.name)[1]
     with tempfile.NamedTemporaryFile(delete=False, suffix=file_suffix) as tmp_file:
         tmp_file.write(uploaded_file.read())
         temp_path = tmp_file.name
 
     with st.spinner("Ingesting document and building vector index..."):
-        bot.ingest_document(temp_path)
+        bot.ingest_document(temp_path, doc_id=uploaded_file.name)
+    st.session_state.ingested_file_id = uploaded_file.file_id
 
     st.success("Document successfully ingested and indexed.")
+    if bot.vs.embedding_cache is not None:
+        cache_stats = bot.vs.embedding_cache.stats()
+        st.caption(
+            f"Embedding cache: {cache_stats['hits']} hits / "
+            f"{cache_stats['misses']} misses"
+        )
     os.remove(temp_path)
 
 st.divider()
@@ -58,17 +77,34 @@ query = st.text_input(
 
 search_clicked = st.button("🔍 Get Summary / Answer")
 
+# CHAT HISTORY
+if st.session_state.history:
+    st.subheader("💬 Previous Questions")
+    for past_question, past_answer in st.session_state.history:
+        with st.chat_message("user"):
+            st.markdown(past_question)
+        with st.chat_message("assistant"):
+            st.markdown(past_answer)
+
 # OUTPUT SECTION
 if search_clicked:
     if not query.strip():
         st.warning("Please enter a valid question.")
     else:
-        with st.spinner("Generating concise answer from the document..."):
-            # Fixed top_k internally
-            summary = bot.query(query, top_k=5)
-
         st.subheader("🧾 Answer / Summary")
-        st.write(summary)
 
-else:
-    st.info("Upload a document, type a question, and click **Get Summary / Answer**.")
\ No newline at end of file
+        # Stream tokens as they are generated (fixed top_k internally)
+        stats = {}
+        answer = st.write_stream(bot.query_stream(query, top_k=5, stats=stats))
+        st.session_state.history.append((query, answer))
+
+        ttft_col, total_col = st.columns(2)
+        if stats.get("time_to_first_token") is not None:
+            ttft_col.metric(
+                "Time to first token",
+                f"{stats['time_to_first_token']:.2f} s"
+            )
+        total_col.metric("Total time", f"{stats['total_time']:.2f} s")
+
+elif not st.session_state.history:
+    st.info("Upload a document, type a question, and click **Get Summary / Answer**.")
@@ -0,0 +1,40 @@
+from answer_cache import AnswerCache
+import numpy as np
+
+
+def _unit(*values):
+    vector = np.array(values, dtype="float32")
+    return vector / np.linalg.norm(vector)
+
+
+def test_similar_questions_hit(tmp_path):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite"), threshold=0.95)
+    cache.put(_unit(1, 0, 0), "v1", "What is X?", "X is a letter.", "p")
+
+    assert cache.lookup(_unit(1, 0.05, 0), "v1", "p") == "X is a letter."
+    assert cache.lookup(_unit(0, 1, 0), "v1", "p") is None    # not similar
+    assert cache.lookup(_unit(1, 0, 0), "v2", "p") is None    # other corpus
+    assert cache.lookup(_unit(1, 0, 0), "v1", "q") is None    # other settings
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3
+
+
+def test_invalidate_ttl_and_eviction(tmp_path):
+    path = str(tmp_path / "answers.sqlite")
+    cache = AnswerCache(path, max_entries=2)
+    cache.put(_unit(1, 0, 0), "v1", "a", "old corpus")
+    cache.put(_unit(0, 1, 0), "v2", "b", "B")
+    cache.invalidate("v2")
+    assert cache.stats()["entries"] == 1
+    assert cache.lookup(_unit(1, 0, 0), "v1") is None
+
+    # Least recently used beyond max_entries
+    cache.put(_unit(0, 0, 1), "v2", "c", "C")
+    cache.lookup(_unit(0, 1, 0), "v2")
+    cache.put(_unit(1, 1, 0), "v2", "d", "D")
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup(_unit(0, 0, 1), "v2") is None
+    assert cache.lookup(_unit(0, 1, 0), "v2") == "B"
+
+    # Persisted, and expired entries are never returned
+    assert AnswerCache(path).lookup(_unit(0, 1, 0), "v2") == "B"
+    assert AnswerCache(path, ttl=-1).lookup(_unit(0, 1, 0), "v2") is None
@@ -0,0 +1,25 @@
+from bm25_index import BM25Index
+
+
+def test_search_remove_and_rebuild():
+    index = BM25Index()
+    index.add(0, "The cat sat on the mat.")
+    index.add(1, "Dogs chase the cat around the yard.")
+    index.add(2, "Quarterly revenue grew by ten percent.")
+
+    assert [chunk_id for chunk_id, _ in index.search("revenue growth")] == [2]
+    assert {chunk_id for chunk_id, _ in index.search("cat")} == {0, 1}
+    assert index.search("unknown words") == []
+
+    index.remove(1, "Dogs chase the cat around the yard.")
+    index.remove(1, "Dogs chase the cat around the yard.")  # no-op
+    assert [chunk_id for chunk_id, _ in index.search("cat dogs")] == [0]
+    assert "dogs" not in index.postings
+
+    # Rebuilt from the chunk texts, it scores the same
+    rebuilt = BM25Index.from_chunks({
+        0: "The cat sat on the mat.",
+        2: "Quarterly revenue grew by ten percent."
+    })
+    assert rebuilt.search("cat") == index.search("cat")
+    assert rebuilt.total_length == index.total_length
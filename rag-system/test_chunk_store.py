@@ -0,0 +1,91 @@
+from chunk_store import ChunkStore
+import numpy as np
+import os
+
+
+def _blob_size(folder):
+    return os.path.getsize(os.path.join(folder, ChunkStore.BLOB_FILE))
+
+
+def test_save_and_reload(tmp_path):
+    folder = str(tmp_path)
+    store = ChunkStore()
+    store.add(0, "first chunk", page=1)
+    store.add(1, "zweiter Abschnitt – ünïcode")
+    store.save(folder)
+
+    store = ChunkStore.open(folder)
+    assert len(store) == 2 and list(store) == [0, 1]
+    assert store[0] == "first chunk" and store.page(0) == 1
+    assert store[1] == "zweiter Abschnitt – ünïcode" and store.page(1) is None
+    assert 2 not in store
+
+
+def test_append_keeps_existing_offsets(tmp_path):
+    folder = str(tmp_path)
+    store = ChunkStore()
+    store.add(0, "a" * 100)
+    store.save(folder)
+    size = _blob_size(folder)
+
+    store = ChunkStore.open(folder)
+    store.add(1, "b" * 50)
+    assert store[1] == "b" * 50  # pending chunks are readable before save
+    store.save(folder)
+
+    # Appended, not rewritten
+    assert _blob_size(folder) == size + 50
+    store = ChunkStore.open(folder)
+    assert store[0] == "a" * 100 and store[1] == "b" * 50
+
+
+def test_removal_and_compaction(tmp_path):
+    folder = str(tmp_path)
+    store = ChunkStore()
+    for chunk_id in range(4):
+        store.add(chunk_id, str(chunk_id) * 400_000)
+    store.save(folder)
+
+    # Little dead space: removed chunks stay in the blob
+    store.pop(0)
+    store.save(folder)
+    assert _blob_size(folder) == 1_600_000
+    assert 0 not in ChunkStore.open(folder)
+
+    # Dead bytes exceed live bytes (and 1 MB): the blob is rewritten
+    store = ChunkStore.open(folder)
+    assert store.pop(1) == "1" * 400_000
+    store.pop(2)
+    store.save(folder)
+    assert _blob_size(folder) == 400_000
+
+    store = ChunkStore.open(folder)
+    assert list(store) == [3] and store[3] == "3" * 400_000
+
+
+def test_save_to_new_folder_compacts(tmp_path):
+    store = ChunkStore()
+    store.add(5, "five")
+    store.add(2, "two")
+    store.save(str(tmp_path / "old"))
+
+    store = ChunkStore.open(str(tmp_path / "old"))
+    store.pop(5)
+    store.save(str(tmp_path / "new"))
+
+    store = ChunkStore.open(str(tmp_path / "new"))
+    assert list(store) == [2] and store[2] == "two"
+    assert _blob_size(str(tmp_path / "new")) == 3
+
+
+def test_table_without_pages(tmp_path):
+    folder = str(tmp_path)
+    with open(os.path.join(folder, ChunkStore.BLOB_FILE), "wb") as f:
+        f.write(b"helloworld")
+    np.save(
+        os.path.join(folder, ChunkStore.TABLE_FILE),
+        np.array([[0, 0, 5], [1, 5, 5]], dtype="int64")
+    )
+
+    store = ChunkStore.open(folder)
+    assert store[1] == "world" and store.page(1) is None
@@ -0,0 +1,83 @@
+import re
+
+import pytest
+
+from ingestion import CHUNK_STRATEGIES, chunk_pages, chunk_text
+
+TEXT = (
+    "Solar panels turn sunlight into power. Wind turbines need steady wind. "
+    "Batteries store the surplus for the night. Grids move power between regions.\n\n"
+    "Hydro plants use falling water. Geothermal plants tap heat from deep underground "
+    "rock layers that stay hot all year round no matter the season."
+)
+
+
+def _count_tokens(text):
+    # Words and punctuation marks, like a subword tokenizer on plain English
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
+def _sentences(text):
+    return [" ".join(s.split()) for s in re.split(r"(?<=[.!?])\s+", text)]
+
+
+def test_words_strategy_matches_fixed_windows():
+    text = " ".join(f"w{i}" for i in range(10))
+    assert chunk_text(text, chunk_size=4, overlap=1) == [
+        "w0 w1 w2 w3", "w3 w4 w5 w6", "w6 w7 w8 w9", "w9"
+    ]
+
+
+@pytest.mark.parametrize("strategy", ["fixed-token", "sentence-pack", "recursive"])
+def test_chunks_fit_the_token_limit(strategy):
+    chunks = chunk_text(TEXT, 16, 4, strategy, _count_tokens)
+
+    assert chunks
+    assert all(_count_tokens(chunk) <= 16 for chunk in chunks)
+    # Nothing is lost: every word shows up in some chunk
+    assert set(TEXT.split()) <= {word for chunk in chunks for word in chunk.split()}
+
+
+def test_sentence_pack_keeps_whole_sentences():
+    chunks = chunk_text(TEXT, 24, 8, "sentence-pack", _count_tokens)
+    sentences = _sentences(TEXT)
+    short = [s for s in sentences if _count_tokens(s) <= 24]
+
+    # Sentences that fit are never cut; chunks start and end on a boundary
+    for sentence in short:
+        assert any(sentence in chunk for chunk in chunks)
+    for chunk in chunks[:-1]:
+        assert chunk.endswith(".")
+        assert any(chunk.startswith(sentence) for sentence in sentences)
+
+    # The next chunk repeats the last sentence when it fits in the overlap
+    assert chunks[0].endswith("Batteries store the surplus for the night.")
+    assert chunks[1].startswith("Batteries store the surplus for the night.")
+
+
+def test_recursive_splits_only_what_does_not_fit():
+    text = "Short one. Another.\n\nSecond paragraph here."
+    assert chunk_text(text, 8, 0, "recursive", _count_tokens) == [
+        "Short one. Another.", "Second paragraph here."
+    ]
+    # A sentence longer than the limit falls back to words
+    long_sentence = "one two three four five six seven eight nine ten."
+    chunks = chunk_text(long_sentence, 4, 0, "recursive", _count_tokens)
+    assert chunks == ["one two three four", "five six seven eight", "nine ten."]
+
+
+def test_chunks_carry_the_page_of_their_first_unit():
+    pages = [(1, "Alpha beta. Gamma delta."), (2, "Epsilon zeta. Eta theta.")]
+    chunks = list(chunk_pages(pages, 6, 3, "sentence-pack", _count_tokens))
+
+    assert chunks == [
+        ("Alpha beta. Gamma delta.", 1),
+        ("Gamma delta. Epsilon zeta.", 1),
+        ("Epsilon zeta. Eta theta.", 2)
+    ]
+
+
+def test_unknown_strategy():
+    assert "sentence-pack" in CHUNK_STRATEGIES
+    with pytest.raises(ValueError):
+        chunk_text(TEXT, strategy="paragraphs")
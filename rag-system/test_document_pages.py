@@ -0,0 +1,102 @@
+import re
+
+import pytest
+from docx import Document
+from PyPDF2 import PageObject, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+import ingestion
+from ingestion import iter_document_pages, iter_pdf_pages
+from rag_chain import RAGSystem
+
+NUMBERS = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+           "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+           "seventeen", "eighteen", "nineteen", "twenty"]
+
+
+def _write_pdf(path, texts):
+    """
+    A PDF with one line of Helvetica text per page ("" = blank page).
+    """
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica")
+    }))
+    for text in texts:
+        page = PageObject.create_blank_page(width=612, height=792)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        writer.add_page(page)
+
+    with open(path, "wb") as f:
+        writer.write(f)
+    return str(path)
+
+
+def _page_texts(count):
+    # Every fifth page is blank
+    return [
+        f"Page {n} is about topic {NUMBERS[n - 1]}." if n % 5 else ""
+        for n in range(1, count + 1)
+    ]
+
+
+def test_parallel_extraction_keeps_page_order(tmp_path):
+    texts = _page_texts(20)
+    assert len(texts) >= ingestion.PARALLEL_PAGE_THRESHOLD
+    path = _write_pdf(tmp_path / "long.pdf", texts)
+
+    expected = [(n, text) for n, text in enumerate(texts, start=1) if text]
+    assert list(iter_pdf_pages(path, workers=1)) == expected
+    assert list(iter_pdf_pages(path, workers=2)) == expected
+
+
+def test_pages_are_streamed(tmp_path):
+    path = _write_pdf(tmp_path / "short.pdf", _page_texts(4))
+
+    pages = iter_document_pages(path)
+    assert next(pages) == (1, "Page 1 is about topic one.")
+    assert [number for number, _ in pages] == [2, 3, 4]
+
+
+def test_docx_paragraphs_have_no_page(tmp_path):
+    path = str(tmp_path / "notes.docx")
+    document = Document()
+    document.add_paragraph("First paragraph.")
+    document.add_paragraph("   ")
+    document.add_paragraph("Second paragraph.")
+    document.save(path)
+
+    assert list(iter_document_pages(path)) == [
+        (None, "First paragraph."), (None, "Second paragraph.")
+    ]
+    with pytest.raises(ValueError):
+        iter_document_pages(str(tmp_path / "notes.txt"))
+
+
+def test_ingested_chunks_keep_their_page(tmp_path, stub_encoder):
+    path = _write_pdf(tmp_path / "topics.pdf", _page_texts(8))
+    folder = str(tmp_path / "db")
+
+    bot = RAGSystem(vector_db_folder=folder, answer_cache=False, llm=object())
+    # One sentence (one page) per chunk
+    bot.vs.model.max_seq_length = 12
+    bot.ingest_document(path, doc_id="topics")
+
+    chunks = bot.vs.text_chunks
+    assert len(chunks) == 7
+    for chunk_id in chunks:
+        page = int(re.match(r"Page (\d+)", chunks[chunk_id]).group(1))
+        assert chunks.page(chunk_id) == page
+
+    # Pages are saved with the chunks
+    bot = RAGSystem(vector_db_folder=folder, answer_cache=False, llm=object())
+    hit = bot.vs.search_batch(["topic seven"], top_k=1)[0][0]
+    assert hit["text"] == "Page 7 is about topic seven."
+    assert hit["page"] == 7
@@ -0,0 +1,48 @@
+from embedding_cache import EmbeddingCache
+import numpy as np
+
+
+def _encode(texts):
+    # One distinct vector per text length
+    return np.array([[len(text), 1.0] for text in texts], dtype="float32")
+
+
+def test_hits_and_reload(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=10)
+    first = cache.embed(["a", "bb"], _encode)
+    assert cache.stats()["misses"] == 2
+    cache.save()
+
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=10)
+    again = cache.embed(["bb", "a"], _encode)
+    assert np.array_equal(again, first[::-1])
+    assert cache.stats()["hits"] == 2
+
+
+def test_lru_eviction(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=2)
+    cache.embed(["a", "bb"], _encode)
+    cache.embed(["a"], _encode)       # "bb" is now least recently used
+    cache.embed(["cccc"], _encode)    # evicts "bb"
+    assert cache.stats()["entries"] == 2
+
+    cache.embed(["a", "bb"], _encode)
+    assert cache.hits == 2 and cache.misses == 4
+
+
+def test_rows_reused_after_save_are_not_hits(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=2)
+    cache.embed(["a", "bb"], _encode)
+    cache.save()
+    cache.embed(["cccc"], _encode)    # overwrites the row of "a", not saved
+    del cache
+
+    cache = EmbeddingCache(str(tmp_path), "model", max_entries=2)
+    vector = cache.embed(["a"], _encode)
+    assert vector.tolist() == [[1.0, 1.0]]
+    assert cache.hits == 0 and cache.misses == 1
+
+    # "bb" still holds its own row; the stale row was reused for "a"
+    assert cache.embed(["bb"], _encode).tolist() == [[2.0, 1.0]]
+    assert cache.hits == 1
+    assert cache.stats()["entries"] == 2
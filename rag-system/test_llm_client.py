@@ -0,0 +1,42 @@
+import importlib.util
+import inspect
+import sys
+import os
+
+import llm_client_ollama
+
+AGENT_CLIENT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "reasoning-agent", "llm_client_ollama.py"
+)
+
+# Code this synchronous copy shares with reasoning-agent's client
+SHARED = [
+    "LLMError",
+    "get_shared_client",
+    "_is_retryable",
+    "LLMClient._messages",
+    "LLMClient._request_args",
+    "LLMClient._retry_delay",
+    "LLMClient._record",
+    "LLMClient.chat",
+    "LLMClient.stream"
+]
+
+
+def _source(module, name):
+    obj = module
+    for part in name.split("."):
+        obj = getattr(obj, part)
+    return inspect.getsource(obj)
+
+
+def test_shared_code_matches_reasoning_agent():
+    spec = importlib.util.spec_from_file_location("agent_llm_client", AGENT_CLIENT)
+    agent_client = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = agent_client  # inspect looks classes up there
+    spec.loader.exec_module(agent_client)
+
+    for name in SHARED:
+        assert _source(llm_client_ollama, name) == _source(agent_client, name), name
+    assert not hasattr(llm_client_ollama, "AsyncLLMClient")
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import rag_chain
+from llm_client_ollama import LLMError
+from rag_chain import RAGSystem
+
+
+class StreamingLLM:
+    """
+    Streams `tokens` with a short pause between them and records when
+    the stream is done; fails with LLMError if `error` is set.
+    """
+
+    def __init__(self, tokens, delay=0.05, error=None):
+        self.tokens = tokens
+        self.delay = delay
+        self.error = error
+        self.finished = False
+        self.calls = 0
+
+    def stream(self, prompt, system=None):
+        self.calls += 1
+        for token in self.tokens:
+            time.sleep(self.delay)
+            yield token
+        if self.error:
+            raise LLMError(self.error)
+        self.finished = True
+
+
+def _streaming_bot(folder, llm, monkeypatch, answer_cache=False):
+    pages = [(1, "Solar panels convert sunlight into electricity.")]
+    monkeypatch.setattr(rag_chain, "iter_document_pages", lambda path: iter(pages))
+    document = folder / "energy.pdf"
+    document.write_bytes(b"")
+
+    bot = RAGSystem(
+        vector_db_folder=str(folder / "db"), answer_cache=answer_cache, llm=llm
+    )
+    bot.ingest_document(str(document), doc_id="energy")
+    return bot
+
+
+def test_ingest_embeds_outside_the_write_lock(tmp_path, stub_encoder, monkeypatch):
+    pages = [(1, "Solar panels convert sunlight into electricity."),
+             (2, "Wind turbines turn moving air into power.")]
+    monkeypatch.setattr(rag_chain, "iter_document_pages", lambda path: iter(pages))
+    document = tmp_path / "energy.pdf"
+    document.write_bytes(b"")
+
+    bot = RAGSystem(vector_db_folder=str(tmp_path / "db"), answer_cache=False, llm=object())
+
+    # A query arriving mid-embedding gets the read lock at once
+    reader_waited = []
+    encode = bot.vs.model.encode
+
+    def encode_and_query(texts, **kwargs):
+        reader = threading.Thread(target=bot.lock.acquire_read)
+        reader.start()
+        reader.join(timeout=1)
+        reader_waited.append(reader.is_alive())
+        bot.lock.release_read()
+        return encode(texts, **kwargs)
+
+    bot.vs.model.encode = encode_and_query
+    assert bot.ingest_document(str(document), doc_id="energy")
+    assert reader_waited == [False]
+
+    hits = bot.vs.search("solar electricity", top_k=1, hybrid=False)
+    assert "Solar panels" in hits[0]
+    assert bot.vs.documents["energy"]
+
+    # Re-ingesting replaces the document
+    pages[:] = [(1, "Hydro plants use falling water.")]
+    bot.ingest_document(str(document), doc_id="energy")
+    assert len(bot.vs.documents["energy"]) == 1
+    assert bot.vs.index.ntotal == 1
+
+
+def test_query_stream_yields_tokens_as_generated(tmp_path, stub_encoder, monkeypatch):
+    llm = StreamingLLM(["  ", " Solar", " panels", " make", " electricity."])
+    bot = _streaming_bot(tmp_path, llm, monkeypatch, answer_cache=True)
+
+    stats = {}
+    tokens = []
+    finished_at_first_token = None
+    for token in bot.query_stream("What do solar panels do?", stats=stats):
+        if not tokens:
+            finished_at_first_token = llm.finished
+        tokens.append(token)
+
+    # Leading whitespace is dropped, the rest arrives in order
+    assert tokens == ["Solar", " panels", " make", " electricity."]
+    assert finished_at_first_token is False
+    assert 0 < stats["time_to_first_token"] < stats["total_time"]
+    assert stats["total_time"] - stats["time_to_first_token"] >= 3 * llm.delay
+
+    # The joined answer is cached and served in one piece
+    stats = {}
+    cached = list(bot.query_stream("What do solar panels do?", stats=stats))
+    assert cached == ["Solar panels make electricity."]
+    assert llm.calls == 1
+    assert stats["time_to_first_token"] is not None
+
+
+def test_query_stream_reports_llm_errors(tmp_path, stub_encoder, monkeypatch):
+    llm = StreamingLLM(["Solar"], error="Ollama is not responding.")
+    bot = _streaming_bot(tmp_path, llm, monkeypatch)
+
+    stats = {}
+    tokens = list(bot.query_stream("What do solar panels do?", stats=stats))
+    assert tokens == ["Solar", "Ollama is not responding."]
+    assert stats["time_to_first_token"] <= stats["total_time"]
@@ -0,0 +1,64 @@
+from rwlock import RWLock
+import threading
+import time
+
+
+def test_readers_share_writers_exclude():
+    lock = RWLock()
+    inside = {"readers": 0, "max_readers": 0, "writer_overlap": False}
+    state_lock = threading.Lock()
+    writing = threading.Event()
+
+    def reader():
+        with lock.read_lock():
+            with state_lock:
+                inside["readers"] += 1
+                inside["max_readers"] = max(inside["max_readers"], inside["readers"])
+                if writing.is_set():
+                    inside["writer_overlap"] = True
+            time.sleep(0.05)
+            with state_lock:
+                inside["readers"] -= 1
+
+    def writer():
+        with lock.write_lock():
+            writing.set()
+            if inside["readers"]:
+                inside["writer_overlap"] = True
+            time.sleep(0.05)
+            writing.clear()
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    threads.append(threading.Thread(target=writer))
+    threads += [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert inside["max_readers"] > 1
+    assert not inside["writer_overlap"]
+
+
+def test_waiting_writer_blocks_new_readers():
+    lock = RWLock()
+    order = []
+
+    lock.acquire_read()
+    writer = threading.Thread(
+        target=lambda: (lock.acquire_write(), order.append("writer"), lock.release_write())
+    )
+    writer.start()
+    time.sleep(0.05)  # the writer is now waiting
+
+    reader = threading.Thread(
+        target=lambda: (lock.acquire_read(), order.append("reader"), lock.release_read())
+    )
+    reader.start()
+    time.sleep(0.05)
+    assert order == []  # the new reader waits behind the writer
+
+    lock.release_read()
+    writer.join()
+    reader.join()
+    assert order == ["writer", "reader"]
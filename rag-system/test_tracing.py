@@ -0,0 +1,13 @@
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_same_module_as_reasoning_agent():
+    # Both projects run standalone, so each keeps a copy of tracing.py;
+    # change them together (reasoning-agent/test_tracing.py tests it)
+    with open(os.path.join(HERE, "tracing.py"), "rb") as f:
+        ours = f.read()
+    with open(os.path.join(HERE, "..", "reasoning-agent", "tracing.py"), "rb") as f:
+        theirs = f.read()
+    assert ours == theirs
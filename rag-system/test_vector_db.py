@@ -0,0 +1,177 @@
+from vector_store import VectorStore
+from chunk_store import ChunkStore
+import faiss
+import numpy as np
+import pickle
+import pytest
+import json
+import os
+
+INDEX_TYPES = ["flat", "hnsw", "ivf", "ivfpq"]
+
+TOPICS = [
+    "solar", "violin", "glacier", "pastry", "compiler", "falcon", "harbor", "quartz"
+]
+
+
+def _chunks(prefix, n):
+    # Distinct chunks: a topic word plus a numbered keyword
+    return [
+        f"{prefix} {TOPICS[i % len(TOPICS)]} keyword{prefix}{i} notes"
+        for i in range(n)
+    ]
+
+
+def _store(folder, index_type="flat", **kwargs):
+    return VectorStore(
+        vector_db_folder=str(folder),
+        index_type=index_type,
+        nlist=4,
+        nprobe=4,
+        pq_m=8,
+        pq_nbits=4,
+        **kwargs
+    )
+
+
+def _texts(vs, query, top_k=5):
+    return vs.search(query, top_k=top_k, hybrid=True)
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_add_replace_remove(stub_encoder, tmp_path, index_type):
+    vs = _store(tmp_path, index_type)
+    first = vs.add_documents(_chunks("alpha", 40), doc_id="a")
+    vs.add_documents(_chunks("beta", 40), doc_id="b")
+    assert vs.index.ntotal == 80 and len(vs.text_chunks) == 80
+    assert "alpha solar keywordalpha0 notes" in _texts(vs, "keywordalpha0")
+
+    # Same doc_id: the old chunks are replaced, ids are never reused
+    replaced = vs.add_documents(_chunks("gamma", 10), doc_id="a")
+    assert vs.index.ntotal == 50 and min(replaced) > max(first)
+    assert not any("alpha" in text for text in _texts(vs, "alpha solar", 10))
+
+    assert vs.remove_document("b") == 40
+    assert vs.remove_document("b") == 0
+    assert vs.index.ntotal == 10 and set(vs.documents) == {"a"}
+    assert all(text.startswith("gamma") for text in _texts(vs, "beta solar", 10))
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+@pytest.mark.parametrize("mmap_index", [False, True])
+def test_save_load_and_remove(stub_encoder, tmp_path, index_type, mmap_index):
+    vs = _store(tmp_path, index_type)
+    vs.add_documents(_chunks("alpha", 40), doc_id="a")
+    vs.add_documents(_chunks("beta", 40), doc_id="b")
+    vs.save()
+
+    loaded = _store(tmp_path, index_type, mmap_index=mmap_index)
+    assert loaded.load()
+    assert loaded.index_type == index_type and loaded.version == vs.version
+    assert loaded.documents == vs.documents and loaded.next_id == 80
+    assert "beta violin keywordbeta1 notes" in _texts(loaded, "keywordbeta1")
+
+    # Removing from a memory-mapped index first copies it into memory
+    assert loaded.remove_document("a") == 40
+    assert loaded.index.ntotal == 40
+    loaded.save()
+
+    reloaded = _store(tmp_path, index_type, mmap_index=mmap_index)
+    assert reloaded.load()
+    assert reloaded.index.ntotal == 40 and len(reloaded.text_chunks) == 40
+    assert not any("alpha" in text for text in _texts(reloaded, "alpha solar", 10))
+
+
+def test_embedding_cache_skips_unchanged_chunks(stub_encoder, tmp_path):
+    vs = _store(tmp_path)
+    vs.build_index(_chunks("alpha", 20))
+    vs.save()
+    encoded = vs.model.encoded
+
+    vs.build_index(_chunks("alpha", 20) + _chunks("beta", 5))
+    assert vs.model.encoded == encoded + 5
+
+
+def test_bm25_is_rebuilt_from_chunks(stub_encoder, tmp_path):
+    folder = str(tmp_path)
+    vs = _store(tmp_path)
+    vs.add_documents(_chunks("alpha", 10), doc_id="a")
+    with open(os.path.join(folder, "bm25.pkl"), "wb") as f:
+        f.write(b"left by an older version")
+    vs.save()
+    assert not os.path.exists(os.path.join(folder, "bm25.pkl"))
+
+    loaded = _store(tmp_path)
+    assert loaded.load()
+    assert loaded._bm25 is None  # nothing built until a keyword search
+    assert loaded.bm25.search("keywordalpha3", 1)[0][0] == 3
+    loaded.remove_document("a")
+    assert loaded.bm25.search("alpha") == []
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_load_without_documents_json(stub_encoder, tmp_path, index_type):
+    vs = _store(tmp_path, index_type)
+    vs.add_documents(_chunks("alpha", 10), doc_id="a")
+    vs.add_documents(_chunks("beta", 10), doc_id="b")
+    vs.save()
+    os.remove(os.path.join(str(tmp_path), "documents.json"))
+
+    loaded = _store(tmp_path)
+    assert loaded.load()
+    assert loaded.index_type == index_type
+    assert loaded.documents == {"default": list(range(20))} and loaded.next_id == 20
+    assert loaded.add_documents(["new chunk"], doc_id="new") == [20]
+    assert loaded.remove_document("default") == 20
+    assert loaded.index.ntotal == 1
+
+
+def _write_legacy_index(folder, chunks):
+    vectors = np.eye(len(chunks), 64, dtype="float32")
+    index = faiss.IndexFlatIP(64)
+    index.add(vectors)
+    faiss.write_index(index, os.path.join(folder, "index.faiss"))
+
+
+def test_migrates_chunks_pkl_list(stub_encoder, tmp_path):
+    # Oldest format: plain IndexFlatIP, chunks.pkl list, no documents.json
+    folder = str(tmp_path)
+    chunks = ["old one", "old two", "old three"]
+    _write_legacy_index(folder, chunks)
+    with open(os.path.join(folder, "chunks.pkl"), "wb") as f:
+        pickle.dump(chunks, f)
+
+    vs = _store(tmp_path)
+    assert vs.load()
+    assert vs.documents == {"default": [0, 1, 2]} and vs.next_id == 3
+    assert [vs.text_chunks[i] for i in range(3)] == chunks
+    assert vs.bm25.search("three", 1)[0][0] == 2
+
+    # Saved in the current format, and still appendable
+    vs.add_documents(["new chunk"], doc_id="new")
+    vs.save()
+    assert ChunkStore.exists(folder)
+
+    vs = _store(tmp_path)
+    assert vs.load()
+    assert vs.index.ntotal == 4 and vs.text_chunks[3] == "new chunk"
+
+
+def test_migrates_chunks_pkl_dict(stub_encoder, tmp_path):
+    # chunks.pkl as {id: text} next to documents.json
+    folder = str(tmp_path)
+    vs = _store(tmp_path)
+    vs.add_documents(["kept alpha", "kept beta"], doc_id="doc")
+    vs.save()
+    os.remove(os.path.join(folder, ChunkStore.TABLE_FILE))
+    os.remove(os.path.join(folder, ChunkStore.BLOB_FILE))
+    with open(os.path.join(folder, "chunks.pkl"), "wb") as f:
+        pickle.dump({0: "kept alpha", 1: "kept beta"}, f)
+
+    vs = _store(tmp_path)
+    assert vs.load()
+    assert vs.documents == {"doc": [0, 1]}
+    assert vs.search("beta", top_k=1) == ["kept beta"]
+
+    with open(os.path.join(folder, "documents.json")) as f:
+        assert json.load(f)["documents"] == {"doc": [0, 1]}
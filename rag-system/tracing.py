@@ -0,0 +1,376 @@
+"""
+Lightweight tracing for the hot paths: nested spans with durations and
+attributes (token counts, cache hits, ...), kept in memory and exported
+as OpenTelemetry JSON (OTLP) or Prometheus text.
+
+Tracing is off by default, and then a span costs one flag check. Turn it
+on with tracing.enable() or TRACING=1 in the environment.
+
+    with tracing.span("vector_store.search", queries=4) as span:
+        ...
+        span.set_attribute("hits", len(hits))
+
+    @tracing.traced("agent.plan")
+    async def plan(...):
+        ...
+
+The current span is kept in a context variable, so spans nest across
+function calls and asyncio tasks (not plain threads, which start with
+an empty context).
+"""
+import os
+import json
+import time
+import random
+import inspect
+import threading
+import functools
+import contextvars
+from collections import deque
+
+# Upper bounds (seconds) of the Prometheus duration histogram
+DURATION_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+SERVICE_NAME = os.environ.get(
+    "OTEL_SERVICE_NAME",
+    os.path.basename(os.path.dirname(os.path.abspath(__file__)))
+)
+
+_enabled = os.environ.get("TRACING", "").lower() in ("1", "true", "yes")
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed operation. Use as a context manager (via span()); numeric
+    attributes are also summed per span name for Prometheus.
+    """
+
+    __slots__ = (
+        "name", "attributes", "trace_id", "span_id", "parent_id",
+        "start_ns", "end_ns", "error", "_start", "_token"
+    )
+
+    def __init__(self, name, attributes=None):
+        self.name = name
+        self.attributes = attributes or {}
+        self.trace_id = None
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = None
+        self.start_ns = None
+        self.end_ns = None
+        self.error = None
+
+    @property
+    def duration(self):
+        """
+        Seconds, once the span has ended.
+        """
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, key, amount=1):
+        """
+        Increment a counter attribute (e.g. tokens over several calls).
+        """
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is not None:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+        else:
+            self.trace_id = f"{random.getrandbits(128):032x}"
+
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._start
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Exited in another context (e.g. a generator closed elsewhere)
+            pass
+
+        _tracer.record(self)
+        return False
+
+
+class _NoopSpan:
+    """
+    Returned by span() while tracing is disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def add(self, key, amount=1):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Keeps the last max_spans finished spans and, per span name, the
+    duration histogram, error count and totals of numeric attributes.
+    """
+
+    def __init__(self, max_spans=10_000):
+        self.spans = deque(maxlen=max_spans)
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def record(self, span):
+        duration = span.duration
+        with self.lock:
+            self.spans.append(span)
+
+            metric = self.metrics.get(span.name)
+            if metric is None:
+                metric = self.metrics[span.name] = {
+                    "count": 0,
+                    "sum": 0.0,
+                    "errors": 0,
+                    "buckets": [0] * len(DURATION_BUCKETS),
+                    "attributes": {}
+                }
+
+            metric["count"] += 1
+            metric["sum"] += duration
+            if span.error is not None:
+                metric["errors"] += 1
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    metric["buckets"][i] += 1
+
+            # Numbers are summed, True counts as one (e.g. cache_hit)
+            for key, value in span.attributes.items():
+                if isinstance(value, (bool, int, float)):
+                    metric["attributes"][key] = (
+                        metric["attributes"].get(key, 0) + value
+                    )
+
+    def reset(self):
+        with self.lock:
+            self.spans.clear()
+            self.metrics = {}
+
+    def finished_spans(self):
+        with self.lock:
+            return list(self.spans)
+
+    # EXPORT
+    def export_otel(self):
+        """
+        Finished spans as an OTLP/JSON ExportTraceServiceRequest, which
+        OpenTelemetry collectors accept on /v1/traces.
+        """
+        spans = []
+        for span in self.finished_spans():
+            otel_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [
+                    {"key": key, "value": _otel_value(value)}
+                    for key, value in span.attributes.items()
+                ],
+                # STATUS_CODE_OK / STATUS_CODE_ERROR
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+            }
+            if span.parent_id is not None:
+                otel_span["parentSpanId"] = span.parent_id
+            spans.append(otel_span)
+
+        return {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": SERVICE_NAME}}
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": "tracing"}, "spans": spans}]
+            }]
+        }
+
+    def export_prometheus(self):
+        """
+        Span metrics in the Prometheus text exposition format.
+        """
+        with self.lock:
+            metrics = {
+                name: dict(metric, attributes=dict(metric["attributes"]))
+                for name, metric in self.metrics.items()
+            }
+
+        lines = [
+            "# HELP span_duration_seconds Duration of traced spans.",
+            "# TYPE span_duration_seconds histogram"
+        ]
+        for name, metric in sorted(metrics.items()):
+            label = f'span="{_escape_label(name)}"'
+            for bound, count in zip(DURATION_BUCKETS, metric["buckets"]):
+                lines.append(f'span_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'span_duration_seconds_bucket{{{label},le="+Inf"}} {metric["count"]}')
+            lines.append(f"span_duration_seconds_sum{{{label}}} {metric['sum']}")
+            lines.append(f"span_duration_seconds_count{{{label}}} {metric['count']}")
+
+        lines += [
+            "# HELP span_errors_total Spans that ended with an exception.",
+            "# TYPE span_errors_total counter"
+        ]
+        for name, metric in sorted(metrics.items()):
+            lines.append(f'span_errors_total{{span="{_escape_label(name)}"}} {metric["errors"]}')
+
+        lines += [
+            "# HELP span_attribute_total Sum of numeric span attributes (tokens, cache hits, ...).",
+            "# TYPE span_attribute_total counter"
+        ]
+        for name, metric in sorted(metrics.items()):
+            for key, total in sorted(metric["attributes"].items()):
+                lines.append(
+                    f'span_attribute_total{{span="{_escape_label(name)}",'
+                    f'attribute="{_escape_label(key)}"}} {total}'
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+def _otel_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # OTLP/JSON encodes 64-bit integers as strings
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_tracer = Tracer()
+
+
+# PUBLIC API
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def span(name, **attributes):
+    """
+    Context manager timing the enclosed block as a child of the current
+    span. A shared no-op object while tracing is disabled.
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def current_span():
+    """
+    The innermost active span, or a no-op span.
+    """
+    return (_enabled and _current_span.get()) or _NOOP_SPAN
+
+
+def traced(name=None, **attributes):
+    """
+    Decorator: run each call of the function (sync or async) in a span
+    named `name` (default: the function's qualified name).
+    """
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await fn(*args, **kwargs)
+                with Span(span_name, dict(attributes)):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(span_name, dict(attributes)):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def finished_spans():
+    return _tracer.finished_spans()
+
+
+def reset():
+    _tracer.reset()
+
+
+def export_otel_json(path=None):
+    """
+    OTLP/JSON of the finished spans; written to path if given.
+    """
+    payload = json.dumps(_tracer.export_otel())
+    if path is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(payload)
+    return payload
+
+
+def export_prometheus(path=None):
+    """
+    Prometheus text of the span metrics; written to path if given.
+    """
+    text = _tracer.export_prometheus()
+    if path is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return text
@@ -1,109 +1,675 @@
 import os
+import json
+import uuid
 import faiss
 import pickle
+import threading
 import numpy as np
 from sentence_transformers import SentenceTransformer
+from embedding_cache import EmbeddingCache
+from chunk_store import ChunkStore
+from bm25_index import BM25Index
+import tracing
+
+
+# Supported FAISS backends:
+#   flat  - exact inner-product scan (default)
+#   hnsw  - graph index, fast queries, no training
+#   ivf   - inverted lists, trained on the first batch of chunks
+#   ivfpq - inverted lists with product-quantized (compressed) vectors
+INDEX_TYPES = ("flat", "hnsw", "ivf", "ivfpq")
 
 
 class VectorStore:
     def __init__(
         self,
         model_name="all-MiniLM-L6-v2",
-        vector_db_folder="vector_db"
+        vector_db_folder="vector_db",
+        embedding_cache_size=100_000,
+        index_type="flat",
+        nlist=100,
+        hnsw_m=32,
+        pq_m=48,
+        pq_nbits=8,
+        nprobe=8,
+        ef_search=64,
+        mmap_index=False
     ):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(
+                f"Unknown index type '{index_type}'. "
+                f"Choose one of: {', '.join(INDEX_TYPES)}."
+            )
+
         # Load embedding model (lightweight & fast)
         self.model = SentenceTransformer(model_name)
 
+        # Persistent chunk embedding cache (0 disables it)
+        self.embedding_cache = None
+        if embedding_cache_size > 0:
+            self.embedding_cache = EmbeddingCache(
+                os.path.join(vector_db_folder, "embedding_cache"),
+                model_name,
+                max_entries=embedding_cache_size
+            )
+
         self.index = None
-        self.text_chunks = []
+        self.text_chunks = ChunkStore()  # chunk id -> chunk text
+        self.documents = {}              # document id -> list of chunk ids
+        self._bm25 = BM25Index()         # keyword index over the same chunks
+        self._bm25_lock = threading.Lock()
+        self.next_id = 0
+
+        # Changes whenever chunks are added or removed (used by caches)
+        self.version = uuid.uuid4().hex
         self.vector_db_folder = vector_db_folder
 
-    def build_index(self, chunks):
+        # Memory-map the saved index instead of reading it into RAM.
+        # It is re-read normally the first time it has to be modified.
+        self.mmap_index = mmap_index
+        self._index_mmapped = False
+
+        # Index backend and its build / query-time parameters
+        self.index_type = index_type
+        self.nlist = nlist
+        self.hnsw_m = hnsw_m
+        self.pq_m = pq_m
+        self.pq_nbits = pq_nbits
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+
+    def _embed(self, chunks):
         """
-        Build FAISS index from text chunks.
-        Duplicate chunks are removed before embedding.
+        Embed chunks, reusing cached embeddings for unchanged text.
         """
-        print("Preparing chunks for embedding...")
+        if self.embedding_cache is None:
+            return self._encode(chunks)
 
-        # Extra safety: remove duplicates again
-        unique_chunks = list(dict.fromkeys(chunks))
+        embeddings = self.embedding_cache.embed(chunks, self._encode)
+        stats = self.embedding_cache.stats()
+        print(
+            f"Embedding cache: {stats['hits']} hits, "
+            f"{stats['misses']} misses."
+        )
+        return embeddings
 
-        print(f"Embedding {len(unique_chunks)} chunks...")
+    def _encode(self, chunks):
+        """
+        Embed chunks with the model and normalize them for cosine similarity.
+        """
         embeddings = self.model.encode(
-            unique_chunks,
+            chunks,
             show_progress_bar=True
         )
 
-        # Normalize embeddings for cosine similarity
         embeddings = np.array(embeddings).astype("float32")
         faiss.normalize_L2(embeddings)
+        return embeddings
 
-        dimension = embeddings.shape[1]
+    def count_tokens(self, text):
+        """
+        Length of text in the embedding model's tokenizer tokens.
+        """
+        return len(
+            self.model.tokenizer(text, add_special_tokens=False)["input_ids"]
+        )
 
-        # Use cosine similarity (IndexFlatIP)
-        self.index = faiss.IndexFlatIP(dimension)
-        self.index.add(embeddings)
+    @property
+    def max_chunk_tokens(self):
+        """
+        Longest chunk the model embeds without truncation
+        (sequence limit minus the [CLS] / [SEP] tokens).
+        """
+        return self.model.max_seq_length - 2
 
-        self.text_chunks = unique_chunks
+    def _new_index(self, dimension, n_train=0):
+        """
+        Create an empty index of the configured type.
+        All backends use inner product on normalized vectors (cosine).
+        Flat and HNSW indexes are wrapped in an ID map so chunks keep
+        stable ids; IVF indexes store ids natively.
+        """
+        metric = faiss.METRIC_INNER_PRODUCT
+
+        if self.index_type == "flat":
+            return faiss.IndexIDMap(faiss.IndexFlatIP(dimension))
+
+        if self.index_type == "hnsw":
+            # IDMap2 keeps vectors reconstructable, needed for removal
+            return faiss.IndexIDMap2(
+                faiss.IndexHNSWFlat(dimension, self.hnsw_m, metric)
+            )
+
+        # IVF: cannot have more lists than training points
+        nlist = max(1, min(self.nlist, n_train))
+        quantizer = faiss.IndexFlatIP(dimension)
+
+        if self.index_type == "ivf":
+            return faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+
+        if n_train < 2 ** self.pq_nbits:
+            raise ValueError(
+                f"IVF-PQ needs at least {2 ** self.pq_nbits} chunks to train. "
+                "Use index_type='ivf' or 'flat' for small corpora."
+            )
+        return faiss.IndexIVFPQ(
+            quantizer, dimension, nlist, self.pq_m, self.pq_nbits, metric
+        )
+
+    def _search_params(self, nprobe=None, ef_search=None):
+        """
+        Per-call search parameters for the configured backend.
+        """
+        if self.index_type in ("ivf", "ivfpq"):
+            return faiss.SearchParametersIVF(
+                nprobe=nprobe or self.nprobe
+            )
+        if self.index_type == "hnsw":
+            return faiss.SearchParametersHNSW(
+                efSearch=ef_search or self.ef_search
+            )
+        return None
+
+    def set_search_params(self, nprobe=None, ef_search=None):
+        """
+        Change the default query-time tuning knobs.
+        nprobe applies to IVF backends, ef_search to HNSW.
+        """
+        if nprobe is not None:
+            self.nprobe = nprobe
+        if ef_search is not None:
+            self.ef_search = ef_search
+
+    def reset(self):
+        """
+        Drop the whole corpus.
+        """
+        self.index = None
+        self.text_chunks = ChunkStore()
+        self.documents = {}
+        self._bm25 = BM25Index()
+        self.next_id = 0
+        self._index_mmapped = False
+        self.version = uuid.uuid4().hex
+
+    @property
+    def bm25(self):
+        """
+        The BM25 index, rebuilt from the chunk store the first time it is
+        needed after a load (it is not stored on disk).
+        """
+        if self._bm25 is None:
+            with self._bm25_lock:
+                if self._bm25 is None:
+                    print("Building BM25 index...")
+                    self._bm25 = BM25Index.from_chunks(self.text_chunks)
+        return self._bm25
+
+    def build_index(self, chunks, doc_id="default"):
+        """
+        Build FAISS index from text chunks, replacing the whole corpus.
+        Duplicate chunks are removed before embedding.
+        """
+        self.reset()
+        self.add_documents(chunks, doc_id=doc_id)
         print("FAISS index built successfully.")
 
+    def add_documents(self, chunks, doc_id="default", batch_size=256):
+        """
+        Embed only the new chunks and append them to the live index.
+        chunks may be a list or a stream of texts or (text, page) pairs;
+        they are embedded and indexed in batches as they arrive.
+        Adding an existing doc_id replaces that document.
+        Returns the ids assigned to the new chunks.
+        """
+        return self.add_embedded(self.embed_batches(chunks, batch_size), doc_id)
+
+    def embed_batches(self, chunks, batch_size=256):
+        """
+        Deduplicate and embed chunks (texts or (text, page) pairs) in
+        batches, yielding ([(text, page), ...], embeddings). Nothing in
+        the index changes, so this can run while the store is searched.
+        """
+        # IVF backends are trained on the first batch, so give them all of it
+        if self.index is None and self.index_type in ("ivf", "ivfpq"):
+            chunks = list(chunks)
+            batch_size = max(batch_size, len(chunks))
+
+        seen_chunks = set()  # extra safety: remove duplicates again
+        batch = []
+        for item in chunks:
+            text, page = (item, None) if isinstance(item, str) else item
+            if text in seen_chunks:
+                continue
+            seen_chunks.add(text)
+
+            batch.append((text, page))
+            if len(batch) >= batch_size:
+                yield batch, self._embed_batch(batch)
+                batch = []
+
+        if batch:
+            yield batch, self._embed_batch(batch)
+
+    def _embed_batch(self, batch):
+        texts = [text for text, _ in batch]
+        print(f"Embedding {len(texts)} chunks...")
+        return self._embed(texts)
+
+    def add_embedded(self, batches, doc_id="default"):
+        """
+        Append batches from embed_batches to the index as document
+        doc_id, replacing an existing document with that id.
+        Returns the ids assigned to the new chunks.
+        """
+        if doc_id in self.documents:
+            self.remove_document(doc_id)
+
+        chunk_ids = []
+        for batch, embeddings in batches:
+            chunk_ids.extend(self._add_batch(batch, embeddings))
+
+        if chunk_ids:
+            self.documents[doc_id] = chunk_ids
+            self.version = uuid.uuid4().hex
+        print(f"Indexed {len(chunk_ids)} chunks for '{doc_id}'.")
+        return chunk_ids
+
+    def _add_batch(self, batch, embeddings):
+        """
+        Append a batch of (text, page) pairs and their embeddings to the
+        index, the chunk store and BM25.
+        """
+        self._ensure_writable_index()
+        if self.index is None:
+            self.index = self._new_index(
+                embeddings.shape[1],
+                n_train=len(embeddings)
+            )
+
+        if not self.index.is_trained:
+            print(f"Training {self.index_type} index...")
+            self.index.train(embeddings)
+
+        ids = np.arange(
+            self.next_id,
+            self.next_id + len(batch),
+            dtype="int64"
+        )
+        self.index.add_with_ids(embeddings, ids)
+
+        chunk_ids = ids.tolist()
+        for chunk_id, (text, page) in zip(chunk_ids, batch):
+            self.text_chunks.add(chunk_id, text, page)
+            self.bm25.add(chunk_id, text)
+
+        self.next_id += len(chunk_ids)
+        return chunk_ids
+
+    def remove_document(self, doc_id):
+        """
+        Remove every chunk of a document from the index.
+        Returns the number of chunks removed.
+        """
+        chunk_ids = self.documents.pop(doc_id, None)
+        if not chunk_ids:
+            return 0
+
+        self._remove_ids(np.array(chunk_ids, dtype="int64"))
+        for chunk_id in chunk_ids:
+            text = self.text_chunks.pop(chunk_id)
+            if text is not None:
+                self.bm25.remove(chunk_id, text)
+
+        self.version = uuid.uuid4().hex
+        return len(chunk_ids)
+
+    def _remove_ids(self, ids):
+        """
+        Remove vectors by id. HNSW graphs do not support deletion,
+        so that backend is rebuilt from the remaining vectors.
+        """
+        self._ensure_writable_index()
+        if self.index_type != "hnsw":
+            self.index.remove_ids(ids)
+            return
+
+        all_ids = faiss.vector_to_array(self.index.id_map)
+        vectors = self.index.index.reconstruct_n(0, self.index.ntotal)
+        keep = ~np.isin(all_ids, ids)
+
+        self.index = self._new_index(self.index.d)
+        self.index.add_with_ids(vectors[keep], all_ids[keep])
+
+    def _ensure_writable_index(self):
+        """
+        Replace a memory-mapped index with an in-memory copy before
+        it is modified.
+        """
+        if self._index_mmapped:
+            self.index = faiss.read_index(
+                os.path.join(self.vector_db_folder, "index.faiss")
+            )
+            self._index_mmapped = False
+
     def save(self):
         """
-        Save FAISS index and text chunks to disk.
+        Save FAISS index, text chunks and document ids to disk.
         """
         if not os.path.exists(self.vector_db_folder):
             os.makedirs(self.vector_db_folder)
 
-        faiss.write_index(
-            self.index,
-            os.path.join(self.vector_db_folder, "index.faiss")
-        )
+        # Write to a temporary file first: a memory-mapped index may
+        # still be reading the old one
+        index_path = os.path.join(self.vector_db_folder, "index.faiss")
+        faiss.write_index(self.index, index_path + ".tmp")
+        os.replace(index_path + ".tmp", index_path)
+
+        self.text_chunks.save(self.vector_db_folder)
+
+        # Written by older versions; BM25 is now rebuilt from the chunks
+        legacy_bm25_path = os.path.join(self.vector_db_folder, "bm25.pkl")
+        if os.path.exists(legacy_bm25_path):
+            os.remove(legacy_bm25_path)
 
         with open(
-            os.path.join(self.vector_db_folder, "chunks.pkl"),
-            "wb"
+            os.path.join(self.vector_db_folder, "documents.json"),
+            "w"
         ) as f:
-            pickle.dump(self.text_chunks, f)
+            json.dump(
+                {
+                    "next_id": self.next_id,
+                    "documents": self.documents,
+                    "index_type": self.index_type,
+                    "version": self.version
+                },
+                f
+            )
+
+        if self.embedding_cache is not None:
+            self.embedding_cache.save()
 
         print("Vector DB saved.")
 
     def load(self):
         """
-        Load FAISS index and text chunks from disk.
+        Load FAISS index, document ids and the chunk store from disk.
+        Chunk texts stay memory-mapped and are read only when returned
+        by a search. Databases saved as chunks.pkl are converted on load.
         """
         index_path = os.path.join(self.vector_db_folder, "index.faiss")
-        chunks_path = os.path.join(self.vector_db_folder, "chunks.pkl")
+        legacy_chunks_path = os.path.join(self.vector_db_folder, "chunks.pkl")
+        documents_path = os.path.join(self.vector_db_folder, "documents.json")
 
-        if not os.path.exists(index_path) or not os.path.exists(chunks_path):
+        has_chunks = (
+            ChunkStore.exists(self.vector_db_folder)
+            or os.path.exists(legacy_chunks_path)
+        )
+        if not os.path.exists(index_path) or not has_chunks:
             print("Vector DB not found.")
             return False
 
-        self.index = faiss.read_index(index_path)
+        io_flags = faiss.IO_FLAG_MMAP if self.mmap_index else 0
+        self.index = faiss.read_index(index_path, io_flags)
+        self._index_mmapped = self.mmap_index
+
+        legacy_chunks = None
+        if ChunkStore.exists(self.vector_db_folder):
+            self.text_chunks = ChunkStore.open(self.vector_db_folder)
+        else:
+            with open(legacy_chunks_path, "rb") as f:
+                legacy_chunks = pickle.load(f)
+
+        if os.path.exists(documents_path):
+            with open(documents_path, "r") as f:
+                meta = json.load(f)
+            self.next_id = meta["next_id"]
+            self.documents = meta["documents"]
+            self.index_type = meta.get("index_type", "flat")
+            self.version = meta.get("version", self.version)
+            if legacy_chunks is not None:
+                self.text_chunks = ChunkStore()
+                for chunk_id, chunk in legacy_chunks.items():
+                    self.text_chunks[chunk_id] = chunk
+        elif legacy_chunks is not None:
+            self._upgrade_legacy_db(legacy_chunks)
+        else:
+            self._recover_documents()
 
-        with open(chunks_path, "rb") as f:
-            self.text_chunks = pickle.load(f)
+        # Rebuilt from the memory-mapped chunks on first use
+        self._bm25 = None
 
         print("Vector DB loaded.")
         return True
 
-    def search(self, query, top_k=3):
+    def _recover_documents(self):
         """
-        Search for the most relevant chunks using cosine similarity.
+        documents.json is missing next to a chunk store (e.g. deleted by
+        hand): keep every stored chunk as the "default" document.
         """
-        if self.index is None:
-            return []
+        if not isinstance(self.index, faiss.IndexIDMap):
+            raise ValueError(
+                "documents.json is missing and the index has no chunk ids; "
+                "re-ingest the documents."
+            )
+
+        inner = faiss.downcast_index(self.index.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            self.index_type = "hnsw"
+        elif isinstance(inner, faiss.IndexIVFPQ):
+            self.index_type = "ivfpq"
+        elif isinstance(inner, faiss.IndexIVF):
+            self.index_type = "ivf"
+        else:
+            self.index_type = "flat"
+
+        chunk_ids = sorted(self.text_chunks)
+        print(f"documents.json not found; keeping {len(chunk_ids)} chunks as 'default'.")
+        self.documents = {"default": chunk_ids} if chunk_ids else {}
+        self.next_id = max(chunk_ids, default=-1) + 1
+
+    def _upgrade_legacy_db(self, chunks):
+        """
+        Older databases stored a plain IndexFlatIP and a list of chunks.
+        Wrap the vectors in an IndexIDMap keyed by list position.
+        """
+        chunk_ids = list(range(len(chunks)))
+
+        self._ensure_writable_index()
+        if not isinstance(self.index, faiss.IndexIDMap):
+            vectors = self.index.reconstruct_n(0, self.index.ntotal)
+            self.index_type = "flat"
+            self.index = self._new_index(self.index.d)
+            self.index.add_with_ids(vectors, np.array(chunk_ids, dtype="int64"))
+
+        self.text_chunks = ChunkStore()
+        for chunk_id, chunk in zip(chunk_ids, chunks):
+            self.text_chunks[chunk_id] = chunk
 
-        # Embed query
-        query_embedding = self.model.encode([query])
-        query_embedding = np.array(query_embedding).astype("float32")
-        faiss.normalize_L2(query_embedding)
+        self.documents = {"default": chunk_ids}
+        self.next_id = len(chunks)
+
+    @tracing.traced("vector_store.encode_queries")
+    def encode_queries(self, queries):
+        """
+        Embed queries and normalize them for cosine similarity.
+        """
+        query_embeddings = self.model.encode(queries)
+        query_embeddings = np.array(query_embeddings).astype("float32")
+        faiss.normalize_L2(query_embeddings)
+        return query_embeddings
+
+    def search(
+        self,
+        query,
+        top_k=3,
+        nprobe=None,
+        ef_search=None,
+        hybrid=False
+    ):
+        """
+        Search for the most relevant chunks using cosine similarity,
+        or dense + BM25 fusion when hybrid=True.
+        nprobe / ef_search override the backend defaults for this call.
+        """
+        hits = self.search_batch(
+            [query], top_k, nprobe, ef_search, hybrid=hybrid
+        )[0]
+        return [hit["text"] for hit in hits]
+
+    @tracing.traced("vector_store.search")
+    def search_batch(
+        self,
+        queries,
+        top_k=3,
+        nprobe=None,
+        ef_search=None,
+        hybrid=False,
+        fusion="rrf",
+        alpha=0.5,
+        candidates=4,
+        rrf_k=60,
+        query_embeddings=None
+    ):
+        """
+        Search many queries at once: one batched encode and a single
+        FAISS search over the query matrix.
+
+        With hybrid=True, top_k * candidates hits from the dense index and
+        from the BM25 index are fused, so exact-term matches missed by
+        FAISS can still be returned. fusion is "rrf" (reciprocal rank
+        fusion) or "weighted" (alpha * dense + (1 - alpha) * BM25, both
+        min-max normalized per query).
+
+        Returns one list per query of {"id", "score", "text", "page"} hits.
+        Hybrid hits also carry "dense_score" and "bm25_score" (None when
+        the chunk was not a candidate on that side).
+        query_embeddings may be passed if the queries are already encoded.
+        """
+        if self.index is None or self.index.ntotal == 0 or not queries:
+            return [[] for _ in queries]
+
+        tracing.current_span().set_attributes(
+            queries=len(queries),
+            top_k=top_k,
+            hybrid=hybrid,
+            index_type=self.index_type
+        )
+
+        # Embed all queries in one forward pass
+        if query_embeddings is None:
+            query_embeddings = self.encode_queries(list(queries))
 
         # Search index
-        scores, indices = self.index.search(query_embedding, top_k)
+        n_dense = top_k * candidates if hybrid else top_k
+        with tracing.span("faiss.search", k=n_dense):
+            scores, indices = self.index.search(
+                query_embeddings,
+                n_dense,
+                params=self._search_params(nprobe, ef_search)
+            )
+
+        # BM25 + fusion (the reranking step) and hit assembly
+        with tracing.span("vector_store.rerank", fusion=fusion if hybrid else "none"):
+            results = []
+            for query, row_scores, row_ids in zip(queries, scores, indices):
+                dense = [
+                    (idx, score)
+                    for score, idx in zip(row_scores.tolist(), row_ids.tolist())
+                    if idx in self.text_chunks
+                ]
+
+                if hybrid:
+                    keyword = self.bm25.search(query, top_k * candidates)
+                    ranked = self._fuse(dense, keyword, fusion, alpha, rrf_k)[:top_k]
+                else:
+                    ranked = [(idx, score, {}) for idx, score in dense]
+
+                hits = []
+                for idx, score, extra in ranked:
+                    hit = {
+                        "id": idx,
+                        "score": score,
+                        "text": self.text_chunks[idx],
+                        "page": self.text_chunks.page(idx)
+                    }
+                    hit.update(extra)
+                    hits.append(hit)
+                results.append(hits)
+
+        return results
+
+    def _fuse(self, dense, keyword, fusion, alpha, rrf_k):
+        """
+        Fuse ranked (id, score) lists from the dense and BM25 indexes.
+        Returns (id, fused score, {"dense_score", "bm25_score"}), best first.
+        """
+        dense_scores = dict(dense)
+        bm25_scores = dict(keyword)
+        fused = {}
+
+        if fusion == "rrf":
+            for ranking in (dense, keyword):
+                for rank, (idx, _) in enumerate(ranking, start=1):
+                    fused[idx] = fused.get(idx, 0.0) + 1.0 / (rrf_k + rank)
+
+        elif fusion == "weighted":
+            for weight, scores in ((alpha, dense_scores), (1 - alpha, bm25_scores)):
+                if not scores:
+                    continue
+                low, high = min(scores.values()), max(scores.values())
+                for idx, score in scores.items():
+                    norm = (score - low) / (high - low) if high > low else 1.0
+                    fused[idx] = fused.get(idx, 0.0) + weight * norm
+
+        else:
+            raise ValueError(
+                f"Unknown fusion '{fusion}'. Choose 'rrf' or 'weighted'."
+            )
+
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+        return [
+            (
+                idx,
+                score,
+                {
+                    "dense_score": dense_scores.get(idx),
+                    "bm25_score": bm25_scores.get(idx)
+                }
+            )
+            for idx, score in ranked
+        ]
+
+    def recall_at_k(self, queries, top_k=5, nprobe=None, ef_search=None):
+        """
+        Fraction of the exact (flat) top_k neighbours that the configured
+        backend also returns, averaged over queries. Use it to pick a
+        backend and nprobe / ef_search for a corpus.
+        """
+        if self.index is None or self.index.ntotal == 0:
+            return 0.0
+
+        # Exact baseline over the same chunks (embeddings come from cache)
+        chunk_ids = list(self.text_chunks)
+        baseline = faiss.IndexIDMap(faiss.IndexFlatIP(self.index.d))
+        baseline.add_with_ids(
+            self._embed([self.text_chunks[i] for i in chunk_ids]),
+            np.array(chunk_ids, dtype="int64")
+        )
+
+        query_embeddings = self.encode_queries(queries)
+        _, exact = baseline.search(query_embeddings, top_k)
+        _, approx = self.index.search(
+            query_embeddings,
+            top_k,
+            params=self._search_params(nprobe, ef_search)
+        )
 
-        results = []
-        for idx in indices[0]:
-            if idx < len(self.text_chunks):
-                results.append(self.text_chunks[idx])
+        recalls = []
+        for exact_ids, approx_ids in zip(exact, approx):
+            expected = set(exact_ids.tolist()) - {-1}
+            if expected:
+                found = expected.intersection(approx_ids.tolist())
+                recalls.append(len(found) / len(expected))
 
-        return results
\ No newline at end of file
+        return float(np.mean(recalls)) if recalls else 0.0
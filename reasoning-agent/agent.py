@@ -1,29 +1,76 @@
-from llm_client_ollama import LLMClient
+from llm_client_ollama import LLMClient, AsyncLLMClient, LLMError, run_coroutine
+from response_cache import ResponseCache
+from stub_llm import StubLLMClient, AsyncStubLLMClient
+import fast_path
+import tracing
+import asyncio
+import time
 import re
 
+# (sync client, async client) per LLM backend
+BACKENDS = {
+    "ollama": (LLMClient, AsyncLLMClient),
+    "stub": (StubLLMClient, AsyncStubLLMClient)
+}
+
 class ReasoningAgent:
-    
-    def __init__(self, model_name="phi3:mini"):
-        self.llm = LLMClient(model_name=model_name)
 
-    # STEP 1: PLANNING
-    def plan_steps(self, question: str) -> str:
-        prompt = f"""
+    def __init__(
+        self,
+        model_name="phi3:mini",
+        concurrent=True,
+        samples=1,
+        max_calls=8,
+        max_tokens=None,
+        max_retries=5,
+        fast_path=True,
+        fast_path_explain=True,
+        response_cache="response_cache.sqlite",
+        backend="ollama"
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown LLM backend: {backend}")
+
+        self.model_name = model_name
+        self.client_class, self.async_client_class = BACKENDS[backend]
+
+        # Repeated prompts are answered from disk (None disables the cache)
+        self.response_cache = (
+            ResponseCache(response_cache) if response_cache else None
+        )
+        self.llm = self.client_class(model_name=model_name, cache=self.response_cache)
+
+        # Run independent stages in parallel (see run_async)
+        self.concurrent = concurrent
+
+        # Self-consistency: solve samples per attempt, and the per-question
+        # budget (LLM calls / tokens, None = unlimited) for retries. Retries
+        # are also capped by max_retries, so an unlimited budget ends too.
+        self.samples = samples
+        self.max_calls = max_calls
+        self.max_tokens = max_tokens
+        self.max_retries = max_retries
+
+        # Answer arithmetic / time questions exactly without solve calls;
+        # the LLM then only writes the explanation (or nothing at all)
+        self.fast_path = fast_path
+        self.fast_path_explain = fast_path_explain
+
+    # PROMPTS
+    # The fixed instructions of each stage are sent as the system message
+    # and the question-specific part as the user message. Every call of a
+    # stage then starts with the same prefix, which Ollama can reuse from
+    # its KV cache while the model stays loaded (keep_alive).
+    PLAN_INSTRUCTIONS = """
 Create a clear step-by-step plan to solve the problem.
 
 Rules:
 - Return numbered steps only
 - Be concise
 - No explanations beyond the steps
-
-Question:
-{question}
 """
-        return self.llm.generate(prompt)
 
-    # STEP 2: SOLVING (EXECUTION)
-    def solve(self, question: str) -> str:
-        prompt = f"""
+    SOLVE_INSTRUCTIONS = """
 Solve the problem step-by-step internally.
 
 IMPORTANT RULES:
@@ -38,15 +85,9 @@ The answer may be:
 - Text
 - A time duration (e.g., 3 hours 35 minutes)
 - A time range (e.g., 11:00–12:00)
-
-Question:
-{question}
 """
-        return self.llm.generate(prompt)
 
-    # STEP 3: VERIFICATION
-    def verify(self, question: str, solution: str) -> str:
-        prompt = f"""
+    VERIFY_INSTRUCTIONS = """
 Verify the solution carefully.
 
 Validation checklist:
@@ -61,14 +102,89 @@ PASS
 
 Otherwise respond exactly:
 FAIL
+"""
+
+    EXPLAIN_INSTRUCTIONS = """
+Explain the solution in ONE concise paragraph for a user.
+
+Rules:
+- No formulas
+- No step numbers
+- Simple explanation
+"""
+
+    INSTRUCTIONS = {
+        "plan": PLAN_INSTRUCTIONS,
+        "solve": SOLVE_INSTRUCTIONS,
+        "verify": VERIFY_INSTRUCTIONS,
+        "explain": EXPLAIN_INSTRUCTIONS
+    }
 
+    def _plan_prompt(self, question: str) -> str:
+        return f"""
+Question:
+{question}
+"""
+
+    def _solve_prompt(self, question: str) -> str:
+        return f"""
+Question:
+{question}
+"""
+
+    def _verify_prompt(self, question: str, solution: str) -> str:
+        return f"""
 Question:
 {question}
 
 Solution:
 {solution}
 """
-        return self.llm.generate(prompt)
+
+    def _explain_prompt(self, question: str, final_answer: str) -> str:
+        return f"""
+Question:
+{question}
+
+Final Answer:
+{final_answer}
+"""
+
+    # STEP 1: PLANNING
+    @tracing.traced("agent.plan")
+    def plan_steps(self, question: str) -> str:
+        return self.llm.generate(
+            self._plan_prompt(question), system=self.PLAN_INSTRUCTIONS
+        )
+
+    # STEP 2: SOLVING (EXECUTION)
+    @tracing.traced("agent.solve")
+    def solve(self, question: str) -> str:
+        return self.llm.generate(
+            self._solve_prompt(question), system=self.SOLVE_INSTRUCTIONS
+        )
+
+    # STEP 3: VERIFICATION
+    @tracing.traced("agent.verify")
+    def verify(self, question: str, solution: str) -> str:
+        exact = self._exact_check(question, self._extract_final_answer(solution))
+        if exact is not None:
+            return exact
+        return self.llm.generate(
+            self._verify_prompt(question, solution), system=self.VERIFY_INSTRUCTIONS
+        )
+
+    def _exact_check(self, question: str, answer: str):
+        """
+        PASS / FAIL from the deterministic evaluator, or None if the
+        question is not one it can solve or the fast path is off.
+        """
+        if not self.fast_path:
+            return None
+        correct = fast_path.verify_answer(question, answer)
+        if correct is None:
+            return None
+        return "PASS" if correct else "FAIL"
 
     # ANSWER EXTRACTION
     def _extract_final_answer(self, text: str) -> str:
@@ -81,60 +197,351 @@ Solution:
             return match.group(1).strip()
         return "N/A"
 
-    # USER-FRIENDLY EXPLANATION
-    def _build_user_reasoning(self, question: str, final_answer: str) -> str:
-        prompt = f"""
-Explain the solution in ONE concise paragraph for a user.
+    # SELF-CONSISTENCY
+    def _normalize_answer(self, answer: str) -> str:
+        return " ".join(answer.lower().rstrip(".").split())
 
-Rules:
-- No formulas
-- No step numbers
-- Simple explanation
+    def _vote(self, answers, rejected=()):
+        """
+        Majority vote over extracted answers, compared case- and
+        whitespace-insensitively. Unparsed ("N/A") answers and answers
+        that already failed verification only count if nothing else is
+        left. Ties go to the earliest answer.
+        Returns (winning answer, {answer: votes}).
+        """
+        candidates = [
+            answer for answer in answers
+            if answer != "N/A" and self._normalize_answer(answer) not in rejected
+        ] or answers
 
-Question:
-{question}
+        votes = {}
+        first_seen = {}
+        for answer in candidates:
+            key = self._normalize_answer(answer)
+            votes[key] = votes.get(key, 0) + 1
+            first_seen.setdefault(key, answer)
 
-Final Answer:
-{final_answer}
-"""
-        reasoning = self.llm.generate(prompt)
+        winner = max(votes, key=votes.get)
+        return first_seen[winner], votes
+
+    def _within_budget(self, llm, calls_made, next_calls):
+        """
+        True if next_calls more LLM calls fit in the per-question budget.
+        Responses served from the cache are free.
+        """
+        stats = llm.stats()
+        calls_made -= stats["cache_hits"]
+        if self.max_calls is not None and calls_made + next_calls > self.max_calls:
+            return False
+
+        if self.max_tokens is not None:
+            if stats["prompt_tokens"] + stats["completion_tokens"] >= self.max_tokens:
+                return False
+
+        return True
+
+    # USER-FRIENDLY EXPLANATION
+    def _clean_reasoning(self, reasoning: str) -> str:
         reasoning = reasoning.replace("\\", "")
         reasoning = reasoning.replace("{", "").replace("}", "")
         return reasoning.strip()
 
-    # FULL PIPELINE
-    def run(self, question: str) -> dict:
-        # Step 1: Plan
-        plan_raw = self.plan_steps(question)
+    def _build_user_reasoning(self, question: str, final_answer: str) -> str:
+        reasoning = self.llm.generate(
+            self._explain_prompt(question, final_answer),
+            system=self.EXPLAIN_INSTRUCTIONS
+        )
+        return self._clean_reasoning(reasoning)
+
+    # RESULT ASSEMBLY
+    def _build_result(
+        self,
+        plan_raw,
+        final_answer,
+        verification,
+        user_reasoning,
+        timings,
+        retries=0,
+        consistency=None,
+        cost=None,
+        check_name="Primary Verification",
+        solved_by="llm"
+    ):
         plan_lines = [line.strip() for line in plan_raw.split("\n") if line.strip()]
         plan_text = "Here are the steps to solve the problem:\n\n" + "\n".join(
             [f"{i + 1}. {line}" for i, line in enumerate(plan_lines)]
         )
 
-        # Step 2: Solve
-        solution = self.solve(question)
-        final_answer = self._extract_final_answer(solution)
+        # verification is None when unanimous samples made it unnecessary
+        if verification is None:
+            passed = True
+            details = "SKIPPED (all samples agree)"
+        else:
+            passed = "PASS" in verification.upper()
+            details = "PASS" if passed else "FAIL"
 
-        # Step 3: Verify
-        verification = self.verify(question, solution)
-        passed = "PASS" in verification.upper()
-
-        # Step 4: User explanation
-        user_reasoning = self._build_user_reasoning(question, final_answer)
+        metadata = {
+            "plan": plan_text,
+            "checks": [
+                {
+                    "check_name": check_name,
+                    "passed": passed,
+                    "details": details
+                }
+            ],
+            "retries": retries,
+            "solved_by": solved_by,
+            "timings": timings
+        }
+        if consistency is not None:
+            metadata["self_consistency"] = consistency
+        if cost is not None:
+            metadata["cost"] = cost
 
         return {
             "answer": final_answer,
             "status": "success" if passed else "verification_failed",
             "reasoning_visible_to_user": user_reasoning,
+            "metadata": metadata
+        }
+
+    def _failed_result(self, error):
+        # The LLM was unreachable or kept failing after retries
+        return {
+            "answer": "N/A",
+            "status": "failed",
+            "reasoning_visible_to_user": "",
             "metadata": {
-                "plan": plan_text,
-                "checks": [
-                    {
-                        "check_name": "Primary Verification",
-                        "passed": passed,
-                        "details": "PASS" if passed else "FAIL"
-                    }
-                ],
+                "error": str(error),
+                "checks": [],
                 "retries": 0
             }
-        }
\ No newline at end of file
+        }
+
+    # FULL PIPELINE
+    def run(self, question: str) -> dict:
+        try:
+            # One shared loop, so the async client and its connections
+            # are reused across questions
+            return run_coroutine(self.run_async(question))
+
+        except LLMError as e:
+            return self._failed_result(e)
+
+    async def _gather(self, coroutines):
+        # Concurrently, or one after another for the sequential pipeline
+        if self.concurrent:
+            tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+            try:
+                return await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+        return [await coroutine for coroutine in coroutines]
+
+    async def run_async(self, question: str) -> dict:
+        """
+        Plan, solve, verify and explain, with self-consistency retries:
+
+            plan ───────────────────────────────────────┐
+            solve x samples ─ vote ─┬─ verify ─ PASS? ──┼─> result
+                   ^                └─ explain ─────────┘
+                   └──── FAIL and budget left ─┘
+
+        Each attempt samples `samples` solutions at once and majority-votes
+        their final answers. Verification is skipped when two or more
+        samples of the same attempt all agree; on FAIL a new attempt is
+        made while the call/token budget allows, and answers that failed
+        are voted out.
+
+        With concurrent=True, plan runs alongside solving and explain
+        starts together with verify (it is redone only if a retry changes
+        the answer), so the common case costs solve + verify in wall-clock
+        time. concurrent=False runs every call one after another.
+
+        The run and each stage are tracing spans (see tracing.py).
+        """
+        with tracing.span("agent.run", concurrent=self.concurrent) as span:
+            result = await self._run_pipeline(question)
+            metadata = result["metadata"]
+            cost = metadata.get("cost", {})
+            span.set_attributes(
+                status=result["status"],
+                solved_by=metadata.get("solved_by"),
+                retries=metadata.get("retries", 0),
+                llm_calls=cost.get("llm_calls", 0),
+                prompt_tokens=cost.get("prompt_tokens", 0),
+                completion_tokens=cost.get("completion_tokens", 0),
+                cache_hits=cost.get("cache", {}).get("hits", 0)
+            )
+            return result
+
+    async def _run_pipeline(self, question: str) -> dict:
+        llm = self.async_client_class(
+            model_name=self.model_name, cache=self.response_cache
+        )
+        timings = {}
+        calls_made = 0
+
+        async def ask(stage, prompt, sample=0):
+            nonlocal calls_made
+            calls_made += 1
+            stage_start = time.perf_counter()
+            try:
+                with tracing.span(f"agent.{stage}", sample=sample):
+                    return await llm.generate(
+                        prompt, system=self.INSTRUCTIONS[stage], sample=sample
+                    )
+            finally:
+                elapsed = time.perf_counter() - stage_start
+                timings[stage] = round(timings.get(stage, 0.0) + elapsed, 3)
+
+        async def explain(answer):
+            reasoning = await ask("explain", self._explain_prompt(question, answer))
+            return self._clean_reasoning(reasoning)
+
+        start = time.perf_counter()
+
+        # Step 0: Exact answer for arithmetic / time questions
+        if self.fast_path:
+            with tracing.span("agent.fast_path") as span:
+                exact = fast_path.solve(question)
+                span.set_attribute("hit", exact is not None)
+            if exact is not None:
+                if self.fast_path_explain:
+                    user_reasoning = await explain(exact["answer"])
+                else:
+                    user_reasoning = exact["explanation"]
+                timings["total"] = round(time.perf_counter() - start, 3)
+
+                return self._build_result(
+                    exact["plan"],
+                    exact["answer"],
+                    "PASS",
+                    user_reasoning,
+                    timings,
+                    cost=self._cost(llm),
+                    check_name="Exact Computation",
+                    solved_by=f"fast_path:{exact['kind']}"
+                )
+
+        solutions = []
+        answers = []
+        rejected = set()
+        retries = 0
+        explain_task = None
+        explained_answer = None
+
+        # Step 1: Plan
+        plan_task = asyncio.ensure_future(ask("plan", self._plan_prompt(question)))
+        try:
+            if not self.concurrent:
+                await plan_task
+
+            while True:
+                # Step 2: Solve (samples at once) and vote
+                new_solutions = await self._gather(
+                    [
+                        # Distinct sample numbers so cached samples stay independent
+                        ask("solve", self._solve_prompt(question), sample=len(solutions) + i)
+                        for i in range(self.samples)
+                    ]
+                )
+                solutions.extend(new_solutions)
+                answers.extend(self._extract_final_answer(s) for s in new_solutions)
+                final_answer, votes = self._vote(answers, rejected)
+
+                # Only answers that already failed are left: stop retrying
+                if self._normalize_answer(final_answer) in rejected:
+                    verification = "FAIL"
+                    break
+
+                # Step 4 (speculative): explain while verifying
+                if self.concurrent and explain_task is None:
+                    explained_answer = final_answer
+                    explain_task = asyncio.ensure_future(explain(final_answer))
+
+                # Step 3: Verify, unless every sample of this attempt gave the
+                # winning answer
+                attempt = {
+                    self._normalize_answer(answer)
+                    for answer in answers[-len(new_solutions):]
+                }
+                unanimous = (
+                    len(new_solutions) > 1
+                    and attempt == {self._normalize_answer(final_answer)}
+                    and final_answer != "N/A"
+                )
+                if unanimous:
+                    verification = None
+                    break
+
+                # Questions the evaluator can check never get here: the fast
+                # path has already answered them
+                solution = solutions[answers.index(final_answer)]
+                verification = await ask(
+                    "verify", self._verify_prompt(question, solution)
+                )
+                if "PASS" in verification.upper():
+                    break
+
+                # Retry: new samples + verify + possibly a new explanation
+                if retries >= self.max_retries:
+                    break
+                if not self._within_budget(llm, calls_made, self.samples + 2):
+                    break
+                rejected.add(self._normalize_answer(final_answer))
+                retries += 1
+
+            # Step 4: User explanation (for the final answer)
+            if explain_task is not None and explained_answer == final_answer:
+                user_reasoning = await explain_task
+            else:
+                if explain_task is not None:
+                    explain_task.cancel()
+                user_reasoning = await explain(final_answer)
+
+            plan_raw = await plan_task
+            timings["total"] = round(time.perf_counter() - start, 3)
+
+            consistency = {
+                "samples": len(answers),
+                "votes": votes,
+                "agreement": round(
+                    votes[self._normalize_answer(final_answer)] / len(answers), 2
+                ),
+                "verification_skipped": verification is None
+            }
+
+            return self._build_result(
+                plan_raw,
+                final_answer,
+                verification,
+                user_reasoning,
+                timings,
+                retries=retries,
+                consistency=consistency,
+                cost=self._cost(llm)
+            )
+        finally:
+            # On an error, do not leave stage tasks running on the loop
+            for task in (plan_task, explain_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def _cost(self, llm):
+        stats = llm.stats()
+        return {
+            "llm_calls": stats["calls"],
+            "prompt_tokens": stats["prompt_tokens"],
+            "completion_tokens": stats["completion_tokens"],
+            "max_calls": self.max_calls,
+            "max_tokens": self.max_tokens,
+            "cache": {
+                "hits": stats["cache_hits"],
+                "misses": stats["cache_misses"],
+                "hit_rate": round(stats["cache_hit_rate"], 2),
+                "saved_latency": round(stats["saved_latency"], 3)
+            }
+        }
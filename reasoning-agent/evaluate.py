@@ -0,0 +1,330 @@
+"""
+Offline evaluation of ReasoningAgent over a JSONL dataset.
+
+Each input line is {"question": ..., "answer": ...} with an optional
+"id". Results are appended to the output JSONL as they finish, so an
+interrupted run continues where it stopped with --resume.
+
+Usage:
+    python evaluate.py questions.jsonl --output results.jsonl --workers 4
+    python evaluate.py questions.jsonl --backend stub --stub-latency 0.2
+    python evaluate.py questions.jsonl --trace traces.json --metrics metrics.prom
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import fast_path
+import tracing
+from agent import ReasoningAgent
+from stub_llm import StubLLMClient
+
+STAGES = ("plan", "solve", "verify", "explain", "total")
+
+
+# DATASET & CHECKPOINT
+def load_dataset(path):
+    """
+    Read questions from a JSONL file. Items without an "id" are
+    numbered by line.
+    """
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "question" not in item:
+                raise ValueError(f"Line {line_number + 1} has no question.")
+            item.setdefault("id", line_number)
+            items.append(item)
+    return items
+
+
+def load_checkpoint(path):
+    """
+    Results already written to the output file, by question id.
+    A partially written last line (from a crash) is ignored.
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[record["id"]] = record
+    return done
+
+
+# SCORING
+def _normalize(answer):
+    answer = str(answer).lower().replace("–", "-").replace("—", "-")
+    answer = re.sub(r"\s*-\s*", "-", answer)
+    return " ".join(answer.rstrip(".").split())
+
+
+def is_correct(answer, expected):
+    """
+    Compare an answer with the expected one: exact after normalizing
+    case, spacing and dashes, numerically for numbers, and by total
+    minutes for durations.
+    """
+    if expected is None:
+        return None
+    expected = str(expected)
+    if _normalize(answer) == _normalize(expected):
+        return True
+
+    number = r"-?\d+(?:\.\d+)?"
+    if re.fullmatch(number, _normalize(expected).replace(",", "")):
+        found = re.findall(number, str(answer).replace(",", ""))
+        target = float(expected.replace(",", ""))
+        return len(found) == 1 and abs(float(found[0]) - target) < 1e-6
+
+    expected_minutes = fast_path.parse_duration(str(expected))
+    if expected_minutes is not None:
+        return fast_path.parse_duration(str(answer)) == expected_minutes
+
+    return False
+
+
+def percentile(values, q):
+    """
+    q-th percentile (0-100) with linear interpolation.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+# RUNNER
+class RateLimiter:
+    """
+    Lets at most `rate` calls start per second across all workers.
+    """
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_start = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        time.sleep(max(0.0, start - now))
+
+
+def evaluate_question(agent, item):
+    start = time.perf_counter()
+    result = agent.run(item["question"])
+    metadata = result["metadata"]
+    expected = item.get("answer")
+
+    return {
+        "id": item["id"],
+        "question": item["question"],
+        "expected": expected,
+        "answer": result["answer"],
+        "correct": is_correct(result["answer"], expected),
+        "status": result["status"],
+        "retries": metadata.get("retries", 0),
+        "solved_by": metadata.get("solved_by"),
+        "llm_calls": metadata.get("cost", {}).get("llm_calls", 0),
+        "timings": metadata.get("timings", {"total": time.perf_counter() - start}),
+        "error": metadata.get("error")
+    }
+
+
+def error_record(item, error, elapsed):
+    """
+    Result for a question whose run raised: graded as wrong, so one bad
+    question is reported instead of stopping the whole evaluation.
+    """
+    expected = item.get("answer")
+    return {
+        "id": item["id"],
+        "question": item["question"],
+        "expected": expected,
+        "answer": "N/A",
+        "correct": None if expected is None else False,
+        "status": "error",
+        "retries": 0,
+        "solved_by": None,
+        "llm_calls": 0,
+        "timings": {"total": elapsed},
+        "error": f"{type(error).__name__}: {error}"
+    }
+
+
+def run_evaluation(items, agent, output_path, workers=4, rate=None, resume=False):
+    """
+    Run the agent over items with a worker pool, appending each result to
+    output_path as soon as it is done. With resume, items already in
+    output_path are skipped. Returns all results (old and new).
+    """
+    done = load_checkpoint(output_path) if resume else {}
+
+    # Start from a clean file holding only the complete results
+    with open(output_path + ".tmp", "w", encoding="utf-8") as f:
+        for record in done.values():
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(output_path + ".tmp", output_path)
+
+    pending = [item for item in items if item["id"] not in done]
+    limiter = RateLimiter(rate)
+    write_lock = threading.Lock()
+
+    def run_one(item):
+        limiter.wait()
+        start = time.perf_counter()
+        try:
+            return evaluate_question(agent, item)
+        except Exception as e:
+            print(f"Question {item['id']} failed: {e}")
+            return error_record(item, e, time.perf_counter() - start)
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_one, item) for item in pending]
+            for future in as_completed(futures):
+                record = future.result()
+                with write_lock:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                done[record["id"]] = record
+
+    return [done[item["id"]] for item in items if item["id"] in done]
+
+
+def summarize(records, elapsed=None, new_records=None):
+    graded = [r for r in records if r["correct"] is not None]
+    summary = {
+        "questions": len(records),
+        "accuracy": (
+            sum(r["correct"] for r in graded) / len(graded) if graded else None
+        ),
+        "statuses": {},
+        "llm_calls_per_question": (
+            sum(r["llm_calls"] for r in records) / len(records) if records else 0.0
+        ),
+        "latency": {}
+    }
+
+    for record in records:
+        summary["statuses"][record["status"]] = (
+            summary["statuses"].get(record["status"], 0) + 1
+        )
+
+    for stage in STAGES:
+        values = [r["timings"][stage] for r in records if stage in r["timings"]]
+        if values:
+            summary["latency"][stage] = {
+                "p50": round(percentile(values, 50), 3),
+                "p95": round(percentile(values, 95), 3)
+            }
+
+    if elapsed and new_records:
+        summary["throughput_qps"] = round(new_records / elapsed, 3)
+
+    return summary
+
+
+def print_summary(summary):
+    accuracy = summary["accuracy"]
+    print(f"\nQuestions: {summary['questions']}")
+    print(f"Accuracy: {'n/a' if accuracy is None else f'{accuracy:.1%}'}")
+    print(f"Statuses: {summary['statuses']}")
+    print(f"LLM calls per question: {summary['llm_calls_per_question']:.2f}")
+    if "throughput_qps" in summary:
+        print(f"Throughput: {summary['throughput_qps']} questions/s")
+
+    print(f"\n{'stage':<10}{'p50 s':>9}{'p95 s':>9}")
+    for stage, latency in summary["latency"].items():
+        print(f"{stage:<10}{latency['p50']:>9.3f}{latency['p95']:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("dataset", help="JSONL file with question / answer")
+    parser.add_argument("--output", default="results.jsonl")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=None,
+                        help="max questions started per second")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip questions already in --output")
+    parser.add_argument("--model", default="phi3:mini")
+    parser.add_argument("--samples", type=int, default=1)
+    parser.add_argument("--max-calls", type=int, default=8)
+    parser.add_argument("--no-fast-path", action="store_true")
+    parser.add_argument("--response-cache", default=None,
+                        help="response cache file (default: no cache)")
+    parser.add_argument("--backend", choices=["ollama", "stub"], default="ollama")
+    parser.add_argument("--stub-latency", type=float, default=0.0,
+                        help="seconds per call for the stub backend")
+    parser.add_argument("--trace", default=None,
+                        help="write spans of the run as OpenTelemetry JSON")
+    parser.add_argument("--metrics", default=None,
+                        help="write span metrics as Prometheus text")
+    args = parser.parse_args()
+
+    if args.trace or args.metrics:
+        tracing.enable()
+
+    items = load_dataset(args.dataset)
+
+    if args.backend == "stub":
+        # The stub "knows" the expected answers
+        StubLLMClient.answers = {
+            item["question"]: str(item.get("answer")) for item in items
+        }
+        StubLLMClient.latency = args.stub_latency
+
+    agent = ReasoningAgent(
+        model_name=args.model,
+        samples=args.samples,
+        max_calls=args.max_calls,
+        fast_path=not args.no_fast_path,
+        response_cache=args.response_cache,
+        backend=args.backend
+    )
+
+    before = len(load_checkpoint(args.output)) if args.resume else 0
+    start = time.perf_counter()
+    records = run_evaluation(
+        items,
+        agent,
+        args.output,
+        workers=args.workers,
+        rate=args.rate,
+        resume=args.resume
+    )
+    elapsed = time.perf_counter() - start
+
+    print_summary(summarize(records, elapsed, len(records) - before))
+
+    if args.trace:
+        tracing.export_otel_json(args.trace)
+        print(f"\nSpans written to {args.trace}")
+    if args.metrics:
+        tracing.export_prometheus(args.metrics)
+        print(f"Span metrics written to {args.metrics}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Deterministic solver for the question types that do not need a model:
+plain arithmetic, durations between two clock times and time ranges
+(a start time plus a duration).
+
+solve(question) returns a result dict or None when the question is not
+one of these; verify_answer(question, answer) checks an answer against
+the exact result.
+"""
+import ast
+import operator
+import re
+
+
+# ARITHMETIC
+OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg
+}
+
+MAX_EXPONENT = 64
+
+# Largest intermediate result (about 1e300): bigger numbers are not a
+# plain calculation, and huge integers are slow to compute and print
+MAX_MAGNITUDE = 1e300
+MAX_INT_BITS = 997
+
+WORD_OPERATORS = [
+    (r"\bmultiplied by\b", "*"),
+    (r"\bdivided by\b", "/"),
+    (r"\btimes\b", "*"),
+    (r"\bplus\b", "+"),
+    (r"\bminus\b", "-"),
+    (r"\bsquared\b", "**2"),
+    (r"\bcubed\b", "**3"),
+    (r"(\d(?:\.\d+)?)\s*%\s*of\b", r"\1/100*"),
+    (r"[×xX](?=\s*[\d(])", "*"),
+    (r"÷", "/"),
+    (r"\^", "**")
+]
+
+QUESTION_PREFIX = re.compile(
+    r"^\s*(what is|what's|calculate|compute|evaluate|how much is|solve)\s*:?\s*",
+    re.IGNORECASE
+)
+
+EXPRESSION = re.compile(r"^[\d\s.+\-*/%()]+$")
+
+
+def evaluate_expression(expression):
+    """
+    Evaluate an arithmetic expression by walking its Python AST.
+    Only numbers, + - * / // % ** and parentheses are allowed;
+    anything else, and any result beyond MAX_MAGNITUDE, raises ValueError.
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Not an arithmetic expression: {expression}") from e
+
+    def checked(value):
+        if isinstance(value, int):
+            if value.bit_length() > MAX_INT_BITS:
+                raise ValueError("Result too large.")
+        elif isinstance(value, float):
+            # Also rejects inf and nan
+            if not abs(value) <= MAX_MAGNITUDE:
+                raise ValueError("Result too large.")
+        else:
+            # e.g. a complex root of a negative number
+            raise ValueError("Not a real number.")
+        return value
+
+    def walk(node):
+        if isinstance(node, ast.Expression):
+            return walk(node.body)
+
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return checked(node.value)
+
+        if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            left, right = walk(node.left), walk(node.right)
+            if isinstance(node.op, ast.Pow) and abs(right) > MAX_EXPONENT:
+                raise ValueError("Exponent too large.")
+            return checked(OPERATORS[type(node.op)](left, right))
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+            return checked(UNARY_OPERATORS[type(node.op)](walk(node.operand)))
+
+        raise ValueError(f"Unsupported syntax: {ast.dump(node)}")
+
+    try:
+        return walk(tree)
+    except ZeroDivisionError as e:
+        raise ValueError("Division by zero.") from e
+    except OverflowError as e:
+        raise ValueError("Result too large.") from e
+
+
+def format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, int):
+        return str(value)
+    return f"{round(value, 6):.6f}".rstrip("0").rstrip(".")
+
+
+def extract_expression(question):
+    """
+    Return the arithmetic expression the question consists of, or None.
+    The whole question (apart from "What is ..." and a trailing "?" or
+    "=") must be the expression, so word problems are left to the LLM.
+    """
+    text = QUESTION_PREFIX.sub("", question.strip())
+    text = text.rstrip(" ?=.")
+    for pattern, replacement in WORD_OPERATORS:
+        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    text = text.replace(",", "")
+
+    if not EXPRESSION.match(text):
+        return None
+    # A lone number is not a calculation
+    if len(re.findall(r"\d+(?:\.\d+)?", text)) < 2:
+        return None
+    return text
+
+
+# TIME
+CLOCK_TIME = re.compile(
+    r"\b(\d{1,2}):(\d{2})\s*([ap])?\.?m?\.?(?![\w:])"
+    r"|\b(\d{1,2})\s*([ap])\.?m\b\.?",
+    re.IGNORECASE
+)
+
+DURATION = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(hours?|hrs?|h|minutes?|mins?)\b",
+    re.IGNORECASE
+)
+
+# One duration, possibly in two units ("2 hours and 30 minutes")
+DURATION_PHRASE = re.compile(
+    r"\d+(?:\.\d+)?\s*(?:hours?|hrs?|h)\b(?:\s*(?:and\s*)?\d+\s*(?:minutes?|mins?)\b)?"
+    r"|\d+(?:\.\d+)?\s*(?:minutes?|mins?)\b",
+    re.IGNORECASE
+)
+
+DURATION_QUESTION = re.compile(
+    r"how long|how many (hours|minutes)|duration|time between|"
+    r"time difference|elapsed",
+    re.IGNORECASE
+)
+
+RANGE_QUESTION = re.compile(
+    r"\b(end|ends|finish|finishes|until|over|range|slot|when)\b",
+    re.IGNORECASE
+)
+
+# Questions about a count, never answered with a time range
+COUNT_QUESTION = re.compile(r"\bhow (many|much)\b", re.IGNORECASE)
+
+NUMBER_WORDS = re.compile(
+    r"\b(one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|"
+    r"fifteen|twenty|thirty|forty|fifty|sixty|once|twice|half|double|"
+    r"quarter|dozen)\b",
+    re.IGNORECASE
+)
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_times(text):
+    """
+    Clock times in text as minutes after midnight, in order.
+    """
+    times = []
+    for match in CLOCK_TIME.finditer(text):
+        if match.group(1) is not None:
+            hours, minutes, meridiem = int(match.group(1)), int(match.group(2)), match.group(3)
+        else:
+            hours, minutes, meridiem = int(match.group(4)), 0, match.group(5)
+
+        if minutes >= 60 or hours > 24 or (meridiem and not 1 <= hours <= 12):
+            continue
+        if meridiem:
+            hours = hours % 12 + (12 if meridiem.lower() == "p" else 0)
+        times.append((hours * 60 + minutes) % MINUTES_PER_DAY)
+    return times
+
+
+def parse_duration(text):
+    """
+    Total minutes of a duration such as "3 hours 35 minutes", "1.5 h"
+    or "215 min", or None if there is none.
+    """
+    total = None
+    for amount, unit in DURATION.findall(text):
+        minutes = float(amount) * (60 if unit.lower().startswith("h") else 1)
+        total = (total or 0) + minutes
+    return total
+
+
+def has_other_quantities(text):
+    """
+    True if text has numbers besides its clock times and durations
+    ("3 sessions", "twice"), i.e. it is a word problem.
+    """
+    text = DURATION.sub(" ", CLOCK_TIME.sub(" ", text))
+    return bool(re.search(r"\d", text) or NUMBER_WORDS.search(text))
+
+
+def format_duration(minutes):
+    hours, minutes = divmod(int(round(minutes)), 60)
+    parts = []
+    if hours:
+        parts.append(f"{hours} hour{'s' if hours != 1 else ''}")
+    if minutes or not hours:
+        parts.append(f"{minutes} minute{'s' if minutes != 1 else ''}")
+    return " ".join(parts)
+
+
+def format_time(minutes):
+    hours, minutes = divmod(int(round(minutes)) % MINUTES_PER_DAY, 60)
+    return f"{hours:02d}:{minutes:02d}"
+
+
+# SOLVER
+def solve(question):
+    """
+    Solve the question exactly if it is plain arithmetic, a duration
+    between two clock times or a time range. Returns a dict with kind,
+    answer, plan and explanation, or None.
+    """
+    expression = extract_expression(question)
+    if expression is not None:
+        try:
+            value = evaluate_expression(expression)
+            answer = format_number(value)
+        except (ValueError, OverflowError):
+            return None
+
+        expression = ast.unparse(ast.parse(expression.strip(), mode="eval"))
+        return {
+            "kind": "arithmetic",
+            "answer": answer,
+            "value": value,
+            "plan": f"Evaluate {expression}",
+            "explanation": f"Evaluating {expression} gives {answer}."
+        }
+
+    # Like arithmetic, only questions that are nothing but the times
+    # (and for a range, one duration) are solved here
+    if has_other_quantities(question):
+        return None
+
+    times = parse_times(question)
+    # Durations inside the question, with the clock times removed
+    duration = parse_duration(CLOCK_TIME.sub(" ", question))
+
+    if len(times) == 2 and duration is None and DURATION_QUESTION.search(question):
+        start, end = times
+        # An end before the start means the interval crosses midnight
+        minutes = (end - start) % MINUTES_PER_DAY
+        if re.search(r"how many minutes", question, re.IGNORECASE):
+            answer = f"{minutes} minutes"
+        else:
+            answer = format_duration(minutes)
+
+        return {
+            "kind": "duration",
+            "answer": answer,
+            "value": minutes,
+            "plan": (
+                f"Convert {format_time(start)} and {format_time(end)} to minutes\n"
+                "Subtract the start from the end"
+            ),
+            "explanation": (
+                f"From {format_time(start)} to {format_time(end)} is {answer}."
+            )
+        }
+
+    if (
+        len(times) == 1
+        and duration
+        and len(DURATION_PHRASE.findall(CLOCK_TIME.sub(" ", question))) == 1
+        and RANGE_QUESTION.search(question)
+        and not COUNT_QUESTION.search(question)
+    ):
+        start = times[0]
+        end = start + duration
+        answer = f"{format_time(start)}–{format_time(end)}"
+
+        return {
+            "kind": "time_range",
+            "answer": answer,
+            "value": (start, end % MINUTES_PER_DAY),
+            "plan": (
+                f"Start at {format_time(start)}\n"
+                f"Add {format_duration(duration)}"
+            ),
+            "explanation": (
+                f"Starting at {format_time(start)} and lasting "
+                f"{format_duration(duration)}, it runs {answer}."
+            )
+        }
+
+    return None
+
+
+def verify_answer(question, answer):
+    """
+    Check an answer against the exact result. Returns True or False,
+    or None when the question cannot be solved deterministically.
+    """
+    expected = solve(question)
+    if expected is None:
+        return None
+
+    if expected["kind"] == "arithmetic":
+        numbers = re.findall(r"-?\d+(?:\.\d+)?", answer.replace(",", ""))
+        if not numbers:
+            return False
+        return abs(float(numbers[0]) - expected["value"]) <= 1e-6 * max(
+            1.0, abs(expected["value"])
+        )
+
+    if expected["kind"] == "duration":
+        minutes = parse_duration(answer)
+        if minutes is None:
+            # Also accept H:MM
+            times = parse_times(answer)
+            minutes = times[0] if len(times) == 1 else None
+        return minutes is not None and round(minutes) == expected["value"]
+
+    # Either the full range or just its end time
+    start, end = expected["value"]
+    return parse_times(answer) in ([start, end], [end])
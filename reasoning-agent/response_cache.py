@@ -0,0 +1,112 @@
+import time
+import json
+import hashlib
+import sqlite3
+import threading
+
+
+class ResponseCache:
+    """
+    Disk-backed LRU cache of LLM responses, stored in SQLite.
+
+    Entries are keyed by the SHA-256 of (model, messages, options, sample),
+    so the same prompt to the same model with the same settings is only
+    generated once. sample lets callers ask for several independent
+    responses to one prompt (e.g. self-consistency). The least recently
+    used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, db_path="response_cache.sqlite", max_entries=10_000):
+        self.max_entries = max_entries
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # WAL without a sync per commit: a lookup is not slowed down by an
+        # fsync, and losing the last few entries on a crash is harmless
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                latency REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_latency = 0.0
+
+    @staticmethod
+    def key(model_name, messages, options=None, sample=0):
+        payload = json.dumps(
+            {
+                "model": model_name,
+                "messages": messages,
+                "options": options,
+                "sample": sample
+            },
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Return (response, latency of the original call), or None.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response, latency FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.conn.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?",
+                (time.time(), key)
+            )
+            self.conn.commit()
+            self.hits += 1
+            self.saved_latency += row[1]
+            return row[0], row[1]
+
+    def put(self, key, response, latency):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, latency, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, response, latency, time.time())
+            )
+            self.conn.execute(
+                "DELETE FROM responses WHERE key NOT IN ("
+                "SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        with self.lock:
+            entries = self.conn.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()[0]
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_latency": round(self.saved_latency, 3),
+            "entries": entries
+        }
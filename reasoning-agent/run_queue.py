@@ -0,0 +1,63 @@
+import threading
+
+
+class QueueFull(Exception):
+    """
+    Raised when a run is submitted while the queue is already full.
+    """
+
+
+class RunQueue:
+    """
+    Bounded concurrency queue for calls to the local model.
+
+    At most max_concurrent runs execute at once; up to max_waiting more
+    block until a slot frees up. Anything beyond that is rejected with
+    QueueFull right away, so callers get backpressure instead of piling
+    more requests onto Ollama.
+    """
+
+    def __init__(self, max_concurrent=2, max_waiting=8):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.running = 0
+        self.waiting = 0
+
+    def submit(self, fn, *args, timeout=None):
+        """
+        Run fn(*args) once a slot is free and return its result.
+        Raises QueueFull if the queue is full or no slot frees up
+        within timeout seconds.
+        """
+        with self._lock:
+            if self.running + self.waiting >= self.max_concurrent + self.max_waiting:
+                raise QueueFull("Too many requests in progress, please try again.")
+            self.waiting += 1
+
+        acquired = self._slots.acquire(timeout=timeout)
+        with self._lock:
+            self.waiting -= 1
+            if acquired:
+                self.running += 1
+
+        if not acquired:
+            raise QueueFull("Timed out waiting for a free slot, please try again.")
+
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "waiting": self.waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_waiting": self.max_waiting
+            }
@@ -1,6 +1,11 @@
 import streamlit as st
 from agent import ReasoningAgent
-import time
+from run_queue import RunQueue, QueueFull
+
+# Runs allowed against the local model at once, and how many more may wait
+MAX_CONCURRENT_RUNS = 2
+MAX_WAITING_RUNS = 8
+QUEUE_TIMEOUT = 300
 
 st.set_page_config(
     page_title="Multi-Reasoning Step Agent",
@@ -17,6 +22,21 @@ st.markdown(
 
 st.divider()
 
+
+# SHARED RESOURCES (one per process, shared by all sessions)
+@st.cache_resource
+def get_agent():
+    return ReasoningAgent()
+
+
+@st.cache_resource
+def get_run_queue():
+    return RunQueue(MAX_CONCURRENT_RUNS, MAX_WAITING_RUNS)
+
+
+agent = get_agent()
+run_queue = get_run_queue()
+
 # INPUT
 question = st.text_input(
     "Enter your question",
@@ -39,14 +59,22 @@ if run_btn:
     else:
         st.session_state.status_message = "Thinking (Planning → Executing → Verifying…)"
         st.session_state.result = None
-        # show spinner while agent is working
+
+        queued = run_queue.stats()
+        if queued["running"] >= queued["max_concurrent"]:
+            st.session_state.status_message = (
+                f"Waiting for the model ({queued['waiting']} request(s) ahead)…"
+            )
+
+        # show spinner while agent is working (or waiting for a slot)
         with st.spinner(st.session_state.status_message):
-            agent = ReasoningAgent()
-            result = agent.run(question)
-            st.session_state.result = result
-            # small delay to show spinner effect
-            time.sleep(0.5)
-        st.session_state.status_message = "Reasoning Complete"
+            try:
+                result = run_queue.submit(agent.run, question, timeout=QUEUE_TIMEOUT)
+                st.session_state.result = result
+                st.session_state.status_message = "Reasoning Complete"
+            except QueueFull as e:
+                st.session_state.status_message = ""
+                st.warning(str(e))
 
 # STATUS MESSAGE
 if st.session_state.status_message:
@@ -59,7 +87,10 @@ if st.session_state.result:
     reasoning = result["reasoning_visible_to_user"]
 
     # Display answer on its own line
-    st.success(f"Answer: {answer}")
+    if result["status"] == "failed":
+        st.error(result["metadata"]["error"])
+    else:
+        st.success(f"Answer: {answer}")
 
     # Display reasoning in paragraph below
     st.markdown(reasoning)
@@ -0,0 +1,68 @@
+import re
+import time
+import asyncio
+from llm_client_ollama import LLMClient, AsyncLLMClient
+import tracing
+
+
+class StubLLMClient(LLMClient):
+    """
+    Offline stand-in for Ollama, used by ReasoningAgent(backend="stub")
+    to test and benchmark the pipeline without a model.
+
+    Replies are chosen from the stage instructions in the system message:
+    solve answers with StubLLMClient.answers[question] (or "unknown"),
+    verify passes a solution only if its answer matches that, and plan /
+    explain return fixed text. Every call waits `latency` seconds.
+    Configure through the class attributes.
+    """
+
+    answers = {}
+    latency = 0.0
+
+    def _reply(self, messages):
+        system = messages[0]["content"] if messages[0]["role"] == "system" else ""
+        prompt = messages[-1]["content"]
+
+        match = re.search(r"Question:\s*(.*?)\s*(?:\n\n\w[\w ]*:|\Z)", prompt, re.S)
+        question = match.group(1).strip() if match else prompt.strip()
+        expected = self.answers.get(question, "unknown")
+
+        if "step-by-step plan" in system:
+            content = "1. Read the question\n2. Work out the answer"
+        elif "FINAL ANSWER" in system:
+            content = f"FINAL ANSWER: {expected}"
+        elif "Verify" in system:
+            solution = re.search(r"FINAL ANSWER:\s*(.*)", prompt)
+            passed = solution is not None and solution.group(1).strip() == expected
+            content = "PASS" if passed else "FAIL"
+        else:
+            content = f"The answer is {expected}."
+
+        return {
+            "message": {"role": "assistant", "content": content},
+            "prompt_eval_count": sum(len(m["content"].split()) for m in messages),
+            "eval_count": len(content.split())
+        }
+
+    def chat(self, messages):
+        with tracing.span("llm.chat", model=self.model_name, backend="stub") as span:
+            start = time.perf_counter()
+            time.sleep(self.latency)
+            response = self._reply(messages)
+            self._record(time.perf_counter() - start, response, span=span)
+            return response
+
+
+class AsyncStubLLMClient(AsyncLLMClient, StubLLMClient):
+    """
+    asyncio version of StubLLMClient.
+    """
+
+    async def chat(self, messages):
+        with tracing.span("llm.chat", model=self.model_name, backend="stub") as span:
+            start = time.perf_counter()
+            await asyncio.sleep(self.latency)
+            response = self._reply(messages)
+            self._record(time.perf_counter() - start, response, span=span)
+            return response
@@ -0,0 +1,160 @@
+from agent import ReasoningAgent
+from stub_llm import AsyncStubLLMClient
+from llm_client_ollama import LLMError
+import llm_client_ollama
+import itertools
+import asyncio
+import time
+
+
+class CyclingStubClient(AsyncStubLLMClient):
+    """
+    Solve calls answer from `solutions` in turn; verification always fails.
+    """
+
+    solutions = None
+
+    def _reply(self, messages):
+        response = super()._reply(messages)
+        content = response["message"]["content"]
+        if content.startswith("FINAL ANSWER"):
+            response["message"]["content"] = f"FINAL ANSWER: {next(self.solutions)}"
+        elif content in ("PASS", "FAIL"):
+            response["message"]["content"] = "FAIL"
+        return response
+
+
+def _cycling_agent(solutions, **kwargs):
+    CyclingStubClient.solutions = itertools.cycle(solutions)
+    agent = ReasoningAgent(backend="stub", response_cache=None, fast_path=False, **kwargs)
+    agent.async_client_class = CyclingStubClient
+    return agent
+
+
+def test_unverified_answer_is_not_a_success():
+    agent = _cycling_agent(["7", "8", "7", "9"], samples=3, max_calls=20)
+    result = agent.run("Pick a number.")
+
+    # 9 never failed verification, but was never agreed on either
+    assert result["status"] == "verification_failed"
+    assert not result["metadata"]["self_consistency"]["verification_skipped"]
+    assert not result["metadata"]["checks"][0]["passed"]
+
+
+def test_unanimous_attempt_skips_verification():
+    # First attempt is split and fails, the second one agrees on 9
+    agent = _cycling_agent(["7", "8", "7", "9", "9", "9"], samples=3, max_calls=20)
+    result = agent.run("Pick a number.")
+
+    assert result["answer"] == "9"
+    assert result["status"] == "success"
+    assert result["metadata"]["retries"] == 1
+    assert result["metadata"]["self_consistency"]["verification_skipped"]
+
+
+def test_unlimited_budget_still_stops():
+    # A new answer every time and a verifier that always fails
+    agent = _cycling_agent(
+        (str(n) for n in itertools.count()),
+        samples=1, max_calls=None, max_tokens=None, max_retries=3
+    )
+    result = agent.run("Pick a number.")
+
+    assert result["status"] == "verification_failed"
+    assert result["metadata"]["retries"] == 3
+
+
+def test_stops_when_only_rejected_answers_are_left():
+    agent = _cycling_agent(["7"], samples=1, max_calls=None)
+    result = agent.run("Pick a number.")
+
+    assert result["answer"] == "7"
+    assert result["status"] == "verification_failed"
+    assert result["metadata"]["retries"] == 1
+    assert result["metadata"]["cost"]["llm_calls"] == 5  # plan, 2 solve, verify, explain
+
+
+def test_failure_cancels_pending_stages():
+    stages = []
+
+    class FailingSolveClient(AsyncStubLLMClient):
+        async def chat(self, messages):
+            if "step-by-step plan" in messages[0]["content"]:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    stages.append("plan cancelled")
+                    raise
+            if "FINAL ANSWER" in messages[0]["content"]:
+                raise LLMError("model unavailable")
+            return await super().chat(messages)
+
+    agent = ReasoningAgent(backend="stub", response_cache=None, fast_path=False)
+    agent.async_client_class = FailingSolveClient
+    start = time.perf_counter()
+    result = agent.run("Pick a number.")
+
+    assert result["status"] == "failed"
+    assert time.perf_counter() - start < 1
+    time.sleep(0.1)  # the cancellation runs on the shared loop
+    assert stages == ["plan cancelled"]
+
+
+def test_independent_stages_overlap():
+    class SlowStubClient(AsyncStubLLMClient):
+        latency = 0.1
+
+    results = {}
+    for concurrent in (True, False):
+        agent = ReasoningAgent(
+            backend="stub", response_cache=None, fast_path=False, concurrent=concurrent
+        )
+        agent.async_client_class = SlowStubClient
+        results[concurrent] = agent.run("Pick a number.")
+
+    for result in results.values():
+        assert result["status"] == "success"
+        timings = result["metadata"]["timings"]
+        assert set(timings) == {"plan", "solve", "verify", "explain", "total"}
+        assert all(timings[stage] >= 0.09 for stage in ("plan", "solve", "verify", "explain"))
+
+    # plan runs with solve, explain with verify: two rounds instead of four
+    assert results[True]["answer"] == results[False]["answer"]
+    assert results[True]["metadata"]["timings"]["total"] < 0.3
+    assert results[False]["metadata"]["timings"]["total"] >= 0.4
+
+
+def test_runs_share_one_loop_and_client():
+    async def client_and_loop():
+        return (
+            llm_client_ollama.get_shared_async_client(timeout=5.0),
+            asyncio.get_running_loop()
+        )
+
+    first = llm_client_ollama.run_coroutine(client_and_loop())
+    second = llm_client_ollama.run_coroutine(client_and_loop())
+    assert first == second
+
+    loops = set()
+
+    class LoopRecordingClient(AsyncStubLLMClient):
+        async def chat(self, messages):
+            loops.add(asyncio.get_running_loop())
+            return await super().chat(messages)
+
+    agent = ReasoningAgent(backend="stub", response_cache=None, fast_path=False)
+    agent.async_client_class = LoopRecordingClient
+    for question in ("Pick a number.", "Pick a letter.", "Pick a colour."):
+        agent.run(question)
+    assert loops == {first[1]}
+
+
+if __name__ == "__main__":
+    test_unverified_answer_is_not_a_success()
+    test_unanimous_attempt_skips_verification()
+    test_unlimited_budget_still_stops()
+    test_stops_when_only_rejected_answers_are_left()
+    test_failure_cancels_pending_stages()
+    test_independent_stages_overlap()
+    test_runs_share_one_loop_and_client()
+    print("All agent tests passed.")
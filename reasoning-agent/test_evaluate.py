@@ -0,0 +1,108 @@
+from evaluate import load_dataset, run_evaluation, summarize, is_correct
+from agent import ReasoningAgent
+from stub_llm import StubLLMClient
+import tempfile
+import json
+import os
+
+DATASET = [
+    {"question": "What is 12 * (3 + 4)?", "answer": "84"},
+    {"question": "If a train leaves at 14:30 and arrives at 18:05, how long is the journey?",
+     "answer": "3 hours 35 minutes"},
+    {"question": "Alice has 3 red apples and twice as many green apples. How many apples?",
+     "answer": "9"},
+    {"question": "Which planet is known as the red planet?", "answer": "Mars"}
+]
+
+
+def _write_dataset(folder):
+    path = os.path.join(folder, "questions.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for item in DATASET:
+            f.write(json.dumps(item) + "\n")
+    return path
+
+
+def _stub_agent(items):
+    StubLLMClient.answers = {item["question"]: item["answer"] for item in items}
+    StubLLMClient.latency = 0.01
+    return ReasoningAgent(backend="stub", response_cache=None)
+
+
+def test_is_correct():
+    assert is_correct("84", 84)
+    assert is_correct("The total is 84.", "84")
+    assert not is_correct("85", "84")
+    assert is_correct("215 minutes", "3 hours 35 minutes")
+    assert is_correct("11:00 – 12:00", "11:00–12:00")
+    assert is_correct("mars", "Mars")
+    assert is_correct("anything", None) is None
+
+
+def test_run_and_summarize():
+    folder = tempfile.mkdtemp()
+    items = load_dataset(_write_dataset(folder))
+    output = os.path.join(folder, "results.jsonl")
+
+    records = run_evaluation(items, _stub_agent(items), output, workers=2)
+    summary = summarize(records)
+
+    assert len(records) == len(DATASET)
+    assert summary["accuracy"] == 1.0
+    assert summary["latency"]["total"]["p95"] >= summary["latency"]["total"]["p50"]
+    # Arithmetic and durations never reach solve
+    by_id = {record["id"]: record for record in records}
+    assert by_id[0]["solved_by"] == "fast_path:arithmetic"
+    assert by_id[2]["llm_calls"] == 4
+
+
+def test_resume():
+    folder = tempfile.mkdtemp()
+    items = load_dataset(_write_dataset(folder))
+    output = os.path.join(folder, "results.jsonl")
+
+    # Interrupted run: first two questions done, last line half written
+    run_evaluation(items[:2], _stub_agent(items), output, workers=1)
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"id": 2, "quest')
+
+    records = run_evaluation(items, _stub_agent(items), output, resume=True)
+    assert [record["id"] for record in records] == [0, 1, 2, 3]
+
+    # The broken line is dropped and every result is readable again
+    with open(output, encoding="utf-8") as f:
+        ids = sorted(json.loads(line)["id"] for line in f)
+    assert ids == [0, 1, 2, 3]
+
+
+def test_failing_question_is_recorded():
+    folder = tempfile.mkdtemp()
+    items = load_dataset(_write_dataset(folder))
+    output = os.path.join(folder, "results.jsonl")
+    agent = _stub_agent(items)
+
+    run = agent.run
+    def run_or_raise(question):
+        if question == DATASET[3]["question"]:
+            raise RuntimeError("agent crashed")
+        return run(question)
+    agent.run = run_or_raise
+
+    records = run_evaluation(items, agent, output, workers=2)
+    summary = summarize(records)
+
+    assert [record["id"] for record in records] == [0, 1, 2, 3]
+    assert records[3]["status"] == "error"
+    assert records[3]["error"] == "RuntimeError: agent crashed"
+    assert summary["statuses"] == {"success": 3, "error": 1}
+    assert summary["accuracy"] == 0.75
+    with open(output, encoding="utf-8") as f:
+        assert len(f.readlines()) == 4
+
+
+if __name__ == "__main__":
+    test_is_correct()
+    test_run_and_summarize()
+    test_resume()
+    test_failing_question_is_recorded()
+    print("All evaluation tests passed.")
@@ -0,0 +1,88 @@
+from fast_path import solve, verify_answer, parse_duration
+from agent import ReasoningAgent
+from stub_llm import StubLLMClient
+
+
+def test_exact_questions():
+    assert solve("What is 12 * (3 + 4)?")["answer"] == "84"
+    assert solve("What is 15% of 80?")["answer"] == "12"
+
+    duration = solve(
+        "If a train leaves at 14:30 and arrives at 18:05, how long is the journey?"
+    )
+    assert duration["kind"] == "duration"
+    assert duration["answer"] == "3 hours 35 minutes"
+    assert solve("How many minutes between 23:30 and 0:15?")["answer"] == "45 minutes"
+
+    time_range = solve("A meeting starts at 9:00 and lasts 1 hour 30 minutes. When does it end?")
+    assert time_range["kind"] == "time_range"
+    assert time_range["answer"] == "09:00–10:30"
+
+    assert verify_answer("What is 2 + 3?", "5")
+    assert not verify_answer("What is 2 + 3?", "6")
+    assert verify_answer("A talk starts at 2pm and lasts 45 minutes. When does it end?", "14:45")
+
+
+def test_word_problems_are_left_to_the_llm():
+    # Extra numbers or durations change the arithmetic
+    questions = [
+        "Alice works from 9:00 to 17:00 with a 1 hour lunch break. How many hours does she work?",
+        "Bob works from 9:00 to 17:00 with a half-hour break. How long does he work?",
+        "A workshop starts at 9:00. It has 3 sessions of 50 minutes each. When does it end?",
+        "A class starts at 8:00 and has two lessons of 45 minutes. When does it finish?",
+        "A course starts at 9:00 and runs 2 hours a day. Over how many days?",
+        "A film starts at 20:00, lasts 2 hours and has a 15 minute break. When does it end?",
+        "A race starts at 9:00 on a 400 m track. When does it end?",
+        "Alice has 3 red apples and twice as many green apples. How many apples?"
+    ]
+    for question in questions:
+        assert solve(question) is None, question
+        assert verify_answer(question, "8 hours") is None
+
+    # "m" is metres, not minutes
+    assert parse_duration("5 m") is None
+    assert parse_duration("1 h 5 min") == 65
+
+
+def test_huge_results_are_left_to_the_llm():
+    # Used to raise OverflowError / ValueError out of solve and run()
+    for question in [
+        "What is (10.5**64)**64",
+        "((9**64)**64)**64",
+        "What is 10**200 * 10**200?",
+        "What is 1e300 * 1e300?",
+        "What is (-8)**0.5?"
+    ]:
+        assert solve(question) is None, question
+        assert verify_answer(question, "1") is None
+
+    assert solve("What is 2**64 * 2**64?")["answer"] == str(2**128)
+
+    StubLLMClient.answers = {}
+    agent = ReasoningAgent(backend="stub", response_cache=None, max_calls=4)
+    result = agent.run("What is (10.5**64)**64")
+    assert result["metadata"]["solved_by"] == "llm"
+
+
+def test_exact_check_follows_fast_path():
+    question = "What is 2 + 3?"
+    # A (wrong) LLM verifier must have the last word with the fast path off
+    StubLLMClient.answers = {question: "6"}
+    StubLLMClient.latency = 0.0
+
+    agent = ReasoningAgent(backend="stub", response_cache=None, fast_path=False)
+    assert agent._exact_check(question, "6") is None
+    result = agent.run(question)
+    assert result["answer"] == "6"
+    assert result["metadata"]["checks"][0]["check_name"] == "Primary Verification"
+
+    agent = ReasoningAgent(backend="stub", response_cache=None)
+    assert agent._exact_check(question, "6") == "FAIL"
+
+
+if __name__ == "__main__":
+    test_exact_questions()
+    test_word_problems_are_left_to_the_llm()
+    test_huge_results_are_left_to_the_llm()
+    test_exact_check_follows_fast_path()
+    print("All fast path tests passed.")
@@ -0,0 +1,91 @@
+from response_cache import ResponseCache
+from agent import ReasoningAgent
+import tempfile
+import time
+import os
+
+MESSAGES = [
+    {"role": "system", "content": "Solve the problem."},
+    {"role": "user", "content": "Question: What is 2 + 2?"}
+]
+
+
+def _cache_path():
+    return os.path.join(tempfile.mkdtemp(), "response_cache.sqlite")
+
+
+def test_key():
+    options = {"temperature": 0.2, "top_p": 0.9}
+    key = ResponseCache.key("phi3:mini", MESSAGES, options)
+    assert key == ResponseCache.key(
+        "phi3:mini", MESSAGES, {"top_p": 0.9, "temperature": 0.2}, sample=0
+    )
+    # Every part of the request is in the key
+    assert key != ResponseCache.key("phi3:mini", MESSAGES, options, sample=1)
+    assert key != ResponseCache.key("llama3", MESSAGES, options)
+    assert key != ResponseCache.key("phi3:mini", MESSAGES, {**options, "temperature": 0.7})
+    assert key != ResponseCache.key("phi3:mini", MESSAGES[1:], options)
+
+
+def test_hit_miss_and_persistence():
+    path = _cache_path()
+    cache = ResponseCache(path)
+    key = cache.key("phi3:mini", MESSAGES)
+
+    assert cache.get(key) is None
+    cache.put(key, "FINAL ANSWER: 4", 1.5)
+    assert cache.get(key) == ("FINAL ANSWER: 4", 1.5)
+    assert cache.stats() == {
+        "hits": 1, "misses": 1, "hit_rate": 0.5, "saved_latency": 1.5, "entries": 1
+    }
+
+    # Entries survive a restart; counters start over
+    cache = ResponseCache(path)
+    assert cache.get(key) == ("FINAL ANSWER: 4", 1.5)
+    assert cache.get(cache.key("phi3:mini", MESSAGES, sample=1)) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(_cache_path(), max_entries=2)
+    cache.put("a", "first", 0.1)
+    time.sleep(0.01)
+    cache.put("b", "second", 0.1)
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.put("c", "third", 0.1)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == ("first", 0.1)
+    assert cache.get("c") == ("third", 0.1)
+    assert cache.stats()["entries"] == 2
+
+
+def test_agent_reuses_responses_but_keeps_samples_apart():
+    agent = ReasoningAgent(
+        backend="stub", response_cache=_cache_path(), fast_path=False, samples=3
+    )
+
+    # plan, 3 solve samples (unanimous, so no verify) and explain
+    first = agent.run("Pick a number.")["metadata"]["cost"]
+    assert first["llm_calls"] == 5
+    assert first["cache"]["hits"] == 0 and first["cache"]["misses"] == 5
+    assert agent.response_cache.stats()["entries"] == 5
+
+    second = agent.run("Pick a number.")["metadata"]["cost"]
+    assert second["llm_calls"] == 0
+    assert second["cache"]["hits"] == 5 and second["cache"]["misses"] == 0
+
+    # A different question shares nothing but the cache file
+    third = agent.run("Pick a letter.")["metadata"]["cost"]
+    assert third["cache"]["hits"] == 0
+    assert agent.response_cache.stats()["entries"] == 10
+
+
+if __name__ == "__main__":
+    test_key()
+    test_hit_miss_and_persistence()
+    test_least_recently_used_entries_are_evicted()
+    test_agent_reuses_responses_but_keeps_samples_apart()
+    print("All response cache tests passed.")
@@ -0,0 +1,98 @@
+from run_queue import RunQueue, QueueFull
+import threading
+import time
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def _blocking_run(release, active, peak, lock):
+    def run(value):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        release.wait(timeout=5)
+        with lock:
+            active[0] -= 1
+        return value
+    return run
+
+
+def test_backpressure():
+    queue = RunQueue(max_concurrent=2, max_waiting=1)
+    release = threading.Event()
+    active, peak, lock = [0], [0], threading.Lock()
+    run = _blocking_run(release, active, peak, lock)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda n=n: results.append(queue.submit(run, n)))
+        for n in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: queue.stats()["running"] == 2 and queue.stats()["waiting"] == 1)
+
+    # Two running and one waiting fill the queue: the next run is refused at once
+    start = time.perf_counter()
+    try:
+        queue.submit(run, 3)
+        assert False, "expected QueueFull"
+    except QueueFull:
+        pass
+    assert time.perf_counter() - start < 0.1
+
+    release.set()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert sorted(results) == [0, 1, 2]
+    assert peak[0] == 2
+    assert queue.stats()["running"] == 0 and queue.stats()["waiting"] == 0
+
+
+def test_wait_timeout():
+    queue = RunQueue(max_concurrent=1, max_waiting=4)
+    release = threading.Event()
+    run = _blocking_run(release, [0], [0], threading.Lock())
+
+    holder = threading.Thread(target=queue.submit, args=(run, 0))
+    holder.start()
+    _wait_for(lambda: queue.stats()["running"] == 1)
+
+    try:
+        queue.submit(run, 1, timeout=0.05)
+        assert False, "expected QueueFull"
+    except QueueFull:
+        pass
+    assert queue.stats()["waiting"] == 0
+
+    release.set()
+    holder.join(timeout=2)
+    assert queue.submit(lambda: "free", timeout=0.05) == "free"
+
+
+def test_errors_free_the_slot():
+    queue = RunQueue(max_concurrent=1, max_waiting=0)
+
+    def fail():
+        raise ValueError("model error")
+
+    for _ in range(3):
+        try:
+            queue.submit(fail, timeout=0.05)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+    assert queue.stats()["running"] == 0
+    assert queue.submit(lambda: 42) == 42
+
+
+if __name__ == "__main__":
+    test_backpressure()
+    test_wait_timeout()
+    test_errors_free_the_slot()
+    print("All run queue tests passed.")
@@ -0,0 +1,133 @@
+from agent import ReasoningAgent
+from stub_llm import StubLLMClient
+import tracing
+import asyncio
+import json
+import time
+
+
+def _traced_run(question, answer, **agent_args):
+    StubLLMClient.answers = {question: answer}
+    StubLLMClient.latency = 0.0
+    agent = ReasoningAgent(backend="stub", response_cache=None, **agent_args)
+
+    tracing.reset()
+    tracing.enable()
+    try:
+        result = agent.run(question)
+    finally:
+        tracing.disable()
+    return result, tracing.finished_spans()
+
+
+def test_disabled_records_nothing():
+    tracing.reset()
+    with tracing.span("outer") as span:
+        span.set_attribute("ignored", 1)
+
+    @tracing.traced("decorated")
+    def add(a, b):
+        return a + b
+
+    assert add(1, 2) == 3
+    assert tracing.finished_spans() == []
+
+
+def test_nesting_and_async():
+    tracing.reset()
+    tracing.enable()
+    try:
+        @tracing.traced("child")
+        async def child(i):
+            await asyncio.sleep(0.01)
+            return i
+
+        async def main():
+            with tracing.span("root"):
+                return await asyncio.gather(child(1), child(2))
+
+        assert asyncio.run(main()) == [1, 2]
+
+        try:
+            with tracing.span("failing"):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+    finally:
+        tracing.disable()
+
+    spans = {span.name: span for span in tracing.finished_spans()}
+    root = spans["root"]
+    children = [span for span in tracing.finished_spans() if span.name == "child"]
+    assert len(children) == 2
+    assert all(span.parent_id == root.span_id for span in children)
+    assert all(span.trace_id == root.trace_id for span in children)
+    assert root.parent_id is None and root.duration >= 0.01
+    assert spans["failing"].error == "ValueError: boom"
+    assert spans["failing"].trace_id != root.trace_id
+
+
+def test_agent_stages_are_traced():
+    question = "Which planet is known as the red planet?"
+    result, spans = _traced_run(question, "Mars", samples=2)
+    assert result["answer"] == "Mars"
+
+    names = [span.name for span in spans]
+    for stage in ("agent.run", "agent.plan", "agent.solve", "agent.explain",
+                  "llm.generate", "llm.chat"):
+        assert stage in names, stage
+
+    run = next(span for span in spans if span.name == "agent.run")
+    assert all(span.trace_id == run.trace_id for span in spans)
+    assert run.attributes["status"] == result["status"]
+    assert run.attributes["llm_calls"] == result["metadata"]["cost"]["llm_calls"]
+
+    chat_tokens = sum(
+        span.attributes.get("prompt_tokens", 0) for span in spans if span.name == "llm.chat"
+    )
+    assert chat_tokens == result["metadata"]["cost"]["prompt_tokens"] > 0
+
+    # The fast path answers without any LLM span
+    _, spans = _traced_run("What is 12 * (3 + 4)?", "84", fast_path_explain=False)
+    assert [span.name for span in spans] == ["agent.fast_path", "agent.run"]
+    assert spans[0].attributes["hit"] is True
+
+
+def test_exports():
+    _traced_run("Which planet is known as the red planet?", "Mars")
+
+    otel = json.loads(tracing.export_otel_json())
+    spans = otel["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(spans) == len(tracing.finished_spans())
+    for span in spans:
+        assert len(span["traceId"]) == 32 and len(span["spanId"]) == 16
+        assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+
+    text = tracing.export_prometheus()
+    assert '# TYPE span_duration_seconds histogram' in text
+    assert 'span_duration_seconds_count{span="agent.run"} 1' in text
+    assert 'span_attribute_total{span="llm.chat",attribute="prompt_tokens"}' in text
+    assert 'span_duration_seconds_bucket{span="agent.run",le="+Inf"} 1' in text
+
+
+def test_disabled_overhead():
+    tracing.disable()
+    n = 100_000
+
+    start = time.perf_counter()
+    for _ in range(n):
+        with tracing.span("noop", i=1):
+            pass
+    per_span = (time.perf_counter() - start) / n
+
+    # Generous bound: a disabled span is a flag check and a shared object
+    assert per_span < 5e-6
+
+
+if __name__ == "__main__":
+    test_disabled_records_nothing()
+    test_nesting_and_async()
+    test_agent_stages_are_traced()
+    test_exports()
+    test_disabled_overhead()
+    print("All tracing tests passed.")